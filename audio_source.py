@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Remote Audio Sources
+Picks the smallest suitable audio-only stream of a video URL with yt-dlp, so it can be
+decoded by FFmpeg straight from the network without downloading or muxing the video
+"""
+
+import os
+import re
+from urllib.parse import urlparse
+
+
+# Audio-only streams below this bitrate are skipped when a better one exists; speech
+# recognition gains nothing above it, so the smallest stream at or over it is picked
+MIN_AUDIO_BITRATE = int(os.environ.get("SUBS_MIN_AUDIO_KBPS", "48"))
+
+# Extensions FFmpeg can read directly over HTTP, without asking yt-dlp
+DIRECT_MEDIA_EXTENSIONS = [
+    '.mp4', '.mkv', '.mov', '.avi', '.webm', '.m4v', '.ts', '.mpg', '.mpeg',
+    '.m4a', '.mp3', '.aac', '.opus', '.ogg', '.oga', '.wav', '.flac',
+]
+
+
+def is_url(text):
+    """Whether the text is an http(s) URL rather than a local path"""
+    return urlparse(text.strip()).scheme in ("http", "https")
+
+
+def is_direct_media_url(url):
+    """Whether the URL points straight at a media file"""
+    return os.path.splitext(urlparse(url).path)[1].lower() in DIRECT_MEDIA_EXTENSIONS
+
+
+def format_size(media_format):
+    """Exact or approximate size of a yt-dlp format in bytes (None if unknown)"""
+    return media_format.get('filesize') or media_format.get('filesize_approx')
+
+
+def _bitrate(media_format):
+    return media_format.get('abr') or media_format.get('tbr') or 0
+
+
+def select_audio_format(formats, min_bitrate=MIN_AUDIO_BITRATE):
+    """Pick the smallest audio stream that is still good enough for speech recognition
+
+    Audio-only formats are preferred, smallest first among those with at least
+    ``min_bitrate`` kbps. Without any audio-only format the lowest-bitrate format
+    that carries audio is used, whose video FFmpeg then skips while decoding.
+    """
+    audio_only = [f for f in formats
+                  if f.get('vcodec') == 'none' and f.get('acodec') not in (None, 'none') and f.get('url')]
+    if audio_only:
+        good_enough = [f for f in audio_only if _bitrate(f) >= min_bitrate] or audio_only
+        return min(good_enough, key=lambda f: (format_size(f) or float('inf'), _bitrate(f)))
+    with_audio = [f for f in formats if f.get('acodec') != 'none' and f.get('url')]
+    if not with_audio:
+        return None
+    return min(with_audio, key=lambda f: (f.get('tbr') or float('inf'), format_size(f) or float('inf')))
+
+
+def safe_media_name(title):
+    """File-name-safe version of a video title"""
+    name = re.sub(r'[\\/:*?"<>|\x00-\x1f]+', "_", title).strip(" .")
+    return name[:150] or "video"
+
+
+def resolve_audio_source(url, min_bitrate=MIN_AUDIO_BITRATE):
+    """Find the audio stream to decode for a URL
+
+    Returns a dict with the stream ``url``, the HTTP ``headers`` FFmpeg must send,
+    a file-name-safe ``name`` for the subtitles, and the chosen ``format_id``,
+    ``ext``, ``abr`` (kbps), ``size`` (bytes, may be None) and ``duration``.
+    """
+    if is_direct_media_url(url):
+        path = urlparse(url).path
+        return {
+            'url': url,
+            'headers': {},
+            'name': safe_media_name(os.path.splitext(os.path.basename(path))[0]),
+            'format_id': None,
+            'ext': os.path.splitext(path)[1].lstrip(".").lower(),
+            'abr': None,
+            'size': None,
+            'duration': None,
+        }
+
+    from metadata_cache import extract_info_cached
+
+    info, _ = extract_info_cached(url)
+    media_format = select_audio_format(info.get('formats') or [info], min_bitrate)
+    if media_format is None:
+        raise RuntimeError("No audio stream found for this URL")
+    return {
+        'url': media_format['url'],
+        'headers': media_format.get('http_headers') or info.get('http_headers') or {},
+        'name': safe_media_name(info.get('title') or info.get('id') or "video"),
+        'format_id': media_format.get('format_id'),
+        'ext': media_format.get('ext'),
+        'abr': _bitrate(media_format) or None,
+        'size': format_size(media_format),
+        'duration': info.get('duration'),
+    }
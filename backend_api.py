@@ -16,7 +16,7 @@ def ping():
 
 # TODO: Add endpoints for video download, info, subtitles
 
-import yt_dlp
+from metadata_cache import extract_info_cached, get_metadata_cache
 
 @app.route('/api/video-info', methods=['POST'])
 def video_info():
@@ -28,14 +28,45 @@ def video_info():
         logging.warning('Missing URL in request')
         return jsonify({'error': 'Missing URL'}), 400
     try:
-        ydl_opts = {'quiet': True, 'skip_download': True}
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-        logging.info('Video info fetched successfully')
-        return jsonify({'info': info})
+        info, cached = extract_info_cached(url, refresh=bool(data.get('refresh')))
+        logging.info(f'Video info fetched successfully (cached: {cached})')
+        return jsonify({'info': info, 'cached': cached})
     except Exception as e:
         logging.error(f'Error fetching video info: {e}')
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/metadata-cache', methods=['GET'])
+def metadata_cache_stats():
+    logging.info('Received /api/metadata-cache request')
+    cache = get_metadata_cache()
+    pruned = cache.prune()
+    return jsonify({'stats': cache.stats(), 'pruned': pruned})
+
+from model_registry import get_registry
+
+@app.route('/api/models', methods=['GET'])
+def list_models():
+    logging.info('Received /api/models request')
+    registry = get_registry()
+    return jsonify({'models': registry.loaded_models(), 'stats': registry.stats()})
+
+@app.route('/api/models/load', methods=['POST'])
+def load_model():
+    logging.info('Received /api/models/load request')
+    data = request.get_json() or {}
+    model_size = data.get('model_size')
+    if not model_size:
+        logging.warning('Missing model_size in request')
+        return jsonify({'error': 'Missing model_size'}), 400
+    try:
+        registry = get_registry()
+        registry.get(model_size, device=data.get('device'), dtype=data.get('dtype', 'float32'),
+                     log=logging.info)
+        logging.info(f'Model {model_size} ready')
+        return jsonify({'models': registry.loaded_models(), 'stats': registry.stats()})
+    except Exception as e:
+        logging.error(f'Error loading model: {e}')
+        return jsonify({'error': str(e)}), 500
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Downloader Benchmarks
+Measures download throughput for fixed fragment concurrency and chunk sizes, and for the
+adaptive tuner, against a local HTTP server with artificial latency and throttling
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmark_subs import environment_info
+from download_tuner import (CHUNK_LEVELS_MB, DEFAULT_LEVELS, FRAGMENT_LEVELS, DownloadTuner, TuningSession,
+                            describe_levels, level_settings)
+from profiling import format_bytes
+from ytdlp_loader import load_yt_dlp
+
+
+BLOCK_SIZE = 64 * 1024
+
+
+class MediaServer(ThreadingHTTPServer):
+    """Serves an HLS playlist of fragments and a single file with range support
+
+    Every request waits ``latency`` seconds before answering, and every connection is
+    capped at ``rate`` bytes per second; responses larger than ``slow_range_bytes`` are
+    sent at a quarter of that, the way CDNs throttle open-ended requests. The single
+    file is zeros, or the contents of ``media_path`` when one is given.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, fragments, fragment_bytes, file_bytes, latency, rate, slow_range_bytes, media_path=None):
+        super().__init__(("127.0.0.1", 0), MediaRequestHandler)
+        self.fragments = fragments
+        self.fragment_bytes = fragment_bytes
+        self.media_path = media_path
+        self.file_bytes = os.path.getsize(media_path) if media_path else file_bytes
+        self.latency = latency
+        self.rate = rate
+        self.slow_range_bytes = slow_range_bytes
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+
+class MediaRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def do_GET(self, head=False):
+        server = self.server
+        server.count_request()
+        time.sleep(server.latency)
+        if self.path == "/media.m3u8":
+            lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-TARGETDURATION:2", "#EXT-X-MEDIA-SEQUENCE:0"]
+            for index in range(server.fragments):
+                lines += ["#EXTINF:2.0,", f"/fragment{index}.ts"]
+            lines.append("#EXT-X-ENDLIST")
+            body = ("\n".join(lines) + "\n").encode()
+            self._send(200, "application/vnd.apple.mpegurl", len(body), head)
+            if not head:
+                self.wfile.write(body)
+            return
+        match = re.fullmatch(r"/fragment(\d+)\.ts", self.path)
+        if match and int(match.group(1)) < server.fragments:
+            self._send(200, "video/mp2t", server.fragment_bytes, head)
+            if not head:
+                self._stream(server.fragment_bytes)
+            return
+        if self.path == "/media.mp4":
+            start, end = 0, server.file_bytes - 1
+            match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+            status = 200
+            if match:
+                status = 206
+                start = int(match.group(1))
+                end = min(int(match.group(2) or end), end)
+            self._send(status, "video/mp4", end - start + 1, head,
+                       {"Content-Range": f"bytes {start}-{end}/{server.file_bytes}"} if match else {})
+            if not head:
+                self._stream(end - start + 1, start)
+            return
+        self._send(404, "text/plain", 0, head)
+
+    def _send(self, status, content_type, length, head, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def _stream(self, length, offset=0):
+        rate = self.server.rate
+        if length > self.server.slow_range_bytes:
+            rate /= 4
+        media = None
+        if self.server.media_path:
+            media = open(self.server.media_path, "rb")
+            media.seek(offset)
+        block = b"\0" * BLOCK_SIZE
+        sent = 0
+        start_time = time.perf_counter()
+        try:
+            while sent < length:
+                size = min(BLOCK_SIZE, length - sent)
+                self.wfile.write(media.read(size) if media else block[:size])
+                sent += size
+                delay = sent / rate - (time.perf_counter() - start_time)
+                if delay > 0:
+                    time.sleep(delay)
+        except (BrokenPipeError, ConnectionResetError):
+            # FFmpeg drops the connection when it seeks to another part of the file
+            pass
+        finally:
+            if media:
+                media.close()
+
+
+def start_server(args):
+    """Start the media server in a background thread"""
+    server = MediaServer(args.fragments, args.fragment_kb * 1024, args.file_mb * 1024 * 1024,
+                         args.latency_ms / 1000, args.rate_mbps * 1024 * 1024, args.slow_range_mb * 1024 * 1024)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def download(url, settings, hooks=(), session=None):
+    """Download a URL once with yt-dlp and the given settings; returns (seconds, bytes)"""
+    output_dir = tempfile.mkdtemp(prefix="ytdl-bench-")
+    options = {
+        'outtmpl': os.path.join(output_dir, 'media.%(ext)s'),
+        'quiet': True,
+        'no_warnings': True,
+        'noprogress': True,
+        'fixup': 'never',
+        'hls_prefer_native': True,
+        'progress_hooks': list(hooks),
+        **settings,
+    }
+    try:
+        start_time = time.perf_counter()
+        with load_yt_dlp().YoutubeDL(options) as ydl:
+            if session is not None:
+                session.attach(ydl.params)
+            ydl.download([url])
+        seconds = time.perf_counter() - start_time
+        num_bytes = sum(os.path.getsize(os.path.join(output_dir, name)) for name in os.listdir(output_dir))
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return seconds, num_bytes
+
+
+def _fixed_settings(benchmark):
+    """Settings swept for a benchmark, with the other setting at its default level"""
+    fragment_level, chunk_level = DEFAULT_LEVELS
+    if benchmark == "fragments":
+        return [(level, chunk_level) for level in range(len(FRAGMENT_LEVELS))]
+    return [(fragment_level, level) for level in range(len(CHUNK_LEVELS_MB))]
+
+
+def bench_downloads(args):
+    """Sweep fixed settings, then let the tuner learn over repeated downloads"""
+    server = start_server(args)
+    url = server.base_url + ("/media.m3u8" if args.benchmark == "fragments" else "/media.mp4")
+    rows = []
+    try:
+        for levels in _fixed_settings(args.benchmark):
+            before = server.requests
+            seconds, num_bytes = download(url, level_settings(levels))
+            rows.append({'mode': "fixed", 'settings': describe_levels(levels), **level_settings(levels),
+                         'seconds': seconds, 'bytes': num_bytes, 'requests': server.requests - before})
+
+        tuner = DownloadTuner(path=os.path.join(tempfile.mkdtemp(prefix="ytdl-tuner-"), "tuning.json"),
+                              adaptive=True)
+        for round_number in range(1, args.rounds + 1):
+            session = TuningSession(tuner, url)
+            levels = session.levels
+            before = server.requests
+            seconds, num_bytes = download(url, session.options(), [session.progress_hook], session)
+            rows.append({'mode': f"tuned #{round_number}", 'settings': describe_levels(levels),
+                         **level_settings(levels), 'seconds': seconds, 'bytes': num_bytes,
+                         'requests': server.requests - before})
+    finally:
+        server.shutdown()
+
+    print(f"{'Mode':<10} {'Settings':<28} {'Time':>8} {'Requests':>9} {'Throughput':>12}")
+    for row in rows:
+        row['bytes_per_second'] = row['bytes'] / row['seconds'] if row['seconds'] else 0.0
+        print(f"{row['mode']:<10} {row['settings']:<28} {row['seconds']:>7.2f}s {row['requests']:>9} "
+              f"{format_bytes(row['bytes_per_second']):>10}/s")
+    best = max((row for row in rows if row['mode'] == "fixed"), key=lambda row: row['bytes_per_second'])
+    learned = tuner.stats().get(session.host, {})
+    print(f"Best fixed: {best['settings']}; tuner settled on "
+          f"{learned.get('concurrent_fragment_downloads')} fragment(s), "
+          f"{(learned.get('http_chunk_size') or 0) // (1024 * 1024)} MB chunks")
+    return {'benchmark': args.benchmark, 'environment': environment_info(),
+            'server': {'latency_ms': args.latency_ms, 'rate_mbps': args.rate_mbps,
+                       'slow_range_mb': args.slow_range_mb, 'fragments': args.fragments,
+                       'fragment_kb': args.fragment_kb, 'file_mb': args.file_mb},
+            'results': rows, 'learned': learned}
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="YouTube downloader benchmarks")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON to PATH")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    server = argparse.ArgumentParser(add_help=False)
+    server.add_argument("--latency-ms", type=float, default=50, help="Delay before every response (default: 50)")
+    server.add_argument("--rate-mbps", type=float, default=4,
+                        help="Per-connection rate cap in MB/s (default: 4)")
+    server.add_argument("--slow-range-mb", type=float, default=10,
+                        help="Responses larger than this are sent at a quarter of the rate (default: 10)")
+    server.add_argument("--fragments", type=int, default=120, help="Fragments in the HLS playlist (default: 120)")
+    server.add_argument("--fragment-kb", type=int, default=256, help="Size of each fragment (default: 256)")
+    server.add_argument("--file-mb", type=int, default=64, help="Size of the single-file media (default: 64)")
+    server.add_argument("--rounds", type=int, default=12, help="Downloads with the adaptive tuner (default: 12)")
+
+    fragments = subparsers.add_parser("fragments", parents=[server],
+                                      help="Fragment concurrency on an HLS stream")
+    fragments.set_defaults(run=bench_downloads)
+
+    chunks = subparsers.add_parser("chunks", parents=[server], help="HTTP chunk size on a single file")
+    chunks.set_defaults(run=bench_downloads)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Main function"""
+    args = parse_args(argv)
+    report = args.run(args)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Results written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+"""
+Subtitle Generator Benchmarks
+Measures real-time factor, memory use and transcript accuracy of the transcription
+settings on a fixed local sample, and the cost of each pipeline stage on synthetic media
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from profiling import format_bytes, peak_rss_bytes
+
+
+def normalize_words(text):
+    """Lower-cased words without surrounding punctuation"""
+    words = []
+    for word in text.lower().split():
+        word = word.strip(".,!?;:\"'()[]")
+        if word:
+            words.append(word)
+    return words
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance between two transcripts divided by the reference length"""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1] / len(ref)
+
+
+def _run_model(sample_path, model_size, dtype, language, runs, engine="whisper"):
+    """Load a model with one engine and precision and time it on the sample (runs in a fresh process)"""
+    import whisper
+
+    from engines import get_engine
+    from model_registry import model_memory_bytes
+
+    audio = whisper.load_audio(sample_path)
+    audio_seconds = len(audio) / whisper.audio.SAMPLE_RATE
+
+    start_time = time.perf_counter()
+    model = get_engine(engine, model_size, device="cpu", dtype=dtype)
+    load_seconds = time.perf_counter() - start_time
+
+    timings = []
+    text = ""
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        result = model.transcribe(audio, language=language, verbose=None, fp16=False)
+        timings.append(time.perf_counter() - start_time)
+        text = result['text']
+
+    transcribe_seconds = min(timings)
+    return {
+        'engine': engine,
+        'dtype': dtype,
+        'audio_seconds': audio_seconds,
+        'load_seconds': load_seconds,
+        'transcribe_seconds': transcribe_seconds,
+        'rtf': transcribe_seconds / audio_seconds if audio_seconds else 0.0,
+        'model_bytes': model_memory_bytes(model),
+        'peak_rss': peak_rss_bytes(),
+        'text': text.strip(),
+    }
+
+
+def run_in_subprocess(function, *args):
+    """Run a benchmark step in a fresh process so its memory figures are not shared"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(function, *args).result()
+
+
+def bench_quantization(args):
+    """Compare float32 and int8-quantized CPU inference on one sample"""
+    reference = None
+    if args.reference:
+        with open(args.reference, 'r', encoding='utf-8') as f:
+            reference = f.read()
+
+    rows = []
+    for dtype in ("float32", "int8"):
+        print(f"⏱️ {args.model} ({dtype}) on {os.path.basename(args.sample)}...")
+        rows.append(run_in_subprocess(_run_model, args.sample, args.model, dtype, args.language, args.runs))
+
+    baseline = rows[0]
+    for row in rows:
+        row['wer_vs_float32'] = word_error_rate(baseline['text'], row['text'])
+        if reference is not None:
+            row['wer_vs_reference'] = word_error_rate(reference, row['text'])
+        row['speedup'] = (baseline['transcribe_seconds'] / row['transcribe_seconds']
+                          if row['transcribe_seconds'] else 0.0)
+
+    print("")
+    print(f"{'Precision':<10} {'Load':>7} {'Infer':>8} {'RTF':>6} {'Speedup':>8} {'Weights':>10} "
+          f"{'Peak RSS':>10} {'WER':>6}")
+    for row in rows:
+        wer = row.get('wer_vs_reference', row['wer_vs_float32'])
+        print(f"{row['dtype']:<10} {row['load_seconds']:>6.1f}s {row['transcribe_seconds']:>7.1f}s "
+              f"{row['rtf']:>6.2f} {row['speedup']:>7.2f}x {format_bytes(row['model_bytes']):>10} "
+              f"{format_bytes(row['peak_rss']):>10} {wer:>6.1%}")
+    print("WER is measured against " + ("the reference transcript" if reference is not None
+                                         else "the float32 transcript"))
+    return {'benchmark': "quantization", 'model': args.model, 'sample': args.sample, 'results': rows}
+
+
+def bench_engines(args):
+    """Compare the sequential openai-whisper engine with the batched transformers engine"""
+    from engines import ENGINES
+
+    reference = None
+    if args.reference:
+        with open(args.reference, 'r', encoding='utf-8') as f:
+            reference = f.read()
+
+    rows = []
+    for engine in ENGINES:
+        print(f"⏱️ {args.model} ({args.dtype}) with the {engine} engine on {os.path.basename(args.sample)}...")
+        os.environ["SUBS_ASR_BATCH_SIZE"] = str(args.batch_size)
+        rows.append(run_in_subprocess(_run_model, args.sample, args.model, args.dtype, args.language,
+                                      args.runs, engine))
+
+    baseline = rows[0]
+    for row in rows:
+        row['wer_vs_whisper'] = word_error_rate(baseline['text'], row['text'])
+        if reference is not None:
+            row['wer_vs_reference'] = word_error_rate(reference, row['text'])
+        row['speedup'] = (baseline['transcribe_seconds'] / row['transcribe_seconds']
+                          if row['transcribe_seconds'] else 0.0)
+
+    print("")
+    print(f"{'Engine':<14} {'Load':>7} {'Infer':>8} {'RTF':>6} {'Speedup':>8} {'Peak RSS':>10} {'WER':>6}")
+    for row in rows:
+        wer = row.get('wer_vs_reference', row['wer_vs_whisper'])
+        print(f"{row['engine']:<14} {row['load_seconds']:>6.1f}s {row['transcribe_seconds']:>7.1f}s "
+              f"{row['rtf']:>6.2f} {row['speedup']:>7.2f}x {format_bytes(row['peak_rss']):>10} {wer:>6.1%}")
+    print("WER is measured against " + ("the reference transcript" if reference is not None
+                                         else "the openai-whisper transcript"))
+    return {'benchmark': "engines", 'model': args.model, 'sample': args.sample,
+            'batch_size': args.batch_size, 'results': rows}
+
+
+def _transcribe_sample(sample_path, model_size, dtype, language):
+    """Job: transcribe the sample once with this process's model; returns wall-clock timings"""
+    import whisper
+
+    from model_registry import get_registry
+
+    audio = whisper.load_audio(sample_path)
+    model = get_registry().get(model_size, device="cpu", dtype=dtype)
+    start = time.time()
+    model.transcribe(audio, language=language, verbose=None, fp16=False)
+    return {'audio_seconds': len(audio) / whisper.audio.SAMPLE_RATE, 'start': start, 'end': time.time()}
+
+
+def _preload(model_size, dtype):
+    """Load a model into the registry of the current process"""
+    from model_registry import get_registry
+    get_registry().get(model_size, device="cpu", dtype=dtype)
+
+
+def _summarize_jobs(mode, jobs):
+    """Throughput of a set of concurrent jobs from their transcription start/end times"""
+    wall_seconds = max(job['end'] for job in jobs) - min(job['start'] for job in jobs)
+    audio_seconds = sum(job['audio_seconds'] for job in jobs)
+    return {
+        'mode': mode,
+        'jobs': len(jobs),
+        'wall_seconds': wall_seconds,
+        'mean_job_seconds': sum(job['end'] - job['start'] for job in jobs) / len(jobs),
+        'throughput': audio_seconds / wall_seconds if wall_seconds else 0.0,
+    }
+
+
+def bench_scheduler(args):
+    """Compare N concurrent jobs with default torch threads against the core-budget scheduler"""
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    from job_scheduler import JobScheduler
+    from model_registry import estimate_model_bytes
+
+    job_args = (args.sample, args.model, args.dtype, args.language)
+    rows = []
+
+    # Free-for-all: every job uses torch's default thread count (all cores)
+    print(f"⏱️ {args.jobs} jobs, each with default torch threads...")
+    with ProcessPoolExecutor(max_workers=args.jobs, mp_context=multiprocessing.get_context("spawn")) as pool:
+        jobs = [future.result() for future in [pool.submit(_transcribe_sample, *job_args)
+                                               for _ in range(args.jobs)]]
+    rows.append(_summarize_jobs("free-for-all", jobs))
+
+    # Scheduled: the core budget is split between slots and extra jobs queue
+    with JobScheduler(core_budget=args.cores, max_jobs=args.slots, pin_affinity=args.pin_cpus,
+                      model_bytes=estimate_model_bytes(args.model, args.dtype)) as scheduler:
+        print(f"⏱️ {args.jobs} jobs on {scheduler.describe()}...")
+        for future in scheduler.broadcast(_preload, args.model, args.dtype):
+            future.result()
+        jobs = [future.result() for future in [scheduler.submit(_transcribe_sample, *job_args)
+                                               for _ in range(args.jobs)]]
+        rows.append(_summarize_jobs(f"scheduled ({scheduler.describe()})", jobs))
+
+    print("")
+    print(f"{'Mode':<40} {'Wall':>8} {'Per job':>8} {'Throughput':>11}")
+    for row in rows:
+        print(f"{row['mode']:<40} {row['wall_seconds']:>7.1f}s {row['mean_job_seconds']:>7.1f}s "
+              f"{row['throughput']:>9.2f}x")
+    print("Throughput is seconds of audio transcribed per wall-clock second across all jobs")
+    return {'benchmark': "scheduler", 'model': args.model, 'sample': args.sample, 'results': rows}
+
+
+def environment_info():
+    """Machine and code version the results were measured on"""
+    import platform
+    import subprocess
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=here,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def make_synthetic_media(output_path, seconds, source=None):
+    """Build a small test video of ``seconds`` with FFmpeg
+
+    With a ``source`` recording its audio is looped to the requested length, so the
+    model has real speech to decode; otherwise the audio is a tone over pink noise.
+    """
+    import subprocess
+
+    cmd = ["ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+           "-f", "lavfi", "-i", f"testsrc=size=320x240:rate=10:duration={seconds}"]
+    if source:
+        cmd += ["-stream_loop", "-1", "-i", source]
+    else:
+        cmd += ["-f", "lavfi", "-i",
+                f"sine=frequency=440:duration={seconds}[tone];"
+                f"anoisesrc=color=pink:amplitude=0.05:duration={seconds}[noise];"
+                f"[tone][noise]amix=inputs=2[out0]"]
+    cmd += ["-map", "0:v:0", "-map", "1:a:0", "-t", str(seconds),
+            "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", "-ar", "44100", output_path]
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+    except FileNotFoundError:
+        raise RuntimeError("FFmpeg not found - run check_ffmpeg.py for installation help")
+    return output_path
+
+
+def _run_pipeline(media_path, model_size, dtype, language, subtitle_formats, output_dir, engine="whisper"):
+    """Time each subtitle generator stage on one file (runs in a fresh process)"""
+    import subs
+    from engines import get_engine
+
+    stages = {}
+
+    start_time = time.perf_counter()
+    audio, stats = subs.decode_audio_stream(media_path)
+    stages['extract_audio'] = {'seconds': time.perf_counter() - start_time, 'bytes': stats['bytes'],
+                               'peak_rss': peak_rss_bytes()}
+    audio_seconds = stats['audio_seconds']
+
+    start_time = time.perf_counter()
+    model = get_engine(engine, model_size, device="cpu", dtype=dtype)
+    stages['load_model'] = {'seconds': time.perf_counter() - start_time, 'peak_rss': peak_rss_bytes()}
+
+    start_time = time.perf_counter()
+    result = model.transcribe(audio, language=language, verbose=None, fp16=False)
+    transcribe_seconds = time.perf_counter() - start_time
+    stages['transcribe'] = {'seconds': transcribe_seconds, 'segments': len(result['segments']),
+                            'peak_rss': peak_rss_bytes()}
+
+    output_paths = subs.subtitle_output_paths(media_path, output_dir, subtitle_formats)
+    start_time = time.perf_counter()
+    subs.save_subtitle_formats(result, output_paths)
+    save_seconds = time.perf_counter() - start_time
+    written = sum(os.path.getsize(path) for path in output_paths.values())
+    stages['save_subtitles'] = {'seconds': save_seconds, 'bytes': written,
+                                'bytes_per_second': written / save_seconds if save_seconds else 0.0,
+                                'peak_rss': peak_rss_bytes()}
+    for path in output_paths.values():
+        os.remove(path)
+
+    return {
+        'model': model_size,
+        'dtype': dtype,
+        'engine': engine,
+        'audio_seconds': audio_seconds,
+        'rtf': transcribe_seconds / audio_seconds if audio_seconds else 0.0,
+        'total_seconds': sum(stage['seconds'] for stage in stages.values()),
+        'peak_rss': peak_rss_bytes(),
+        'stages': stages,
+    }
+
+
+def bench_pipeline(args):
+    """Time extraction, model loading, transcription and saving on synthetic media of several lengths"""
+    import tempfile
+
+    media_dir = args.media_dir or tempfile.mkdtemp(prefix="subs-bench-")
+    os.makedirs(media_dir, exist_ok=True)
+    output_dir = tempfile.mkdtemp(prefix="subs-bench-out-")
+
+    rows = []
+    for seconds in args.lengths:
+        media_path = os.path.join(media_dir, f"synthetic_{seconds:g}s.mp4")
+        if not os.path.exists(media_path):
+            print(f"🎬 Building {seconds:g}s of synthetic media...")
+            make_synthetic_media(media_path, seconds, args.source)
+        for model_size in args.models:
+            print(f"⏱️ {model_size} ({args.dtype}) on {os.path.basename(media_path)}...")
+            row = run_in_subprocess(_run_pipeline, media_path, model_size, args.dtype, args.language,
+                                    args.formats, output_dir, args.engine)
+            row['media_seconds'] = seconds
+            rows.append(row)
+    os.rmdir(output_dir)
+
+    print("")
+    print(f"{'Length':>7} {'Model':<8} {'Extract':>8} {'Load':>7} {'Transcribe':>11} {'RTF':>6} "
+          f"{'Save':>8} {'Write/s':>11} {'Peak RSS':>10}")
+    for row in rows:
+        stages = row['stages']
+        print(f"{row['media_seconds']:>6g}s {row['model']:<8} {stages['extract_audio']['seconds']:>7.2f}s "
+              f"{stages['load_model']['seconds']:>6.1f}s {stages['transcribe']['seconds']:>10.1f}s "
+              f"{row['rtf']:>6.2f} {stages['save_subtitles']['seconds'] * 1000:>6.1f}ms "
+              f"{format_bytes(stages['save_subtitles']['bytes_per_second']):>9}/s "
+              f"{format_bytes(row['peak_rss']):>10}")
+    print("Each run uses a fresh process, so model loading is cold and peak RSS is per run")
+    return {'benchmark': "pipeline", 'environment': environment_info(), 'engine': args.engine,
+            'dtype': args.dtype, 'formats': args.formats, 'source': args.source, 'results': rows}
+
+
+def bench_url(args):
+    """Decode synthetic media from a local HTTP server the way ``subs.py --url`` does, and from disk"""
+    import shutil
+    import tempfile
+    import threading
+
+    import numpy as np
+
+    import subs
+    from audio_source import resolve_audio_source
+    from benchmark_downloader import MediaServer
+
+    media_dir = tempfile.mkdtemp(prefix="subs-bench-url-")
+    media_path = os.path.join(media_dir, f"synthetic_{args.seconds:g}s.mp4")
+    print(f"🎬 Building {args.seconds:g}s of synthetic media...")
+    make_synthetic_media(media_path, args.seconds, args.source)
+    server = MediaServer(0, 0, 0, args.latency_ms / 1000, args.rate_mbps * 1024 * 1024, float('inf'), media_path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        source = resolve_audio_source(server.base_url + "/media.mp4")
+        local_audio, local_stats = subs.decode_audio_stream(media_path)
+        remote_audio, remote_stats = subs.decode_audio_stream(source['url'], headers=source['headers'])
+    finally:
+        server.shutdown()
+        shutil.rmtree(media_dir, ignore_errors=True)
+
+    ok = len(local_audio) == len(remote_audio) and np.array_equal(local_audio, remote_audio)
+    rows = [{'name': "local file", 'seconds': local_stats['seconds'], 'samples': len(local_audio),
+             'requests': 0},
+            {'name': "local HTTP server", 'seconds': remote_stats['seconds'], 'samples': len(remote_audio),
+             'requests': server.requests}]
+    print(f"{'Source':<20} {'Time':>8} {'Samples':>10} {'Requests':>9}")
+    for row in rows:
+        print(f"{row['name']:<20} {row['seconds']:>7.2f}s {row['samples']:>10} {row['requests']:>9}")
+    print("✅ Same audio from the URL as from the file" if ok else "❌ The URL decoded to different audio")
+    return {'benchmark': "url", 'environment': environment_info(), 'ok': ok, 'source': source,
+            'server': {'latency_ms': args.latency_ms, 'rate_mbps': args.rate_mbps},
+            'media_seconds': args.seconds, 'results': rows}
+
+
+# Modules that must not be imported just to open the apps or parse the command line
+HEAVY_MODULES = ["torch", "whisper", "transformers", "moviepy", "numpy", "yt_dlp"]
+
+STARTUP_MODULES = ["subs", "youtube_downloader"]
+
+_IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'heavy': [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+def measure_import(module, runs=5):
+    """Best-of-``runs`` import time of a module in a fresh interpreter, plus any heavy modules it pulled in"""
+    import subprocess
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    best = None
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                                cwd=here, capture_output=True, text=True, check=True).stdout
+        sample = json.loads(output.strip().splitlines()[-1])
+        if best is None or sample['seconds'] < best['seconds']:
+            best = sample
+    return best
+
+
+def measure_command(command, runs=5):
+    """Best-of-``runs`` wall time of a command, including interpreter start-up"""
+    import subprocess
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        subprocess.run(command, cwd=here, capture_output=True, check=True)
+        timings.append(time.perf_counter() - start_time)
+    return min(timings)
+
+
+def bench_startup(args):
+    """Time how long the apps take to import and the CLI to answer, against a budget"""
+    rows = []
+    for module in STARTUP_MODULES:
+        sample = measure_import(module, args.runs)
+        rows.append({'name': f"import {module}", 'seconds': sample['seconds'], 'heavy': sample['heavy']})
+    rows.append({'name': "subs.py --help",
+                 'seconds': measure_command([sys.executable, "subs.py", "--help"], args.runs), 'heavy': []})
+
+    ok = True
+    print(f"{'Step':<28} {'Time':>8}  Heavy modules")
+    for row in rows:
+        row['ok'] = row['seconds'] <= args.budget and not row['heavy']
+        ok = ok and row['ok']
+        status = "" if row['ok'] else "  ❌"
+        print(f"{row['name']:<28} {row['seconds'] * 1000:>6.0f}ms  {', '.join(row['heavy']) or '-'}{status}")
+    print(f"Budget: {args.budget * 1000:.0f}ms per step, no heavy modules at startup")
+    return {'benchmark': "startup", 'budget_seconds': args.budget, 'ok': ok, 'results': rows}
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="AI Subtitle Generator benchmarks")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON to PATH")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    quantization = subparsers.add_parser("quantization", help="float32 vs int8 CPU inference")
+    quantization.add_argument("--sample", required=True, help="Audio or video file to transcribe")
+    quantization.add_argument("--reference", help="Text file with the correct transcript of the sample")
+    quantization.add_argument("--model", default="small", help="Whisper model size (default: small)")
+    quantization.add_argument("--language", default=None, help="Language code (default: detect)")
+    quantization.add_argument("--runs", type=int, default=1, help="Timed runs per precision; best is kept")
+    quantization.set_defaults(run=bench_quantization)
+
+    engines = subparsers.add_parser("engines", help="openai-whisper vs batched transformers pipeline")
+    engines.add_argument("--sample", required=True, help="Audio or video file to transcribe")
+    engines.add_argument("--reference", help="Text file with the correct transcript of the sample")
+    engines.add_argument("--model", default="small", help="Whisper model size (default: small)")
+    engines.add_argument("--dtype", default="float32", help="Model precision (default: float32)")
+    engines.add_argument("--language", default=None, help="Language code (default: detect)")
+    engines.add_argument("--batch-size", type=int, default=8,
+                         help="30-second windows per transformers batch (default: 8)")
+    engines.add_argument("--runs", type=int, default=1, help="Timed runs per engine; best is kept")
+    engines.set_defaults(run=bench_engines)
+
+    startup = subparsers.add_parser("startup", help="Import and CLI start-up time regression check")
+    startup.add_argument("--budget", type=float, default=0.5,
+                         help="Maximum seconds per step before the check fails (default: 0.5)")
+    startup.add_argument("--runs", type=int, default=5, help="Runs per step; best is kept (default: 5)")
+    startup.set_defaults(run=bench_startup)
+
+    scheduler = subparsers.add_parser("scheduler", help="Concurrent jobs with and without a core budget")
+    scheduler.add_argument("--sample", required=True, help="Audio or video file each job transcribes")
+    scheduler.add_argument("--model", default="base", help="Whisper model size (default: base)")
+    scheduler.add_argument("--dtype", default="float32", help="Model precision (default: float32)")
+    scheduler.add_argument("--language", default=None, help="Language code (default: detect)")
+    scheduler.add_argument("--jobs", type=int, default=4, help="Number of concurrent jobs (default: 4)")
+    scheduler.add_argument("--slots", type=int, default=2, help="Scheduler job slots (default: 2)")
+    scheduler.add_argument("--cores", type=int, default=None, help="Core budget (default: all cores)")
+    scheduler.add_argument("--pin-cpus", action="store_true", help="Pin each slot to its own CPUs")
+    scheduler.set_defaults(run=bench_scheduler)
+
+    pipeline = subparsers.add_parser("pipeline", help="Per-stage timings on synthetic media of several lengths")
+    pipeline.add_argument("--lengths", type=float, nargs="+", default=[30, 120, 600],
+                          help="Media lengths in seconds (default: 30 120 600)")
+    pipeline.add_argument("--models", nargs="+", default=["tiny", "base", "small"],
+                          help="Whisper model sizes (default: tiny base small)")
+    pipeline.add_argument("--engine", default="whisper", help="Speech recognition engine (default: whisper)")
+    pipeline.add_argument("--dtype", default="float32", help="Model precision (default: float32)")
+    pipeline.add_argument("--language", default="en", help="Language code (default: en)")
+    pipeline.add_argument("--formats", nargs="+", default=["srt", "vtt", "txt", "json"],
+                          help="Subtitle formats written in the save stage (default: srt vtt txt json)")
+    pipeline.add_argument("--source", help="Recording whose audio is looped into the synthetic media "
+                                           "(default: tone and noise)")
+    pipeline.add_argument("--media-dir", help="Keep and reuse the generated media in this directory")
+    pipeline.set_defaults(run=bench_pipeline)
+
+    url = subparsers.add_parser("url", help="Decode audio from a URL served locally, against the same file on disk")
+    url.add_argument("--seconds", type=float, default=60, help="Length of the synthetic media (default: 60)")
+    url.add_argument("--source", help="Recording whose audio is looped into the synthetic media "
+                                      "(default: tone and noise)")
+    url.add_argument("--latency-ms", type=float, default=50, help="Delay before every response (default: 50)")
+    url.add_argument("--rate-mbps", type=float, default=4, help="Per-connection rate cap in MB/s (default: 4)")
+    url.set_defaults(run=bench_url)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Main function"""
+    args = parse_args(argv)
+    report = args.run(args)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"💾 Results written to {args.json}")
+    return 0 if report.get('ok', True) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
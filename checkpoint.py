@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Transcription Checkpoints
+Sidecar files that record finished segments and the audio position of a long
+transcription so a restarted job resumes where the previous one stopped
+"""
+
+import json
+import os
+import time
+
+from subtitle_cache import write_json_atomic
+
+
+# Minimum time between checkpoint writes, overridable with SUBS_CHECKPOINT_INTERVAL
+DEFAULT_CHECKPOINT_INTERVAL = float(os.environ.get("SUBS_CHECKPOINT_INTERVAL", "30"))
+
+CHECKPOINT_VERSION = 1
+
+
+def checkpoint_path(video_path, output_dir):
+    """Sidecar path used for a video's checkpoint"""
+    video_name = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(output_dir, f"{video_name}_subtitles.checkpoint.json")
+
+
+class TranscriptionCheckpoint:
+    """Periodically saved progress of one transcription job
+
+    A checkpoint only applies to the job it was written for: the media file's size and
+    modification time and the transcription ``settings`` (model, language, tasks, ...)
+    must match, otherwise it is ignored and overwritten. The saved ``state`` is owned by
+    the transcription loop that writes it.
+    """
+
+    def __init__(self, path, media_path, interval_seconds=None, **settings):
+        stat = os.stat(media_path)
+        self.path = path
+        self.interval_seconds = DEFAULT_CHECKPOINT_INTERVAL if interval_seconds is None else interval_seconds
+        # Round-tripped through JSON so it compares equal to the copy read back from disk
+        self.identity = json.loads(json.dumps({
+            'version': CHECKPOINT_VERSION,
+            'media_size': stat.st_size,
+            'media_mtime_ns': stat.st_mtime_ns,
+            'settings': settings,
+        }))
+        self.saves = 0
+        self._last_save = time.monotonic()
+
+    def load(self):
+        """Return the saved state for this job, or None if there is nothing to resume"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get('identity') != self.identity:
+            return None
+        return data.get('state')
+
+    def save(self, state, force=False):
+        """Write the state if the checkpoint interval has passed (or ``force``); returns True if written"""
+        now = time.monotonic()
+        if not force and now - self._last_save < self.interval_seconds:
+            return False
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        write_json_atomic(self.path, {'identity': self.identity, 'state': state, 'saved_at': time.time()})
+        self._last_save = now
+        self.saves += 1
+        return True
+
+    def remove(self):
+        """Delete the sidecar once the job has finished"""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Download Archive
+Persistent record of completed downloads in yt-dlp's archive format, so videos that are
+already on disk are skipped before any network request
+"""
+
+import glob
+import os
+import threading
+
+from metadata_cache import video_key
+from subtitle_cache import default_cache_dir
+
+
+def default_archive_path():
+    """Archive file shared by every download, overridable with YTDL_ARCHIVE"""
+    return os.environ.get("YTDL_ARCHIVE") or os.path.join(default_cache_dir(), "download_archive.txt")
+
+
+def archive_id(info):
+    """yt-dlp's archive entry for an info dict (``<extractor> <id>``); None for playlists"""
+    if info.get('_type', 'video') != 'video':
+        return None
+    extractor = info.get('extractor_key') or info.get('ie_key')
+    if not extractor or not info.get('id'):
+        return None
+    return f"{extractor.lower()} {info['id']}"
+
+
+def url_archive_id(url):
+    """Archive entry for a URL whose video ID is known without extraction (None otherwise)"""
+    key = video_key(url)
+    if key.startswith("url:"):
+        return None
+    return key.replace(":", " ", 1)
+
+
+def partial_downloads(path_prefix):
+    """Bytes already on disk per output file, from the ``.part`` files starting with ``path_prefix``"""
+    sizes = {}
+    for path in glob.glob(glob.escape(path_prefix) + "*.part"):
+        try:
+            sizes[path[:-len(".part")]] = os.path.getsize(path)
+        except OSError:
+            pass
+    return sizes
+
+
+class DownloadArchive:
+    """Set of archive entries backed by a file in yt-dlp's ``download_archive`` format
+
+    The file can be shared with ``yt-dlp --download-archive``: the set is reloaded
+    whenever the file changes, so entries appended by other processes are seen too.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_archive_path()
+        self._ids = set()
+        self._mtime = None
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+    def _reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            self._ids, self._mtime = set(), None
+            return
+        if mtime != self._mtime:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._ids = {line.strip() for line in f if line.strip()}
+            self._mtime = mtime
+
+    def __contains__(self, entry):
+        with self._lock:
+            self._reload()
+            return entry in self._ids
+
+    def has_url(self, url):
+        """Whether the video at a URL is already archived, judged from the URL alone"""
+        entry = url_archive_id(url)
+        return entry is not None and entry in self
+
+    def has_info(self, info):
+        """Whether the video of an info dict is already archived"""
+        entry = archive_id(info)
+        return entry is not None and entry in self
+
+    def add(self, info):
+        """Record the video of an info dict as downloaded"""
+        entry = archive_id(info)
+        if entry is None:
+            return
+        with self._lock:
+            self._reload()
+            if entry not in self._ids:
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(entry + "\n")
+                self._ids.add(entry)
+
+    def __len__(self):
+        with self._lock:
+            self._reload()
+            return len(self._ids)
+
+
+_download_archive = None
+_download_archive_lock = threading.Lock()
+
+
+def get_download_archive():
+    """Return the process-wide download archive"""
+    global _download_archive
+    with _download_archive_lock:
+        if _download_archive is None:
+            _download_archive = DownloadArchive()
+        return _download_archive
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Download Queue
+Runs many downloads on a bounded pool of worker threads with per-job progress,
+retries, duplicate detection and a combined throughput readout
+"""
+
+import itertools
+import os
+import queue
+import threading
+import time
+
+
+# Downloads running at once, overridable with YTDL_DOWNLOAD_WORKERS
+DEFAULT_DOWNLOAD_WORKERS = int(os.environ.get("YTDL_DOWNLOAD_WORKERS", "3"))
+
+# Extra attempts after a failed download, overridable with YTDL_DOWNLOAD_RETRIES
+DEFAULT_DOWNLOAD_RETRIES = int(os.environ.get("YTDL_DOWNLOAD_RETRIES", "2"))
+
+# Seconds before the first retry; doubled for every further attempt
+RETRY_BACKOFF_SECONDS = 2.0
+
+JOB_STATES = ["queued", "running", "retrying", "done", "skipped", "failed", "cancelled"]
+
+ACTIVE_STATES = ("queued", "running", "retrying")
+
+
+class JobSkipped(Exception):
+    """Raised by ``run_job`` when there is nothing to download; the job ends as skipped"""
+
+
+class DownloadJob:
+    """One URL in the queue, with the progress reported by its worker"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, url, options=None, key=None):
+        self.id = next(self._ids)
+        self.url = url
+        self.key = key or url
+        self.options = options or {}
+        self.state = "queued"
+        self.title = None
+        self.filename = None
+        self.downloaded_bytes = 0
+        self.total_bytes = None
+        self.speed = None
+        self.attempts = 0
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        # Bytes each output file already had on disk when the current attempt started
+        self.resumed_bytes = {}
+        # Bytes of files already finished by this job (e.g. the video before the audio)
+        self._earlier_bytes = 0
+
+    @property
+    def percent(self):
+        if self.state == "done":
+            return 100.0
+        if not self.total_bytes:
+            return 0.0
+        return min(100.0, self.downloaded_bytes / self.total_bytes * 100)
+
+    @property
+    def transferred_bytes(self):
+        return self._earlier_bytes + self._file_transferred()
+
+    def _file_transferred(self):
+        """Bytes of the current file fetched by this job, without what was resumed from disk"""
+        return max(0, self.downloaded_bytes - self.resumed_bytes.get(self.filename, 0))
+
+    @property
+    def retries(self):
+        return max(0, self.attempts - 1)
+
+    def resume_from(self, resumed_bytes):
+        """Start an attempt that continues files with these sizes already on disk"""
+        self._earlier_bytes += self._file_transferred()
+        self.downloaded_bytes = 0
+        self.filename = None
+        self.resumed_bytes = dict(resumed_bytes)
+
+    def update(self, downloaded_bytes=None, total_bytes=None, speed=None, filename=None):
+        """Record a progress tick from the downloader"""
+        if filename is not None and self.filename is not None and filename != self.filename:
+            self._earlier_bytes += self._file_transferred()
+            self.downloaded_bytes = 0
+        if downloaded_bytes is not None:
+            self.downloaded_bytes = downloaded_bytes
+        if total_bytes is not None:
+            self.total_bytes = total_bytes
+        self.speed = speed
+        if filename is not None:
+            self.filename = filename
+
+
+class DownloadQueue:
+    """Bounded worker pool that runs queued download jobs in FIFO order
+
+    ``run_job(job)`` does the actual download in a worker thread, reporting progress
+    with ``job.update`` and calling ``queue.changed(job)`` after each update; it raises
+    to signal failure, or raises ``JobSkipped`` when the download is not needed. Failed
+    jobs are retried up to ``max_retries`` times with exponential backoff; a job waits
+    out its backoff outside the pool, so its worker moves on to the next job. URLs whose
+    ``key(url)`` matches a job that is still queued or running are not queued twice.
+    ``on_change(job)`` is called from worker threads whenever a job changes, so it must
+    not touch Tk directly.
+    """
+
+    def __init__(self, run_job, max_workers=DEFAULT_DOWNLOAD_WORKERS, max_retries=DEFAULT_DOWNLOAD_RETRIES,
+                 on_change=None, key=None):
+        self.run_job = run_job
+        self.key = key or (lambda url: url)
+        self.max_workers = max(1, max_workers)
+        self.max_retries = max_retries
+        self.on_change = on_change
+        self.jobs = []
+        self._pending = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = 0
+        self._dirty = set()
+        self._completed_bytes = 0
+        self._first_start = None
+
+    def add(self, urls, options=None):
+        """Queue one job per URL, skipping duplicates of active jobs; returns the new jobs"""
+        with self._lock:
+            active = {job.key for job in self.jobs if job.state in ACTIVE_STATES}
+            # Throughput is measured per busy period
+            if not active:
+                self._first_start = None
+                self._completed_bytes = 0
+            jobs = []
+            for url in urls:
+                key = self.key(url)
+                if key not in active:
+                    active.add(key)
+                    jobs.append(DownloadJob(url, dict(options or {}), key))
+            self.jobs.extend(jobs)
+        for job in jobs:
+            self._pending.put(job)
+            self.changed(job)
+        self._spawn_workers()
+        return jobs
+
+    def resize(self, max_workers):
+        """Change how many downloads run at once (running jobs are never interrupted)"""
+        with self._lock:
+            self.max_workers = max(1, max_workers)
+        self._spawn_workers()
+
+    def _spawn_workers(self):
+        with self._lock:
+            missing = min(self.max_workers, self._workers + self._pending.qsize()) - self._workers
+            self._workers += max(0, missing)
+        for _ in range(missing):
+            threading.Thread(target=self._work, daemon=True).start()
+
+    def _work(self):
+        """Worker thread: run queued jobs until the queue is empty or the pool shrank"""
+        while True:
+            # Taking a job and retiring happen under the lock, so a job added meanwhile
+            # either reaches this worker or sees it gone and spawns a new one
+            with self._lock:
+                if self._workers > self.max_workers:
+                    self._workers -= 1
+                    return
+                try:
+                    job = self._pending.get_nowait()
+                except queue.Empty:
+                    self._workers -= 1
+                    return
+                # Claimed under the lock, so a job cancelled meanwhile is never started
+                if job.state != "queued":
+                    continue
+                job.state = "running"
+            self._run(job)
+
+    def _run(self, job):
+        """Run one attempt of a claimed job; a failed attempt is queued again after its backoff"""
+        job.attempts += 1
+        job.error = None
+        job.started_at = job.started_at or time.time()
+        with self._lock:
+            self._first_start = self._first_start or job.started_at
+        self.changed(job)
+        try:
+            self.run_job(job)
+        except JobSkipped as e:
+            job.state = "skipped"
+            job.error = str(e)
+        except Exception as e:
+            job.error = str(e)
+            if job.attempts <= self.max_retries:
+                with self._lock:
+                    job.state = "retrying"
+                    job.speed = None
+                self.changed(job)
+                retry = threading.Timer(RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1), self._retry, (job,))
+                retry.daemon = True
+                retry.start()
+                return
+            job.state = "failed"
+        else:
+            job.state = "done"
+        job.speed = None
+        job.finished_at = time.time()
+        with self._lock:
+            self._completed_bytes += job.transferred_bytes
+        self.changed(job)
+
+    def _retry(self, job):
+        """Queue a job again once its backoff is over, unless it was cancelled meanwhile"""
+        with self._lock:
+            if job.state != "retrying":
+                return
+            job.state = "queued"
+        self._pending.put(job)
+        self.changed(job)
+        self._spawn_workers()
+
+    def changed(self, job):
+        """Mark a job as changed and notify ``on_change``"""
+        with self._lock:
+            self._dirty.add(job.id)
+        if self.on_change is not None:
+            self.on_change(job)
+
+    def take_changed(self):
+        """Jobs changed since the last call (for redrawing only what moved)"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            return [job for job in self.jobs if job.id in dirty]
+
+    def cancel_pending(self):
+        """Cancel every job that has not started yet or is waiting to retry; returns how many"""
+        with self._lock:
+            cancelled = [job for job in self.jobs if job.state in ("queued", "retrying")]
+            for job in cancelled:
+                job.state = "cancelled"
+        for job in cancelled:
+            self.changed(job)
+        return len(cancelled)
+
+    def clear_finished(self):
+        """Forget finished, skipped, failed and cancelled jobs; returns them"""
+        with self._lock:
+            finished = [job for job in self.jobs if job.state not in ACTIVE_STATES]
+            self.jobs = [job for job in self.jobs if job not in finished]
+            return finished
+
+    def stats(self):
+        """Job counts per state plus the combined throughput"""
+        with self._lock:
+            jobs = list(self.jobs)
+            completed_bytes = self._completed_bytes
+            first_start = self._first_start
+        counts = {state: 0 for state in JOB_STATES}
+        for job in jobs:
+            counts[job.state] += 1
+        active = [job for job in jobs if job.state == "running"]
+        transferred = completed_bytes + sum(job.transferred_bytes for job in active)
+        elapsed = time.time() - first_start if first_start else 0.0
+        return {
+            **counts,
+            'total': len(jobs),
+            'workers': self.max_workers,
+            'current_speed': sum(job.speed or 0 for job in active),
+            'transferred_bytes': transferred,
+            'average_speed': transferred / elapsed if elapsed > 0 else 0.0,
+            'idle': not any(counts[state] for state in ACTIVE_STATES),
+        }
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Adaptive Download Tuning
+Measures the throughput of each downloaded stream and hill-climbs yt-dlp's fragment
+concurrency and HTTP chunk size, remembering the best settings per host
+"""
+
+import json
+import os
+import threading
+from urllib.parse import urlparse
+
+from subtitle_cache import default_cache_dir, write_json_atomic
+
+
+# Fragments of a DASH/HLS stream downloaded at once, up to YTDL_MAX_FRAGMENTS (at least 1)
+MAX_FRAGMENTS = max(1, int(os.environ.get("YTDL_MAX_FRAGMENTS", "16")))
+FRAGMENT_LEVELS = [n for n in [1, 2, 4, 8, 16, 32] if n <= MAX_FRAGMENTS]
+
+# Size of each HTTP range request for single-file streams
+CHUNK_LEVELS_MB = [1, 2, 5, 10, 20, 50]
+
+# Starting point for a host that has never been measured: 4 fragments, 10 MB chunks
+DEFAULT_LEVELS = (min(2, len(FRAGMENT_LEVELS) - 1), 3)
+
+# Set YTDL_ADAPTIVE_TUNING=0 to always use the starting settings
+ADAPTIVE_TUNING = os.environ.get("YTDL_ADAPTIVE_TUNING", "1") != "0"
+
+# Streams smaller than this finish too fast for a meaningful throughput sample
+MIN_SAMPLE_BYTES = 1024 * 1024
+
+# A trial must beat the best settings by this factor to replace them
+IMPROVEMENT = 1.05
+
+# Once no neighbouring setting is better, one stream in this many tries one of them again
+EXPLORE_EVERY = 4
+
+# One-step changes of (fragment level, chunk level), in the order they are tried
+MOVES = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+
+
+def host_key(url):
+    """Host whose tuning a URL shares: the registered domain, or host and port for local servers"""
+    netloc = urlparse(url).netloc.lower()
+    host = netloc.rsplit("@", 1)[-1].split(":")[0]
+    if host == "localhost" or host.replace(".", "").isdigit():
+        return netloc.rsplit("@", 1)[-1]
+    return ".".join(host.split(".")[-2:])
+
+
+def level_settings(levels):
+    """yt-dlp options for a (fragment level, chunk level) pair"""
+    fragment_level, chunk_level = levels
+    return {
+        'concurrent_fragment_downloads': FRAGMENT_LEVELS[fragment_level],
+        'http_chunk_size': CHUNK_LEVELS_MB[chunk_level] * 1024 * 1024,
+    }
+
+
+def describe_levels(levels):
+    """Short description of a (fragment level, chunk level) pair for the log"""
+    settings = level_settings(levels)
+    return (f"{settings['concurrent_fragment_downloads']} fragment(s), "
+            f"{settings['http_chunk_size'] // (1024 * 1024)} MB chunks")
+
+
+def _neighbours(levels, first_move=None):
+    """Valid one-step changes of ``levels``, continuing in ``first_move``'s direction first"""
+    moves = sorted(MOVES, key=lambda move: move != first_move)
+    result = []
+    for move in moves:
+        candidate = [levels[0] + move[0], levels[1] + move[1]]
+        if 0 <= candidate[0] < len(FRAGMENT_LEVELS) and 0 <= candidate[1] < len(CHUNK_LEVELS_MB):
+            result.append(candidate)
+    return result
+
+
+class DownloadTuner:
+    """Per-host hill climbing over fragment concurrency and chunk size
+
+    Each host keeps its best levels, their throughput (a moving average) and the
+    neighbouring levels still to try. Every stream either re-measures the best levels
+    or tries one neighbour; a neighbour that is clearly faster becomes the new best.
+    The state is saved as JSON, so later sessions start from what was learned.
+    """
+
+    def __init__(self, path=None, adaptive=ADAPTIVE_TUNING):
+        self.path = path or os.path.join(default_cache_dir(), "download_tuning.json")
+        self.adaptive = adaptive
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.hosts = json.load(f)
+        except (OSError, ValueError):
+            self.hosts = {}
+
+    def _state(self, host):
+        state = self.hosts.get(host)
+        if state is None or len(FRAGMENT_LEVELS) <= state['best'][0] or len(CHUNK_LEVELS_MB) <= state['best'][1]:
+            state = {'best': list(DEFAULT_LEVELS), 'speed': 0.0, 'untried': _neighbours(DEFAULT_LEVELS),
+                     'streams': 0}
+            self.hosts[host] = state
+        return state
+
+    def propose(self, host):
+        """Levels to use for the next stream from a host"""
+        if not self.adaptive:
+            return tuple(DEFAULT_LEVELS)
+        with self._lock:
+            state = self._state(host)
+            if not state['speed']:
+                return tuple(state['best'])
+            if state['untried']:
+                return tuple(state['untried'][0])
+            if state['streams'] % EXPLORE_EVERY == EXPLORE_EVERY - 1:
+                # Converged: check one neighbour in turn, in case conditions changed
+                neighbours = _neighbours(state['best'])
+                return tuple(neighbours[state['streams'] // EXPLORE_EVERY % len(neighbours)])
+            return tuple(state['best'])
+
+    def record(self, host, levels, bytes_per_second):
+        """Feed back the throughput a stream reached with ``levels``"""
+        if not self.adaptive:
+            return
+        with self._lock:
+            state = self._state(host)
+            state['streams'] += 1
+            levels = list(levels)
+            if levels == state['best']:
+                state['speed'] = (bytes_per_second if not state['speed']
+                                  else 0.5 * state['speed'] + 0.5 * bytes_per_second)
+            else:
+                if levels in state['untried']:
+                    state['untried'].remove(levels)
+                if bytes_per_second > state['speed'] * IMPROVEMENT:
+                    move = (levels[0] - state['best'][0], levels[1] - state['best'][1])
+                    back = [state['best'][0], state['best'][1]]
+                    state['untried'] = [candidate for candidate in _neighbours(levels, move) if candidate != back]
+                    state['best'] = levels
+                    state['speed'] = bytes_per_second
+            write_json_atomic(self.path, self.hosts)
+
+    def stats(self):
+        """Best settings and throughput learned per host"""
+        with self._lock:
+            return {host: {**level_settings(state['best']), 'bytes_per_second': state['speed'],
+                           'streams': state['streams'], 'converged': not state['untried']}
+                    for host, state in self.hosts.items()}
+
+
+class TuningSession:
+    """Tuned settings for one download job, updated between the streams it downloads
+
+    Add ``options()`` to the yt-dlp options and ``progress_hook`` to its hooks, then
+    ``attach`` the YoutubeDL's params: yt-dlp reads them again for every stream, so
+    the video and audio of one job can already run with different settings.
+    """
+
+    def __init__(self, tuner, url):
+        self.tuner = tuner
+        self.host = host_key(url)
+        self.levels = tuner.propose(self.host)
+        self.params = None
+        self.samples = []
+        # Bytes each output file already had on disk, so resumed streams are not overrated
+        self.resumed_bytes = {}
+
+    def options(self):
+        return level_settings(self.levels)
+
+    def attach(self, params):
+        self.params = params
+
+    def resume_from(self, resumed_bytes):
+        """Sizes of the ``.part`` files per output file, taken before the download starts"""
+        self.resumed_bytes = dict(resumed_bytes)
+
+    def progress_hook(self, d):
+        if d['status'] != 'finished':
+            return
+        num_bytes = d.get('total_bytes') or d.get('downloaded_bytes') or 0
+        num_bytes -= self.resumed_bytes.get(d.get('filename'), 0)
+        seconds = d.get('elapsed')
+        if num_bytes < MIN_SAMPLE_BYTES or not seconds:
+            return
+        self.samples.append({**self.options(), 'bytes': num_bytes, 'seconds': seconds})
+        self.tuner.record(self.host, self.levels, num_bytes / seconds)
+        self.levels = self.tuner.propose(self.host)
+        if self.params is not None:
+            self.params.update(self.options())
+
+
+_download_tuner = None
+_download_tuner_lock = threading.Lock()
+
+
+def get_download_tuner():
+    """Return the process-wide download tuner"""
+    global _download_tuner
+    with _download_tuner_lock:
+        if _download_tuner is None:
+            _download_tuner = DownloadTuner()
+        return _download_tuner
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Speech Recognition Engines
+Interchangeable backends for the subtitle generator: OpenAI Whisper's sequential
+decoder, and the Hugging Face transformers pipeline with batched 30-second chunks
+
+An engine is any object with ``transcribe(audio, language=None, task="transcribe",
+**options)`` that returns a Whisper-style result: ``{'text', 'segments', 'language'}``
+where each segment has ``id``, ``start``, ``end`` and ``text``. Whisper models already
+have that method, so the Whisper engine is the model itself.
+"""
+
+import os
+import threading
+
+from model_registry import ModelRegistry, SUPPORTED_DTYPES, get_registry
+
+
+ENGINES = ["whisper", "transformers"]
+
+# Hugging Face checkpoints matching the openai-whisper model sizes
+TRANSFORMERS_MODEL_IDS = {
+    "tiny": "openai/whisper-tiny",
+    "base": "openai/whisper-base",
+    "small": "openai/whisper-small",
+    "medium": "openai/whisper-medium",
+    "large": "openai/whisper-large-v3",
+}
+
+# 30-second windows decoded together per forward pass, overridable with SUBS_ASR_BATCH_SIZE
+DEFAULT_BATCH_SIZE = int(os.environ.get("SUBS_ASR_BATCH_SIZE", "8"))
+CHUNK_SECONDS = 30
+
+# Whisper models expect 16 kHz mono audio
+SAMPLE_RATE = 16000
+
+
+class TransformersEngine:
+    """Whisper through the transformers speech-recognition pipeline
+
+    Long audio is cut into 30-second chunks with a small stride, and ``batch_size``
+    chunks go through the encoder and decoder together, so on a CPU many windows are
+    decoded in one batched call instead of one after the other. Whisper-only
+    options such as ``initial_prompt`` or ``verbose`` are accepted and ignored.
+    """
+
+    def __init__(self, recognizer, model_size, batch_size=DEFAULT_BATCH_SIZE):
+        self.recognizer = recognizer
+        self.model_size = model_size
+        self.batch_size = batch_size
+
+    @property
+    def is_multilingual(self):
+        return not self.model_size.endswith(".en")
+
+    def transcribe(self, audio, language=None, task="transcribe", **options):
+        """Transcribe 16 kHz mono audio (an array or a media file path)"""
+        if isinstance(audio, str):
+            import whisper
+            audio = whisper.load_audio(audio)
+
+        generate_kwargs = {"task": task}
+        if language:
+            generate_kwargs["language"] = language
+        output = self.recognizer(
+            {"raw": audio, "sampling_rate": SAMPLE_RATE},
+            chunk_length_s=CHUNK_SECONDS,
+            batch_size=self.batch_size,
+            return_timestamps=True,
+            return_language=language is None,
+            generate_kwargs=generate_kwargs,
+        )
+
+        duration = len(audio) / SAMPLE_RATE
+        segments = []
+        detected = []
+        for chunk in output.get("chunks", []):
+            if chunk.get("language"):
+                detected.append(chunk["language"])
+            text = chunk["text"]
+            if not text.strip():
+                continue
+            start, end = chunk["timestamp"]
+            if start is None:
+                start = segments[-1]['end'] if segments else 0.0
+            if end is None:
+                end = duration
+            segments.append({
+                'id': len(segments),
+                'start': float(start),
+                'end': float(max(end, start)),
+                'text': text if text.startswith(" ") else " " + text,
+                'tokens': [],
+            })
+
+        if language is None and detected:
+            language = max(set(detected), key=detected.count)
+        return {
+            'text': "".join(segment['text'] for segment in segments),
+            'segments': segments,
+            'language': language,
+        }
+
+    # The model registry measures memory through these
+    def parameters(self):
+        return self.recognizer.model.parameters()
+
+    def buffers(self):
+        return self.recognizer.model.buffers()
+
+    def modules(self):
+        return self.recognizer.model.modules()
+
+
+def load_transformers_engine(model_size, device, dtype):
+    """Build a batched transformers pipeline engine for a Whisper model size"""
+    import torch
+    from transformers import pipeline
+
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported model dtype: {dtype}")
+    if dtype == "float16" and device == "cpu":
+        raise ValueError("float16 weights require a CUDA device")
+    if dtype == "int8" and device != "cpu":
+        raise ValueError("int8 quantized models run on the CPU only")
+
+    recognizer = pipeline(
+        "automatic-speech-recognition",
+        model=TRANSFORMERS_MODEL_IDS.get(model_size, f"openai/whisper-{model_size}"),
+        torch_dtype=torch.float16 if dtype == "float16" else torch.float32,
+        device=device,
+    )
+    if dtype == "int8":
+        recognizer.model = torch.quantization.quantize_dynamic(recognizer.model, {torch.nn.Linear},
+                                                               dtype=torch.qint8)
+    return TransformersEngine(recognizer, model_size)
+
+
+def supports_shared_encoder(model):
+    """Whether transcribe + translate can share one encoder pass (openai-whisper models)"""
+    return hasattr(model, "embed_audio")
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_engine_registry(engine="whisper"):
+    """Return the process-wide registry of loaded models for an engine"""
+    if engine == "whisper":
+        return get_registry()
+    if engine != "transformers":
+        raise ValueError(f"Unknown engine: {engine}")
+    with _registries_lock:
+        if engine not in _registries:
+            _registries[engine] = ModelRegistry(loader=load_transformers_engine)
+        return _registries[engine]
+
+
+def get_engine(engine, model_size, device=None, dtype="float32", log=None):
+    """Return a loaded engine, reusing warm models from the engine's registry"""
+    return get_engine_registry(engine).get(model_size, device=device, dtype=dtype, log=log)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Format Index
+One-pass index of a video's yt-dlp formats by height, with codec, container and bitrate
+per entry, mapping every quality offered in the downloader to exact format IDs
+"""
+
+from collections import namedtuple
+
+
+BEST_MAXIMUM = "Best Available (Maximum Quality)"
+BEST_HIGH = "Best Available (High Quality)"
+AUDIO_ONLY = "🎵 Audio Only (MP3)"
+
+# Height cap of the "High Quality" option
+HIGH_QUALITY_HEIGHT = 1080
+
+# Audio container that merges cleanly with each video container
+AUDIO_CONTAINER_FOR = {'mp4': 'm4a', 'webm': 'webm'}
+
+FormatEntry = namedtuple("FormatEntry", "format_id height codec ext bitrate size rank")
+
+
+def quality_label(height):
+    """Dropdown label for a video height"""
+    if height >= 1080:
+        return f"🎬 {height}p (Full HD)"
+    elif height >= 720:
+        return f"🎬 {height}p (HD)"
+    elif height >= 480:
+        return f"🎬 {height}p (Standard)"
+    return f"🎬 {height}p"
+
+
+def _codec(codec):
+    """Codec family of a yt-dlp codec string ('avc1.640028' -> 'avc1'), None for no stream"""
+    if not codec or codec == 'none':
+        return None
+    return codec.split('.')[0]
+
+
+class FormatIndex:
+    """Formats of one video grouped for quality selection
+
+    yt-dlp lists formats from worst to best by its own format sorting, so an entry's
+    position in ``info['formats']`` is kept as its ``rank`` and every group is ordered
+    best first by it. ``selectors`` maps each dropdown label to the format string to
+    download.
+    """
+
+    def __init__(self, info, key=None):
+        self.key = key
+        self.video = {}
+        self.muxed = {}
+        self.audio = []
+        for rank, fmt in enumerate(info.get('formats') or []):
+            format_id = fmt.get('format_id')
+            if not format_id:
+                continue
+            vcodec, acodec = _codec(fmt.get('vcodec')), _codec(fmt.get('acodec'))
+            height = fmt.get('height') if vcodec else None
+            entry = FormatEntry(format_id, height, vcodec or acodec, fmt.get('ext'),
+                                fmt.get('tbr') or fmt.get('vbr') or fmt.get('abr'),
+                                fmt.get('filesize') or fmt.get('filesize_approx'), rank)
+            if height and acodec:
+                self.muxed.setdefault(height, []).append(entry)
+            elif height:
+                self.video.setdefault(height, []).append(entry)
+            elif acodec and not vcodec:
+                self.audio.append(entry)
+        for group in [self.audio, *self.video.values(), *self.muxed.values()]:
+            group.sort(key=lambda entry: entry.rank, reverse=True)
+        self.heights = sorted(set(self.video) | set(self.muxed), reverse=True)
+        self.selectors = self._build_selectors()
+
+    @property
+    def video_format_count(self):
+        return sum(len(group) for group in self.video.values()) + sum(len(group) for group in self.muxed.values())
+
+    def _audio_for(self, video):
+        """Best audio-only stream, preferring the container that merges with ``video``"""
+        container = AUDIO_CONTAINER_FOR.get(video.ext)
+        for entry in self.audio:
+            if entry.ext == container:
+                return entry
+        return self.audio[0] if self.audio else None
+
+    def streams_for(self, height):
+        """Entries downloaded for a height: video plus audio, or a single muxed format"""
+        video = self.video.get(height)
+        muxed = self.muxed.get(height)
+        if video:
+            audio = self._audio_for(video[0])
+            if audio is not None:
+                return [video[0], audio]
+        if muxed:
+            return [muxed[0]]
+        return video[:1] if video else []
+
+    def _selector(self, height):
+        streams = self.streams_for(height)
+        exact = "+".join(entry.format_id for entry in streams)
+        # The generic fallback only applies if the exact IDs are no longer offered
+        return f"{exact}/bestvideo[height<={height}]+bestaudio/best[height<={height}]"
+
+    def _build_selectors(self):
+        selectors = {}
+        if self.heights:
+            selectors[BEST_MAXIMUM] = self._selector(self.heights[0])
+            high = [height for height in self.heights if height <= HIGH_QUALITY_HEIGHT] or self.heights[-1:]
+            selectors[BEST_HIGH] = self._selector(high[0])
+        for height in self.heights:
+            selectors[quality_label(height)] = self._selector(height)
+        if self.audio:
+            selectors[AUDIO_ONLY] = f"{self.audio[0].format_id}/bestaudio/best"
+        return selectors
+
+    def quality_options(self):
+        """Dropdown labels, best first"""
+        return [BEST_MAXIMUM, BEST_HIGH] + [quality_label(height) for height in self.heights] + (
+            [AUDIO_ONLY] if self.audio or self.muxed else [])
+
+    def selector(self, quality):
+        """Exact format string for a dropdown label (None if the label is not indexed)"""
+        return self.selectors.get(quality)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Transcription Job Scheduler
+Runs concurrent transcription jobs in worker processes that share a fixed CPU core
+budget and model memory budget, queueing extra jobs instead of oversubscribing the machine
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from model_registry import DEFAULT_MEMORY_BUDGET_MB
+
+
+# Cores shared by all transcription jobs, overridable with SUBS_CORE_BUDGET (0 = all)
+DEFAULT_CORE_BUDGET = int(os.environ.get("SUBS_CORE_BUDGET", "0"))
+
+# Pin each job slot to its own CPUs when SUBS_PIN_CPUS is set
+DEFAULT_PIN_AFFINITY = os.environ.get("SUBS_PIN_CPUS", "") not in ("", "0")
+
+# Thread count given to the current process by init_job_slot
+_slot_threads = None
+
+
+def available_cpus():
+    """CPUs this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_slots(core_budget=None, max_jobs=1, pin_affinity=False):
+    """Split a core budget into job slots
+
+    Returns one dict per slot with its torch thread count and, when pinning, the CPUs
+    it is restricted to. The slots never use more cores than the budget in total.
+    """
+    cpus = available_cpus()
+    core_budget = max(1, min(core_budget or DEFAULT_CORE_BUDGET or len(cpus), len(cpus)))
+    max_jobs = max(1, min(max_jobs, core_budget))
+    base, extra = divmod(core_budget, max_jobs)
+
+    slots = []
+    position = 0
+    for index in range(max_jobs):
+        threads = base + (1 if index < extra else 0)
+        slots.append({
+            'threads': threads,
+            'cpus': cpus[position:position + threads] if pin_affinity else None,
+        })
+        position += threads
+    return slots
+
+
+def init_job_slot(threads, cpus=None, memory_budget_bytes=None):
+    """Process initializer for a job slot: cap torch's thread pools and the slot's model memory
+
+    ``memory_budget_bytes`` is the slot's share of the model memory budget, applied to
+    every engine's model registry in the slot. The CPUs are optionally pinned.
+    """
+    global _slot_threads
+    _slot_threads = threads
+    if memory_budget_bytes is not None:
+        from engines import ENGINES, get_engine_registry
+        for engine in ENGINES:
+            get_engine_registry(engine).set_memory_budget(memory_budget_bytes)
+    # OpenMP/MKL read these when torch is first imported in this process
+    for name in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[name] = str(threads)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Already fixed if torch did parallel work in this process before
+        pass
+
+
+def slot_threads():
+    """Threads available to the current job slot (all cores outside a scheduler)"""
+    return _slot_threads or os.cpu_count() or 1
+
+
+class JobScheduler:
+    """Runs jobs in worker processes that split a fixed CPU core budget
+
+    The budget is divided into ``max_jobs`` slots. Each slot is one worker process
+    whose torch intra-op threads are capped at its share of the cores, optionally
+    pinned to its own CPUs. Jobs are taken from a FIFO queue as slots free up, so
+    submitting more jobs than slots queues them instead of oversubscribing.
+
+    Every slot loads its own copy of a model, so the model memory budget
+    (``memory_budget_bytes``, default ``WHISPER_MODEL_BUDGET_MB``) is split between
+    the slots' registries too, and with ``model_bytes`` there are never more slots
+    than copies of that model fit in it. The slots are spawned rather than forked, so
+    they inherit nothing from a GUI process.
+    """
+
+    def __init__(self, core_budget=None, max_jobs=1, pin_affinity=DEFAULT_PIN_AFFINITY, memory_budget_bytes=None,
+                 model_bytes=None):
+        if memory_budget_bytes is None:
+            memory_budget_bytes = DEFAULT_MEMORY_BUDGET_MB * 1024 * 1024
+        self.requested_jobs = max_jobs
+        if model_bytes:
+            max_jobs = min(max_jobs, max(1, memory_budget_bytes // model_bytes))
+        self.slots = plan_slots(core_budget, max_jobs, pin_affinity)
+        self.core_budget = sum(slot['threads'] for slot in self.slots)
+        self.max_jobs = len(self.slots)
+        self.memory_budget_bytes = memory_budget_bytes
+        self.slot_memory_bytes = memory_budget_bytes // self.max_jobs
+        self.pin_affinity = pin_affinity
+        self.submitted = 0
+        self.completed = 0
+        self.busy_seconds = 0.0
+        self._running = 0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        context = multiprocessing.get_context("spawn")
+        self._pools = [
+            ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=init_job_slot,
+                                initargs=(slot['threads'], slot['cpus'], self.slot_memory_bytes))
+            for slot in self.slots
+        ]
+        self._dispatchers = [
+            threading.Thread(target=self._dispatch, args=(pool,), daemon=True)
+            for pool in self._pools
+        ]
+        for dispatcher in self._dispatchers:
+            dispatcher.start()
+
+    def submit(self, function, *args, **kwargs):
+        """Queue a job; returns a Future resolved with the job's return value"""
+        future = Future()
+        with self._lock:
+            self.submitted += 1
+        self._queue.put((future, function, args, kwargs))
+        return future
+
+    def broadcast(self, function, *args, **kwargs):
+        """Run a function once in every slot (e.g. to preload a model); returns the futures"""
+        return [pool.submit(function, *args, **kwargs) for pool in self._pools]
+
+    def _dispatch(self, pool):
+        """Feed queued jobs to one slot, one at a time"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            future, function, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self._lock:
+                self._running += 1
+            start_time = time.perf_counter()
+            try:
+                future.set_result(pool.submit(function, *args, **kwargs).result())
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self.completed += 1
+                    self.busy_seconds += time.perf_counter() - start_time
+
+    def running(self):
+        """Number of jobs currently running"""
+        with self._lock:
+            return self._running
+
+    def pending(self):
+        """Number of jobs waiting for a free slot"""
+        return self._queue.qsize()
+
+    def free_slots(self):
+        """Number of idle slots"""
+        with self._lock:
+            return max(0, self.max_jobs - self._running - self._queue.qsize())
+
+    def stats(self):
+        """Slot layout and job counters"""
+        with self._lock:
+            return {
+                'core_budget': self.core_budget,
+                'max_jobs': self.max_jobs,
+                'threads_per_job': [slot['threads'] for slot in self.slots],
+                'memory_per_job': self.slot_memory_bytes,
+                'pinned': self.pin_affinity,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'running': self._running,
+                'pending': self._queue.qsize(),
+                'busy_seconds': self.busy_seconds,
+            }
+
+    def describe(self):
+        """Human readable slot layout"""
+        threads = sorted({slot['threads'] for slot in self.slots})
+        per_job = "/".join(str(count) for count in threads)
+        pinned = ", pinned" if self.pin_affinity else ""
+        return (f"{self.max_jobs} job slot{'s' if self.max_jobs > 1 else ''} x {per_job} threads{pinned}, "
+                f"{self.slot_memory_bytes // (1024 * 1024)} MB of models each")
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        """Stop the dispatchers and worker processes"""
+        if cancel_pending:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[0].cancel()
+        for _ in self._dispatchers:
+            self._queue.put(None)
+        if wait:
+            for dispatcher in self._dispatchers:
+                dispatcher.join()
+        for pool in self._pools:
+            pool.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+        return False
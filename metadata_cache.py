@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Video Metadata Cache
+SQLite cache of yt-dlp info dicts keyed by video ID with a TTL, shared by the
+downloader, the subtitle generator and the API so a page is resolved only once
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import parse_qs, urlparse
+
+from subtitle_cache import default_cache_dir
+from ytdlp_loader import load_yt_dlp
+
+
+# Seconds an info dict stays fresh, overridable with YTDL_METADATA_TTL
+DEFAULT_METADATA_TTL = float(os.environ.get("YTDL_METADATA_TTL", "3600"))
+
+# Signed stream URLs are dropped this many seconds before they expire
+EXPIRY_MARGIN_SECONDS = 300
+
+_YOUTUBE_ID_PATTERNS = [
+    r'(?:youtube(?:-nocookie)?\.com/(?:shorts|embed|live|v)/)([\w-]{11})',
+    r'youtu\.be/([\w-]{11})',
+]
+
+
+def video_key(url):
+    """Cache key for a URL: ``youtube:<id>`` for YouTube videos, else the URL itself"""
+    parsed = urlparse(url.strip())
+    if "youtube" in parsed.netloc or "youtu.be" in parsed.netloc:
+        video_id = parse_qs(parsed.query).get('v', [None])[0]
+        if not video_id:
+            for pattern in _YOUTUBE_ID_PATTERNS:
+                match = re.search(pattern, url)
+                if match:
+                    video_id = match.group(1)
+                    break
+        if video_id:
+            return f"youtube:{video_id}"
+    return f"url:{url.strip()}"
+
+
+def info_key(info):
+    """Cache key for an extracted info dict (``<extractor>:<id>``)"""
+    extractor = (info.get('extractor_key') or info.get('extractor') or "").lower()
+    if extractor and info.get('id'):
+        return f"{extractor}:{info['id']}"
+    return None
+
+
+def stream_expiry(info):
+    """Earliest expiry time of the signed stream URLs in an info dict (None if unsigned)"""
+    expiries = []
+    for media_format in info.get('formats') or []:
+        values = parse_qs(urlparse(media_format.get('url') or "").query).get('expire')
+        if values and values[0].isdigit():
+            expiries.append(int(values[0]))
+    return min(expiries) if expiries else None
+
+
+class MetadataCache:
+    """Info dicts stored zlib-compressed in SQLite, expiring after ``ttl_seconds``
+
+    Entries also expire before the signed stream URLs inside them do, so a cached
+    info dict can always be handed straight to a download. The database runs in WAL
+    mode, so the GUI and the API can share it from separate processes. Expired
+    entries are deleted whenever the cache is opened and by ``prune``.
+    """
+
+    def __init__(self, path=None, ttl_seconds=None):
+        self.path = path or os.path.join(default_cache_dir(), "metadata.sqlite3")
+        self.ttl_seconds = DEFAULT_METADATA_TTL if ttl_seconds is None else ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS metadata ("
+                             "key TEXT PRIMARY KEY, info BLOB NOT NULL, "
+                             "fetched_at REAL NOT NULL, expires_at REAL NOT NULL)")
+        # Expired rows are never read again, so drop them instead of letting the file grow
+        self.prune()
+
+    def get(self, url):
+        """Cached info dict for a URL, or None if missing or expired"""
+        with self._lock:
+            row = self._db.execute("SELECT info, expires_at FROM metadata WHERE key = ?",
+                                   (video_key(url),)).fetchone()
+            if row is None or row[1] <= time.time():
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, url, info):
+        """Store a (JSON-serialisable) video info dict under the URL's key and the video's own key
+
+        Playlists are not stored: their keys would shadow the video a watch URL names.
+        """
+        if info.get('_type', 'video') != 'video':
+            return
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        expiry = stream_expiry(info)
+        if expiry is not None:
+            expires_at = min(expires_at, expiry - EXPIRY_MARGIN_SECONDS)
+        blob = zlib.compress(json.dumps(info, ensure_ascii=False, default=str).encode('utf-8'))
+        keys = {video_key(url), info_key(info)} - {None}
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO metadata (key, info, fetched_at, expires_at) "
+                                 "VALUES (?, ?, ?, ?)", [(key, blob, now, expires_at) for key in keys])
+
+    def prune(self):
+        """Delete expired entries; returns how many were removed"""
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM metadata WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def stats(self):
+        """Hit/miss counts for this process plus the cache's current size"""
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(info)), 0) FROM metadata "
+                                             "WHERE expires_at > ?", (time.time(),)).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': entries,
+                'bytes': size,
+                'ttl_seconds': self.ttl_seconds,
+            }
+
+
+_metadata_cache = None
+_metadata_cache_lock = threading.Lock()
+
+
+def get_metadata_cache():
+    """Return the process-wide video metadata cache"""
+    global _metadata_cache
+    with _metadata_cache_lock:
+        if _metadata_cache is None:
+            _metadata_cache = MetadataCache()
+        return _metadata_cache
+
+
+def extract_info_cached(url, cache=None, refresh=False, **ydl_opts):
+    """yt-dlp info dict for a URL, from the metadata cache when fresh
+
+    Returns ``(info, cached)``. The info dict is sanitised to plain JSON types, which
+    ``YoutubeDL.process_ie_result`` accepts for downloading without re-extracting.
+    With ``refresh`` the cached entry is ignored and replaced. Entries are keyed by
+    video, so extraction always uses ``noplaylist``: a watch URL that also names a
+    playlist resolves to its single video for every caller.
+    """
+    cache = cache or get_metadata_cache()
+    if not refresh:
+        info = cache.get(url)
+        if info is not None:
+            return info, True
+    options = {'quiet': True, 'no_warnings': True, 'skip_download': True, **ydl_opts, 'noplaylist': True}
+    with load_yt_dlp().YoutubeDL(options) as ydl:
+        info = ydl.sanitize_info(ydl.extract_info(url, download=False))
+    cache.put(url, info)
+    return info, False
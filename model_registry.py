@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Whisper Model Registry
+Keeps loaded Whisper models warm for the GUI, CLI and backend API, evicting the
+least recently used ones when a memory budget is exceeded
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+# Default RAM budget for loaded models, overridable with WHISPER_MODEL_BUDGET_MB
+DEFAULT_MEMORY_BUDGET_MB = int(os.environ.get("WHISPER_MODEL_BUDGET_MB", "4096"))
+
+# "int8" applies dynamic int8 quantization to the linear layers for CPU inference
+SUPPORTED_DTYPES = ["float32", "float16", "int8"]
+
+# Parameter counts of the openai-whisper model sizes, for sizing memory before a load
+MODEL_PARAMETERS = {
+    "tiny": 39_000_000,
+    "base": 74_000_000,
+    "small": 244_000_000,
+    "medium": 769_000_000,
+    "large": 1_550_000_000,
+    "turbo": 809_000_000,
+}
+
+# Bytes per parameter; int8 models keep their embeddings and layer norms in float32
+BYTES_PER_PARAMETER = {"float32": 4, "float16": 2, "int8": 1.5}
+
+
+def default_device():
+    """Return the device Whisper would pick on its own"""
+    import torch
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def model_memory_bytes(model):
+    """Estimate the memory held by a model's parameters, buffers and quantized weights"""
+    total = 0
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        total += tensor.numel() * tensor.element_size()
+    # Dynamically quantized layers keep packed weights outside of parameters()
+    for module in model.modules():
+        if callable(getattr(module, 'weight', None)) and hasattr(module, '_packed_params'):
+            for tensor in (module.weight(), module.bias()):
+                if tensor is not None:
+                    total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def estimate_model_bytes(model_size, dtype="float32"):
+    """Approximate memory of a model before it is loaded (None for unknown sizes)"""
+    name = "turbo" if "turbo" in model_size else model_size.split(".")[0].split("-")[0]
+    parameters = MODEL_PARAMETERS.get(name)
+    if parameters is None:
+        return None
+    return int(parameters * BYTES_PER_PARAMETER.get(dtype, 4))
+
+
+def quantize_int8(model):
+    """Apply dynamic int8 quantization to every linear layer of a CPU model
+
+    Whisper uses its own ``Linear`` subclass (it only casts weights to the input dtype),
+    which torch's quantization mapping does not recognise, so those layers are turned
+    back into plain ``nn.Linear`` first. Activations stay float32.
+    """
+    import torch
+    import whisper.model
+
+    for module in model.modules():
+        if isinstance(module, whisper.model.Linear):
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_whisper_model(model_size, device, dtype):
+    """Load a Whisper model onto a device with the requested weight dtype"""
+    import whisper
+
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported model dtype: {dtype}")
+    if dtype == "float16" and device == "cpu":
+        raise ValueError("float16 weights require a CUDA device")
+    if dtype == "int8" and device != "cpu":
+        raise ValueError("int8 quantized models run on the CPU only")
+
+    model = whisper.load_model(model_size, device=device)
+    if dtype == "float16":
+        model = model.half()
+    elif dtype == "int8":
+        model = quantize_int8(model)
+    return model
+
+
+class ModelRegistry:
+    """Process-wide cache of loaded models keyed by (size, device, dtype)"""
+
+    def __init__(self, memory_budget_bytes=None, loader=load_whisper_model):
+        if memory_budget_bytes is None:
+            memory_budget_bytes = DEFAULT_MEMORY_BUDGET_MB * 1024 * 1024
+        self.memory_budget_bytes = memory_budget_bytes
+        self.loader = loader
+        self._models = OrderedDict()  # key -> {'model', 'bytes', 'load_seconds'}
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, model_size, device=None, dtype="float32"):
+        """Build the registry key, filling in the default device (always the CPU for int8)"""
+        if device is None:
+            device = "cpu" if dtype == "int8" else default_device()
+        return (model_size, device, dtype)
+
+    def get(self, model_size, device=None, dtype="float32", log=None):
+        """Return a loaded model, loading it (and evicting others) only when needed"""
+        key = self.make_key(model_size, device, dtype)
+
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return entry['model']
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Serialise loads of the same key so concurrent callers share one load
+        with key_lock:
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    self._models.move_to_end(key)
+                    self.hits += 1
+                    return entry['model']
+                self.misses += 1
+
+            start_time = time.perf_counter()
+            model = self.loader(*key)
+            load_seconds = time.perf_counter() - start_time
+
+            with self._lock:
+                self._models[key] = {
+                    'model': model,
+                    'bytes': model_memory_bytes(model),
+                    'load_seconds': load_seconds,
+                }
+                evicted = self._enforce_budget(keep=key)
+
+        if log:
+            for evicted_key in evicted:
+                log(f"♻️ Evicted model {self.describe_key(evicted_key)} to stay within memory budget")
+        return model
+
+    def is_loaded(self, model_size, device=None, dtype="float32"):
+        """Check whether a model is already warm"""
+        with self._lock:
+            return self.make_key(model_size, device, dtype) in self._models
+
+    def evict(self, model_size, device=None, dtype="float32"):
+        """Drop a model from the registry"""
+        key = self.make_key(model_size, device, dtype)
+        with self._lock:
+            removed = self._models.pop(key, None) is not None
+        if removed:
+            self._release_device_memory(key[1])
+        return removed
+
+    def clear(self):
+        """Drop every loaded model"""
+        with self._lock:
+            devices = {key[1] for key in self._models}
+            self._models.clear()
+        for device in devices:
+            self._release_device_memory(device)
+
+    def set_memory_budget(self, memory_budget_bytes):
+        """Change the memory budget, evicting models if the new budget is smaller"""
+        with self._lock:
+            self.memory_budget_bytes = memory_budget_bytes
+            self._enforce_budget()
+
+    def used_bytes(self):
+        """Total estimated memory held by loaded models"""
+        with self._lock:
+            return sum(entry['bytes'] for entry in self._models.values())
+
+    def loaded_models(self):
+        """Describe loaded models, most recently used last"""
+        with self._lock:
+            return [
+                {
+                    'model_size': key[0],
+                    'device': key[1],
+                    'dtype': key[2],
+                    'bytes': entry['bytes'],
+                    'load_seconds': entry['load_seconds'],
+                }
+                for key, entry in self._models.items()
+            ]
+
+    def stats(self):
+        """Hit/miss counts and memory usage"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'loaded': len(self._models),
+                'used_bytes': sum(entry['bytes'] for entry in self._models.values()),
+                'budget_bytes': self.memory_budget_bytes,
+            }
+
+    @staticmethod
+    def describe_key(key):
+        """Human readable form of a registry key"""
+        model_size, device, dtype = key
+        return f"'{model_size}' ({device}, {dtype})"
+
+    def _enforce_budget(self, keep=None):
+        """Evict least recently used models until the budget is met (lock must be held)"""
+        evicted = []
+        used = sum(entry['bytes'] for entry in self._models.values())
+        for key in list(self._models):
+            if used <= self.memory_budget_bytes:
+                break
+            if key == keep:
+                continue
+            used -= self._models.pop(key)['bytes']
+            evicted.append(key)
+        for key in evicted:
+            self._release_device_memory(key[1])
+        return evicted
+
+    @staticmethod
+    def _release_device_memory(device):
+        if str(device).startswith("cuda"):
+            import torch
+            torch.cuda.empty_cache()
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Return the process-wide model registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
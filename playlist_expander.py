@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Playlist Expansion
+Lists the videos of playlist and channel URLs lazily with yt-dlp's flat extraction and
+hands them over page by page, so downloads start while a long list is still being read
+"""
+
+import os
+import re
+from urllib.parse import parse_qs, urlparse
+
+from ytdlp_loader import load_yt_dlp
+
+
+# Videos handed to the queue at a time, overridable with YTDL_PLAYLIST_PAGE
+PLAYLIST_PAGE_SIZE = int(os.environ.get("YTDL_PLAYLIST_PAGE", "50"))
+
+# Channel pages: /@handle, /channel/<id>, /c/<name>, /user/<name>, optionally with a tab
+_CHANNEL_PATH = re.compile(r'^/(@[^/]+|channel/[^/]+|c/[^/]+|user/[^/]+)'
+                           r'(/(videos|shorts|streams|featured|playlists|podcasts))?/?$')
+
+
+def is_list_url(url):
+    """Whether a YouTube URL names a playlist or channel rather than one video
+
+    A watch URL that also carries ``list=`` counts as its single video, as with
+    yt-dlp's ``--no-playlist``.
+    """
+    parsed = urlparse(url.strip())
+    if "youtube" not in parsed.netloc:
+        return False
+    if parsed.path.rstrip("/") == "/playlist":
+        return 'list' in parse_qs(parsed.query)
+    return bool(_CHANNEL_PATH.match(parsed.path))
+
+
+def entry_url(entry):
+    """Downloadable URL of a flat playlist entry (None if it has none)"""
+    url = entry.get('url') or entry.get('webpage_url')
+    if url and urlparse(url).scheme in ("http", "https"):
+        return url
+    if entry.get('ie_key') == 'Youtube' and entry.get('id'):
+        return f"https://www.youtube.com/watch?v={entry['id']}"
+    return None
+
+
+def iter_list_entries(url, stop=None):
+    """Yield the video URLs of a playlist or channel as yt-dlp lists them
+
+    Entries are requested lazily, one continuation page at a time, and never resolved,
+    so the first URLs arrive after a single page request. Nested lists such as the
+    tabs of a channel page are expanded in turn. Iteration ends early once the
+    ``stop`` event is set.
+    """
+    options = {'quiet': True, 'no_warnings': True, 'extract_flat': 'in_playlist', 'lazy_playlist': True}
+    with load_yt_dlp().YoutubeDL(options) as ydl:
+        pending = [url]
+        seen = {url}
+        while pending:
+            info = ydl.extract_info(pending.pop(0), download=False, process=False)
+            if info.get('_type') in ('url', 'url_transparent') and info.get('ie_key') == 'YoutubeTab':
+                # A channel page that only points at one of its tabs
+                tab_url = entry_url(info)
+                if tab_url and tab_url not in seen:
+                    seen.add(tab_url)
+                    pending.append(tab_url)
+                continue
+            if info.get('_type') not in ('playlist', 'multi_video'):
+                video_url = entry_url(info) or info.get('webpage_url')
+                if video_url:
+                    yield video_url
+                continue
+            for entry in info.get('entries') or []:
+                if stop is not None and stop.is_set():
+                    return
+                if not entry:
+                    continue
+                nested = entry.get('_type') == 'playlist' or entry.get('ie_key') == 'YoutubeTab'
+                nested_url = entry_url(entry)
+                if nested and nested_url:
+                    if nested_url not in seen:
+                        seen.add(nested_url)
+                        pending.append(nested_url)
+                elif nested_url:
+                    yield nested_url
+
+
+def expand_in_pages(url, on_page, page_size=PLAYLIST_PAGE_SIZE, stop=None):
+    """Call ``on_page(urls)`` for every ``page_size`` videos of a list; returns how many were listed"""
+    page = []
+    listed = 0
+    for video_url in iter_list_entries(url, stop):
+        page.append(video_url)
+        listed += 1
+        # The first video goes out on its own, so a download can start right away
+        if listed == 1 or len(page) >= page_size:
+            on_page(page)
+            page = []
+    if page and not (stop is not None and stop.is_set()):
+        on_page(page)
+    return listed
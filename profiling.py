@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Job Profiling
+Opt-in per-job stage timings, with optional cProfile and torch profiler captures,
+written as profile artifacts next to a job's output
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+
+# "stages" times each stage; "cprofile" adds a Python profile; "torch" adds a torch trace
+PROFILE_MODES = ["off", "stages", "cprofile", "torch"]
+
+PROFILE_SUFFIX = ".profile.json"
+PSTATS_SUFFIX = ".pstats"
+TORCH_TRACE_SUFFIX = ".torch-trace.json"
+
+
+def peak_rss_bytes():
+    """Return the peak resident set size of this process in bytes (None if unavailable)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def format_bytes(num_bytes):
+    """Format a byte count as a human readable string"""
+    if num_bytes is None:
+        return "N/A"
+    for unit in ["B", "KB", "MB", "GB"]:
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+
+class JobProfiler:
+    """Timing spans for the stages of one job, plus optional deep captures
+
+    Spans carry wall-clock start times, so spans recorded in a worker process can be
+    merged into the profile of the thread that submitted the job. With ``mode`` "off"
+    every call is a no-op, so jobs can be instrumented unconditionally.
+    """
+
+    def __init__(self, name, mode="stages"):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.name = name
+        self.mode = mode
+        self.spans = []
+        self.artifacts = []
+        self.started_at = time.time()
+        self._cprofile = None
+        self._torch_profile = None
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    def record(self, stage, start, seconds, **details):
+        """Add a span measured elsewhere (``start`` is a ``time.time()`` timestamp)"""
+        if self.enabled:
+            self.spans.append({'stage': stage, 'start': start, 'seconds': seconds,
+                               'peak_rss': peak_rss_bytes(), **details})
+
+    @contextmanager
+    def span(self, stage, **details):
+        """Time the enclosed block as one stage"""
+        if not self.enabled:
+            yield
+            return
+        start, start_time = time.time(), time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, start, time.perf_counter() - start_time, **details)
+
+    def add_spans(self, spans, artifacts=()):
+        """Merge spans and artifacts reported by a worker process"""
+        self.spans.extend(spans)
+        self.artifacts.extend(artifacts)
+
+    def start_capture(self):
+        """Start the cProfile (and torch profiler) capture for this thread"""
+        if self.mode in ("cprofile", "torch"):
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        if self.mode == "torch":
+            import torch
+            self._torch_profile = torch.profiler.profile(activities=[torch.profiler.ProfilerActivity.CPU])
+            self._torch_profile.__enter__()
+
+    def stop_capture(self, path_prefix):
+        """Stop the captures and save them as ``<prefix>.pstats`` and ``<prefix>.torch-trace.json``"""
+        if self._torch_profile is not None:
+            self._torch_profile.__exit__(None, None, None)
+            trace_path = path_prefix + TORCH_TRACE_SUFFIX
+            self._torch_profile.export_chrome_trace(trace_path)
+            self.artifacts.append(trace_path)
+            self._torch_profile = None
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            stats_path = path_prefix + PSTATS_SUFFIX
+            self._cprofile.dump_stats(stats_path)
+            self.artifacts.append(stats_path)
+            self._cprofile = None
+
+    def stage_totals(self):
+        """Total seconds per stage, in the order the stages first ran"""
+        totals = {}
+        for span in sorted(self.spans, key=lambda span: span['start']):
+            totals[span['stage']] = totals.get(span['stage'], 0.0) + span['seconds']
+        return totals
+
+    def wall_seconds(self):
+        """Time from the first span (or the profiler's creation) until now"""
+        first = min([self.started_at] + [span['start'] for span in self.spans])
+        return time.time() - first
+
+    def summary_lines(self):
+        """Short stage-timing table for the log"""
+        totals = self.stage_totals()
+        wall_seconds = self.wall_seconds()
+        lines = [f"⏱️ Stage timings ({wall_seconds:.1f}s total):"]
+        for stage, seconds in totals.items():
+            share = seconds / wall_seconds * 100 if wall_seconds > 0 else 0.0
+            lines.append(f"   {stage:<16} {seconds:>8.2f}s {share:>5.1f}%")
+        return lines
+
+    def to_dict(self):
+        """Profile as a JSON-serialisable dict"""
+        return {
+            'name': self.name,
+            'mode': self.mode,
+            'started_at': self.started_at,
+            'wall_seconds': self.wall_seconds(),
+            'stages': self.stage_totals(),
+            'spans': sorted(self.spans, key=lambda span: span['start']),
+            'peak_rss': peak_rss_bytes(),
+            'artifacts': self.artifacts,
+        }
+
+    def write(self, path):
+        """Save the profile as JSON and return its path"""
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        return path
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Compact Segment Store
+Column-oriented storage for transcript segments with bulk timestamp formatting and
+block-buffered subtitle rendering
+"""
+
+import json
+from array import array
+
+
+# Segments rendered per block; each block is joined and written in one call
+BLOCK_SEGMENTS = 4096
+
+# Separators of the minified JSON and NDJSON output
+COMPACT_SEPARATORS = (",", ":")
+
+
+class SegmentStore:
+    """Transcript segments held as numeric arrays plus one contiguous text buffer
+
+    Start and end times live in ``array('d')`` columns and the stripped segment texts
+    are concatenated into a single string indexed by ``offsets``, so tens of thousands
+    of segments cost a few bytes each instead of one dict (with token lists) apiece.
+    """
+
+    def __init__(self, language=None, full_text=None):
+        self.language = language
+        self.full_text = full_text
+        self.starts = array('d')
+        self.ends = array('d')
+        self.offsets = array('q', [0])
+        self._parts = []
+        self._text_buffer = ""
+
+    @classmethod
+    def from_result(cls, result):
+        """Build a store from a Whisper-style result dict"""
+        store = cls(language=result.get('language'), full_text=result.get('text', "").strip())
+        store.extend(result.get('segments', []))
+        return store
+
+    def extend(self, segments):
+        """Append segments (dicts with start, end and text)"""
+        position = self.offsets[-1]
+        for segment in segments:
+            text = segment['text'].strip()
+            self.starts.append(segment['start'])
+            self.ends.append(segment['end'])
+            self._parts.append(text)
+            position += len(text)
+            self.offsets.append(position)
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def text_buffer(self):
+        """All segment texts as one contiguous string"""
+        if self._parts:
+            self._text_buffer += "".join(self._parts)
+            self._parts = []
+        return self._text_buffer
+
+    def text(self, index):
+        """Text of one segment"""
+        return self.text_buffer[self.offsets[index]:self.offsets[index + 1]]
+
+    def texts(self, start=0, stop=None):
+        """Texts of a range of segments"""
+        stop = len(self) if stop is None else stop
+        buffer = self.text_buffer
+        offsets = self.offsets
+        return [buffer[offsets[i]:offsets[i + 1]] for i in range(start, stop)]
+
+    def start_array(self):
+        """Start times as a numpy view (no copy)"""
+        import numpy as np
+        return np.frombuffer(self.starts, dtype=np.float64)
+
+    def end_array(self):
+        """End times as a numpy view (no copy)"""
+        import numpy as np
+        return np.frombuffer(self.ends, dtype=np.float64)
+
+    def nbytes(self):
+        """Approximate memory held by the store"""
+        return (self.starts.itemsize * len(self.starts) + self.ends.itemsize * len(self.ends)
+                + self.offsets.itemsize * len(self.offsets) + len(self.text_buffer))
+
+    def to_compact_result(self):
+        """Result dict without token-level data"""
+        starts, ends = self.starts.tolist(), self.ends.tolist()
+        texts = self.texts()
+        return {
+            'language': self.language,
+            'text': self.full_text if self.full_text is not None else " ".join(texts),
+            'segments': [
+                {'id': i, 'start': starts[i], 'end': ends[i], 'text': texts[i]}
+                for i in range(len(texts))
+            ],
+        }
+
+
+def format_timestamps(seconds, separator=","):
+    """Format an array of second offsets as HH:MM:SS,mmm strings in bulk
+
+    The hour/minute/second/millisecond split is done with vectorised integer maths on
+    whole microseconds, matching ``seconds_to_srt_time`` for every value.
+    """
+    import numpy as np
+
+    microseconds = np.round(np.asarray(seconds, dtype=np.float64) * 1_000_000).astype(np.int64)
+    milliseconds_total = microseconds // 1000
+    total_seconds, milliseconds = np.divmod(milliseconds_total, 1000)
+    hours, remainder = np.divmod(total_seconds, 3600)
+    minutes, secs = np.divmod(remainder, 60)
+    template = f"%02d:%02d:%02d{separator}%03d"
+    return [template % values for values in zip(hours.tolist(), minutes.tolist(),
+                                                secs.tolist(), milliseconds.tolist())]
+
+
+def _block_ranges(count, block_size):
+    for start in range(0, count, block_size):
+        yield start, min(start + block_size, count)
+
+
+def iter_srt_blocks(store, block_size=BLOCK_SEGMENTS):
+    """Yield the SRT file content in blocks of ``block_size`` segments"""
+    starts, ends = store.start_array(), store.end_array()
+    for start, stop in _block_ranges(len(store), block_size):
+        start_times = format_timestamps(starts[start:stop])
+        end_times = format_timestamps(ends[start:stop])
+        texts = store.texts(start, stop)
+        yield "".join(
+            f"{start + i + 1}\n{start_times[i]} --> {end_times[i]}\n{texts[i]}\n\n"
+            for i in range(stop - start)
+        )
+
+
+def iter_vtt_blocks(store, block_size=BLOCK_SEGMENTS):
+    """Yield the WebVTT file content in blocks of ``block_size`` segments"""
+    yield "WEBVTT\n\n"
+    starts, ends = store.start_array(), store.end_array()
+    for start, stop in _block_ranges(len(store), block_size):
+        start_times = format_timestamps(starts[start:stop], ".")
+        end_times = format_timestamps(ends[start:stop], ".")
+        texts = store.texts(start, stop)
+        yield "".join(
+            f"{start_times[i]} --> {end_times[i]}\n{texts[i]}\n\n"
+            for i in range(stop - start)
+        )
+
+
+def iter_txt_blocks(store, block_size=BLOCK_SEGMENTS):
+    """Yield the plain text file content in blocks of ``block_size`` segments"""
+    for start, stop in _block_ranges(len(store), block_size):
+        yield "".join(f"{text}\n" for text in store.texts(start, stop))
+
+
+def iter_ndjson_blocks(store, block_size=BLOCK_SEGMENTS):
+    """Yield one compact JSON object per segment and line, without token data"""
+    starts, ends = store.starts, store.ends
+    for start, stop in _block_ranges(len(store), block_size):
+        texts = store.texts(start, stop)
+        yield "".join(
+            json.dumps({'id': start + i, 'start': starts[start + i], 'end': ends[start + i],
+                        'text': texts[i]}, ensure_ascii=False, separators=COMPACT_SEPARATORS) + "\n"
+            for i in range(stop - start)
+        )
+
+
+def iter_compact_json_blocks(store):
+    """Yield a minified JSON document of the transcript without token data"""
+    yield json.dumps(store.to_compact_result(), ensure_ascii=False, separators=COMPACT_SEPARATORS)
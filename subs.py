@@ -7,16 +7,18 @@ Extracts audio from video and generates accurate English subtitles using OpenAI
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
+import multiprocessing
+import queue
 import os
 import sys
 import subprocess
 import json
 import tempfile
-from datetime import timedelta
+import time
 import wave
 import contextlib
 
-# Install packages from requirements.txt if needed
+# Install packages from requirements.txt (only on request: --install-requirements)
 def install_requirements():
     """Install packages from requirements.txt if not already installed"""
     import subprocess, sys, os
@@ -27,12 +29,306 @@ def install_requirements():
         except Exception as e:
             print(f"Error installing requirements: {e}")
 
-# Install requirements if needed
-install_requirements()
+# Heavy packages (torch, whisper, moviepy, numpy) are imported on first use so the
+# window and the CLI come up immediately
+from audio_source import is_url, resolve_audio_source
+from checkpoint import TranscriptionCheckpoint, checkpoint_path
+from engines import ENGINES, get_engine, get_engine_registry, supports_shared_encoder
+from job_scheduler import JobScheduler, slot_threads
+from model_registry import SUPPORTED_DTYPES, estimate_model_bytes
+from profiling import PROFILE_MODES, PROFILE_SUFFIX, JobProfiler, format_bytes, peak_rss_bytes
+from segment_store import (SegmentStore, iter_compact_json_blocks, iter_ndjson_blocks, iter_srt_blocks,
+                           iter_txt_blocks, iter_vtt_blocks)
+from subtitle_cache import get_audio_cache, get_result_cache
+from transcription import (SAMPLE_RATE as WHISPER_SAMPLE_RATE, transcribe_chunked, transcribe_dual,
+                           transcribe_streaming)
+from ui_events import UIEventPump, append_log_lines
 
-import whisper
-from moviepy.editor import VideoFileClip
-from pydub import AudioSegment
+
+# Import names of the packages transcription needs, checked at startup without importing them
+REQUIRED_MODULES = ["whisper", "torch", "numpy", "moviepy"]
+
+# Supported video formats
+SUPPORTED_VIDEO_FORMATS = [
+    '.mp4', '.mkv', '.mov', '.avi', '.wmv', '.flv', '.webm', '.mpg', '.mpeg',
+    '.m4v', '.3gp', '.ogv', '.ts', '.mts', '.m2ts'
+]
+
+SUBTITLE_FORMATS = ["srt", "vtt", "txt", "json", "ndjson"]
+
+# Formats that can be appended to segment by segment while transcribing
+STREAMABLE_FORMATS = ["srt", "vtt", "txt"]
+
+TASK_LABELS = {"transcribe": "Original", "translate": "English translation"}
+
+# Added to the file name of the English translation when the original is kept too
+TRANSLATION_SUFFIX = "_en"
+
+
+def missing_requirements():
+    """Required packages that are not installed (found without importing them)"""
+    import importlib.util
+    return [name for name in REQUIRED_MODULES if importlib.util.find_spec(name) is None]
+
+
+def decode_audio_stream(source, sample_rate=WHISPER_SAMPLE_RATE, chunk_size=1 << 20, headers=None):
+    """Decode the first audio stream of a media file straight from ffmpeg's stdout
+
+    FFmpeg demuxes only the first audio stream and resamples it to mono float32 at
+    ``sample_rate``, so no temporary WAV is written and the data never touches disk.
+    ``source`` may also be an http(s) URL, fetched with the given request ``headers``.
+
+    Returns a tuple ``(audio, stats)`` where ``audio`` is a 1-D float32 numpy array
+    that can be passed directly to ``model.transcribe`` and ``stats`` holds the
+    number of bytes read, the decode throughput and the peak RSS.
+    """
+    import numpy as np
+
+    network_options = []
+    if is_url(source):
+        network_options = ["-reconnect", "1", "-reconnect_streamed", "1", "-reconnect_delay_max", "5"]
+        if headers:
+            network_options += ["-headers", "".join(f"{key}: {value}\r\n" for key, value in headers.items())]
+
+    cmd = [
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-threads", "0",
+        *network_options,
+        "-i", source,
+        "-map", "0:a:0", "-vn", "-sn", "-dn",
+        "-ac", "1", "-ar", str(sample_rate),
+        "-f", "f32le", "-acodec", "pcm_f32le",
+        "-",
+    ]
+
+    start_time = time.perf_counter()
+    try:
+        process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except FileNotFoundError:
+        raise RuntimeError("FFmpeg not found - run check_ffmpeg.py for installation help")
+
+    # Drain stderr in the background so a chatty ffmpeg can never block on a full pipe
+    stderr_chunks = []
+    stderr_thread = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()),
+                                     daemon=True)
+    stderr_thread.start()
+
+    buffer = bytearray()
+    chunk = bytearray(chunk_size)
+    view = memoryview(chunk)
+    while True:
+        count = process.stdout.readinto(chunk)
+        if not count:
+            break
+        buffer += view[:count]
+    process.stdout.close()
+    return_code = process.wait()
+    stderr_thread.join()
+    elapsed = time.perf_counter() - start_time
+
+    if return_code != 0:
+        error_output = b"".join(stderr_chunks).decode("utf-8", errors="replace").strip()
+        raise RuntimeError(f"FFmpeg failed to decode audio: {error_output or return_code}")
+
+    # Drop a trailing partial sample (only possible if ffmpeg was cut off mid-write)
+    usable = len(buffer) - (len(buffer) % 4)
+    audio = np.frombuffer(buffer, dtype=np.float32, count=usable // 4)
+
+    stats = {
+        'bytes': usable,
+        'seconds': elapsed,
+        'bytes_per_second': usable / elapsed if elapsed > 0 else 0.0,
+        'audio_seconds': len(audio) / sample_rate,
+        'peak_rss': peak_rss_bytes(),
+    }
+    return audio, stats
+
+
+def decode_audio_cached(source, cache=None, sample_rate=WHISPER_SAMPLE_RATE):
+    """Decode a media file's audio, reusing the memory-mapped copy in ``cache`` if there is one
+
+    Returns ``(audio, stats)`` like ``decode_audio_stream``, with ``stats['cached']``
+    telling whether FFmpeg was skipped. Cached audio is a read-only ``numpy.memmap``.
+    """
+    if cache is not None:
+        start_time = time.perf_counter()
+        audio = cache.get(source, sample_rate)
+        if audio is not None:
+            elapsed = time.perf_counter() - start_time
+            return audio, {
+                'bytes': audio.nbytes,
+                'seconds': elapsed,
+                'bytes_per_second': audio.nbytes / elapsed if elapsed > 0 else 0.0,
+                'audio_seconds': len(audio) / sample_rate,
+                'peak_rss': peak_rss_bytes(),
+                'cached': True,
+            }
+
+    audio, stats = decode_audio_stream(source, sample_rate)
+    stats['cached'] = False
+    if cache is not None:
+        try:
+            audio = cache.put(source, audio, sample_rate)
+        except OSError:
+            # A full or read-only cache directory must not fail the job
+            pass
+    return audio, stats
+
+
+def subtitle_blocks(result, store, subtitle_format, compact_json=False):
+    """Return an iterator over the file content of one format, in large blocks"""
+    if subtitle_format == "srt":
+        return iter_srt_blocks(store)
+    if subtitle_format == "vtt":
+        return iter_vtt_blocks(store)
+    if subtitle_format == "txt":
+        return iter_txt_blocks(store)
+    if subtitle_format == "ndjson":
+        return iter_ndjson_blocks(store)
+    if subtitle_format == "json":
+        if compact_json:
+            return iter_compact_json_blocks(store)
+        return iter([json.dumps(result, indent=2, ensure_ascii=False)])
+    raise ValueError(f"Unsupported subtitle format: {subtitle_format}")
+
+
+def _write_blocks(output_path, blocks, buffer_size=1 << 20):
+    """Write text blocks to a file through a large buffer"""
+    with open(output_path, 'w', encoding='utf-8', buffering=buffer_size) as f:
+        for block in blocks:
+            f.write(block)
+    return output_path
+
+
+def save_subtitle_formats(result, output_paths, compact_json=False):
+    """Save subtitles in several formats at once
+
+    ``output_paths`` maps each format to its output file. The segments are copied
+    once into a compact ``SegmentStore``, timestamps are formatted in bulk, and the
+    files are written concurrently in large blocks. With ``compact_json`` the JSON
+    output is minified and leaves out token-level data.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    for subtitle_format in output_paths:
+        if subtitle_format not in SUBTITLE_FORMATS:
+            raise ValueError(f"Unsupported subtitle format: {subtitle_format}")
+
+    store = SegmentStore.from_result(result)
+    jobs = [
+        (output_path, subtitle_blocks(result, store, subtitle_format, compact_json))
+        for subtitle_format, output_path in output_paths.items()
+    ]
+    if len(jobs) == 1:
+        _write_blocks(*jobs[0])
+        return dict(output_paths)
+
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        futures = [pool.submit(_write_blocks, output_path, blocks) for output_path, blocks in jobs]
+        for future in futures:
+            future.result()
+    return dict(output_paths)
+
+
+class SubtitleStreamWriter:
+    """Append SRT, VTT and TXT entries to their files as segments arrive
+
+    Each batch of segments is flushed straight away so other tools can read the
+    partial output while transcription is still running.
+    """
+
+    def __init__(self, output_paths):
+        self.output_paths = {
+            fmt: path for fmt, path in output_paths.items() if fmt in STREAMABLE_FORMATS
+        }
+        self.count = 0
+        self.files = {}
+        try:
+            for subtitle_format, output_path in self.output_paths.items():
+                self.files[subtitle_format] = open(output_path, 'w', encoding='utf-8')
+        except Exception:
+            self.close()
+            raise
+        if "vtt" in self.files:
+            self.files["vtt"].write("WEBVTT\n\n")
+        self.flush()
+
+    def write_segments(self, segments):
+        """Append a batch of segments to every open file"""
+        srt_file = self.files.get("srt")
+        vtt_file = self.files.get("vtt")
+        txt_file = self.files.get("txt")
+        for segment in segments:
+            self.count += 1
+            text = segment['text'].strip()
+            if srt_file or vtt_file:
+                start_time = seconds_to_srt_time(segment['start'])
+                end_time = seconds_to_srt_time(segment['end'])
+                if srt_file:
+                    srt_file.write(f"{self.count}\n{start_time} --> {end_time}\n{text}\n\n")
+                if vtt_file:
+                    vtt_file.write(f"{start_time.replace(',', '.')} --> {end_time.replace(',', '.')}\n{text}\n\n")
+            if txt_file:
+                txt_file.write(f"{text}\n")
+        self.flush()
+
+    def flush(self):
+        """Push buffered entries to disk"""
+        for f in self.files.values():
+            f.flush()
+
+    def close(self):
+        """Close every output file"""
+        for f in self.files.values():
+            f.close()
+        self.files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def save_subtitles(result, output_path, subtitle_format):
+    """Save subtitles in the requested format"""
+    save_subtitle_formats(result, {subtitle_format: output_path})
+
+
+def save_srt(result, output_path):
+    """Save subtitles in SRT format"""
+    save_subtitles(result, output_path, "srt")
+
+
+def save_vtt(result, output_path):
+    """Save subtitles in VTT format"""
+    save_subtitles(result, output_path, "vtt")
+
+
+def save_txt(result, output_path):
+    """Save subtitles in plain text format"""
+    save_subtitles(result, output_path, "txt")
+
+
+def save_json(result, output_path):
+    """Save subtitles in JSON format"""
+    save_subtitles(result, output_path, "json")
+
+
+def seconds_to_srt_time(seconds):
+    """Convert seconds to SRT time format"""
+    milliseconds_total = round(seconds * 1_000_000) // 1000
+    total_seconds, milliseconds = divmod(milliseconds_total, 1000)
+    hours, remainder = divmod(total_seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+
+
+def seconds_to_vtt_time(seconds):
+    """Convert seconds to VTT time format"""
+    return seconds_to_srt_time(seconds).replace(",", ".")
 
 
 class AISubtitleGenerator:
@@ -46,19 +342,41 @@ class AISubtitleGenerator:
         self.video_path = tk.StringVar()
         self.output_path = tk.StringVar(value=os.path.expanduser("~/Downloads"))
         self.model_size = tk.StringVar(value="base")
+        self.model_precision = tk.StringVar(value="float32")
+        self.engine = tk.StringVar(value="whisper")
         self.language = tk.StringVar(value="zh")  # Default to Chinese
-        self.subtitle_format = tk.StringVar(value="srt")
+        self.subtitle_formats = {fmt: tk.BooleanVar(value=(fmt == "srt")) for fmt in SUBTITLE_FORMATS}
         self.translate_to_english = tk.BooleanVar(value=False)
-        self.current_model = None
+        self.keep_original = tk.BooleanVar(value=False)
+        self.stream_audio = tk.BooleanVar(value=True)
+        self.chunk_workers = tk.StringVar(value="1")
+        self.use_cache = tk.BooleanVar(value=True)
+        self.stream_segments = tk.BooleanVar(value=False)
+        self.compact_json = tk.BooleanVar(value=False)
+        self.checkpoint_jobs = tk.BooleanVar(value=False)
+        self.concurrent_jobs = tk.StringVar(value="1")
+        self.profile_mode = tk.StringVar(value="off")
+        self.current_model_key = None
+        self.current_engine = None
+        
+        # Transcriptions run in job slot processes that share the CPU core budget
+        self.scheduler = None
+        self.scheduler_config = None
+        self.scheduler_lock = threading.Lock()
+        self.event_manager = None
         
         # Supported video formats
-        self.supported_formats = [
-            '.mp4', '.mkv', '.mov', '.avi', '.wmv', '.flv', '.webm', '.mpg', '.mpeg',
-            '.m4v', '.3gp', '.ogv', '.ts', '.mts', '.m2ts'
-        ]
+        self.supported_formats = list(SUPPORTED_VIDEO_FORMATS)
         
         self.setup_ui()
         
+        # Worker threads post log lines, status text and progress; the main loop draws them
+        self.ui = UIEventPump(root)
+        self.ui.register("log", lambda messages: append_log_lines(self.log_text, messages), batch=True)
+        self.ui.register("status", lambda status: self.status_label.config(text=status), coalesce=True)
+        self.ui.register("progress", self._show_progress, coalesce=True)
+        self.ui.start()
+        
     def setup_ui(self):
         """Setup the user interface"""
         # Configure style
@@ -90,10 +408,24 @@ class AISubtitleGenerator:
         
         # Model Size Selection
         ttk.Label(main_frame, text="AI Model Size:").grid(row=2, column=0, sticky=tk.W, pady=5)
-        model_combo = ttk.Combobox(main_frame, textvariable=self.model_size, 
+        model_frame = ttk.Frame(main_frame)
+        model_frame.grid(row=2, column=1, sticky=tk.W, pady=5)
+        model_combo = ttk.Combobox(model_frame, textvariable=self.model_size, 
                                   values=["tiny", "base", "small", "medium", "large"], 
                                   state="readonly", width=20)
-        model_combo.grid(row=2, column=1, sticky=tk.W, pady=5)
+        model_combo.pack(side=tk.LEFT)
+        
+        # Model Precision (int8 = quantized CPU inference)
+        ttk.Label(model_frame, text="Precision:").pack(side=tk.LEFT, padx=(10, 0))
+        precision_combo = ttk.Combobox(model_frame, textvariable=self.model_precision,
+                                      values=SUPPORTED_DTYPES, state="readonly", width=8)
+        precision_combo.pack(side=tk.LEFT, padx=(5, 0))
+        
+        # Speech Recognition Engine (transformers = batched pipeline)
+        ttk.Label(model_frame, text="Engine:").pack(side=tk.LEFT, padx=(10, 0))
+        engine_combo = ttk.Combobox(model_frame, textvariable=self.engine,
+                                   values=ENGINES, state="readonly", width=12)
+        engine_combo.pack(side=tk.LEFT, padx=(5, 0))
         
         # Model info label
         self.model_info_label = ttk.Label(main_frame, text="Base model: Good balance of speed and accuracy", 
@@ -112,17 +444,67 @@ class AISubtitleGenerator:
                                            font=('Arial', 9), foreground='#cccccc')
         self.language_info_label.grid(row=3, column=2, sticky=tk.W, padx=(10, 0), pady=5)
         
-        # Translation Option
-        translate_check = ttk.Checkbutton(main_frame, text="Translate to English", 
+        # Translation Options (both together share one audio decode and encoder pass)
+        translate_frame = ttk.Frame(main_frame)
+        translate_frame.grid(row=4, column=0, sticky=tk.W, pady=5)
+        translate_check = ttk.Checkbutton(translate_frame, text="Translate to English", 
                                          variable=self.translate_to_english)
-        translate_check.grid(row=4, column=0, columnspan=2, sticky=tk.W, pady=5)
+        translate_check.pack(anchor=tk.W)
+        keep_original_check = ttk.Checkbutton(translate_frame, text="Keep original too",
+                                             variable=self.keep_original)
+        keep_original_check.pack(anchor=tk.W)
+        
+        # Audio Extraction Mode
+        stream_check = ttk.Checkbutton(main_frame, text="Stream audio via FFmpeg (no temp file)",
+                                      variable=self.stream_audio)
+        stream_check.grid(row=4, column=2, sticky=tk.W, padx=(10, 0), pady=5)
+        
+        # Transcription Result Cache
+        cache_check = ttk.Checkbutton(main_frame, text="Reuse cached audio and transcriptions",
+                                     variable=self.use_cache)
+        cache_check.grid(row=4, column=1, sticky=tk.W, pady=5)
+        
+        # Subtitle Format Selection (any combination, written from one transcription)
+        ttk.Label(main_frame, text="Subtitle Formats:").grid(row=5, column=0, sticky=tk.W, pady=5)
+        formats_frame = ttk.Frame(main_frame)
+        formats_frame.grid(row=5, column=1, sticky=tk.W, pady=5)
+        for subtitle_format in SUBTITLE_FORMATS:
+            ttk.Checkbutton(formats_frame, text=subtitle_format.upper(),
+                           variable=self.subtitle_formats[subtitle_format]).pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Streaming Output (append segments to SRT/VTT/TXT as they are decoded)
+        ttk.Checkbutton(formats_frame, text="Write while transcribing",
+                       variable=self.stream_segments).pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Compact JSON (minified, no token-level data)
+        ttk.Checkbutton(formats_frame, text="Compact JSON",
+                       variable=self.compact_json).pack(side=tk.LEFT, padx=(10, 0))
         
-        # Subtitle Format Selection
-        ttk.Label(main_frame, text="Subtitle Format:").grid(row=5, column=0, sticky=tk.W, pady=5)
-        format_combo = ttk.Combobox(main_frame, textvariable=self.subtitle_format,
-                                   values=["srt", "vtt", "txt", "json"], 
-                                   state="readonly", width=20)
-        format_combo.grid(row=5, column=1, sticky=tk.W, pady=5)
+        # Parallel Chunk Workers (1 = single transcription call)
+        workers_frame = ttk.Frame(main_frame)
+        workers_frame.grid(row=5, column=2, sticky=tk.W, padx=(10, 0), pady=5)
+        ttk.Label(workers_frame, text="Parallel chunks:").pack(side=tk.LEFT)
+        workers_combo = ttk.Combobox(workers_frame, textvariable=self.chunk_workers,
+                                    values=[str(n) for n in range(1, (os.cpu_count() or 1) + 1)],
+                                    state="readonly", width=5)
+        workers_combo.pack(side=tk.LEFT, padx=(5, 0))
+        
+        # Concurrent Jobs (the CPU core budget is split between them; extra jobs queue)
+        ttk.Label(workers_frame, text="Jobs:").pack(side=tk.LEFT, padx=(10, 0))
+        jobs_combo = ttk.Combobox(workers_frame, textvariable=self.concurrent_jobs,
+                                 values=[str(n) for n in range(1, (os.cpu_count() or 1) + 1)],
+                                 state="readonly", width=5)
+        jobs_combo.pack(side=tk.LEFT, padx=(5, 0))
+        
+        # Checkpointing (resume long jobs after a crash or restart)
+        ttk.Checkbutton(workers_frame, text="Resumable",
+                       variable=self.checkpoint_jobs).pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Profiling (stage timings, optionally with cProfile / torch profiler captures)
+        ttk.Label(workers_frame, text="Profile:").pack(side=tk.LEFT, padx=(10, 0))
+        profile_combo = ttk.Combobox(workers_frame, textvariable=self.profile_mode,
+                                    values=PROFILE_MODES, state="readonly", width=8)
+        profile_combo.pack(side=tk.LEFT, padx=(5, 0))
         
         # Output Path
         ttk.Label(main_frame, text="Output Path:").grid(row=6, column=0, sticky=tk.W, pady=5)
@@ -169,19 +551,24 @@ class AISubtitleGenerator:
         main_frame.columnconfigure(1, weight=1)
         main_frame.rowconfigure(10, weight=1)
         
-        # Bind model size change
+        # Bind model size and precision change
         model_combo.bind('<<ComboboxSelected>>', self.update_model_info)
+        precision_combo.bind('<<ComboboxSelected>>', self.update_model_info)
         
     def log_message(self, message):
-        """Add message to log text area"""
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        """Add message to log text area (safe to call from any thread)"""
+        self.ui.post("log", message)
         
     def update_status(self, status):
-        """Update status label"""
-        self.status_label.config(text=status)
-        self.root.update_idletasks()
+        """Update status label (safe to call from any thread)"""
+        self.ui.post("status", status)
+        
+    def _show_progress(self, percent):
+        """Switch the progress bar to determinate mode and show a percentage"""
+        if str(self.progress.cget('mode')) != 'determinate':
+            self.progress.stop()
+            self.progress.config(mode='determinate', maximum=100, value=0)
+        self.progress.config(value=percent)
         
     def update_model_info(self, event=None):
         """Update model information based on selection"""
@@ -192,7 +579,10 @@ class AISubtitleGenerator:
             "medium": "Medium: High accuracy, slower (~769 MB)",
             "large": "Large: Best accuracy, slowest (~1550 MB)"
         }
-        self.model_info_label.config(text=model_info.get(self.model_size.get(), ""))
+        info = model_info.get(self.model_size.get(), "")
+        if self.model_precision.get() == "int8":
+            info += " - int8 quantized, CPU only"
+        self.model_info_label.config(text=info)
         
     def browse_video(self):
         """Browse for video file"""
@@ -241,26 +631,41 @@ class AISubtitleGenerator:
     def _load_model_thread(self):
         """Thread function to load Whisper model"""
         try:
-            self.progress.start()
+            self.ui.call(self.progress.start)
             self.update_status("Loading AI model...")
             
             model_size = self.model_size.get()
-            self.log_message(f"Loading Whisper model: {model_size}")
+            dtype = self.model_precision.get()
+            engine = self.engine.get()
+            scheduler = self.job_scheduler((model_size, None, dtype))
+            self.log_message(f"Loading Whisper model: {model_size} ({dtype}, {engine} engine) into "
+                             f"{scheduler.max_jobs} job slot(s)")
             self.log_message("This may take a few minutes for the first time...")
             
-            # Load the model
-            self.current_model = whisper.load_model(model_size)
+            # Load the model in every job slot (instant where the slot's registry already holds it)
+            start_time = time.perf_counter()
+            model_key = get_engine_registry(engine).make_key(model_size, dtype=dtype)
+            loads = [future.result() for future in scheduler.broadcast(preload_model, *model_key, engine)]
+            self.current_model_key = model_key
+            self.current_engine = engine
+            elapsed = time.perf_counter() - start_time
             
-            self.log_message(f"✅ Model '{model_size}' loaded successfully!")
+            if all(load['already_loaded'] for load in loads):
+                self.log_message(f"Using already loaded Whisper model: {model_size} ({dtype})")
+            used_bytes = sum(load['stats']['used_bytes'] for load in loads)
+            budget_bytes = sum(load['stats']['budget_bytes'] for load in loads)
+            self.log_message(f"✅ Model '{model_size}' ready in {elapsed:.2f}s")
+            self.log_message(f"🧠 Models in memory: {sum(load['stats']['loaded'] for load in loads)} "
+                             f"({format_bytes(used_bytes)} of {format_bytes(budget_bytes)} budget)")
             self.update_status(f"Model '{model_size}' loaded and ready")
             
         except Exception as e:
             error_msg = f"❌ Error loading model: {str(e)}"
             self.log_message(error_msg)
             self.update_status("Error loading model")
-            messagebox.showerror("Error", error_msg)
+            self.ui.call(messagebox.showerror, "Error", error_msg)
         finally:
-            self.progress.stop()
+            self.ui.call(self.progress.stop)
             
     def generate_subtitles(self):
         """Generate subtitles from video"""
@@ -279,8 +684,12 @@ class AISubtitleGenerator:
             messagebox.showerror("Error", "Output path does not exist")
             return
             
+        if not self.selected_formats():
+            messagebox.showerror("Error", "Please select at least one subtitle format")
+            return
+            
         # Check if model is loaded
-        if self.current_model is None:
+        if self.current_model_key is None:
             messagebox.showerror("Error", "Please load the AI model first")
             return
             
@@ -289,9 +698,8 @@ class AISubtitleGenerator:
         
     def _generate_subtitles_thread(self, video_path):
         """Thread function to generate subtitles"""
-        temp_audio_path = None
         try:
-            self.progress.start()
+            self.ui.call(self.progress.start)
             self.update_status("Extracting audio from video...")
             
             # Extract audio from video
@@ -299,162 +707,967 @@ class AISubtitleGenerator:
             self.log_message("STARTING SUBTITLE GENERATION")
             self.log_message("=" * 60)
             self.log_message(f"Video: {os.path.basename(video_path)}")
-            self.log_message(f"Model: {self.model_size.get()}")
+            self.log_message(f"Model: {self.current_model_key[0]} ({self.current_model_key[2]}, "
+                             f"{self.current_engine} engine)")
             self.log_message(f"Language: {self.language.get()}")
-            self.log_message(f"Format: {self.subtitle_format.get()}")
+            self.log_message(f"Output: {' + '.join(TASK_LABELS[task] for task in self.selected_tasks())}")
+            self.log_message(f"Formats: {', '.join(self.selected_formats())}")
+            self.log_message(f"Parallel chunks: {self.chunk_workers.get()}")
             self.log_message("")
             
-            # Create temporary audio file
-            temp_audio_path = self.extract_audio(video_path)
+            language = self.language.get() if self.language.get() != "auto" else None
+            tasks = self.selected_tasks()
+            profiler = JobProfiler(os.path.basename(video_path), self.profile_mode.get())
             
-            self.update_status("Running AI transcription...")
-            self.log_message("🤖 Running AI transcription...")
+            # Reuse stored transcriptions of the same media and settings if there are any
+            results = {}
+            cache_keys = {}
+            cache = get_result_cache() if self.use_cache.get() else None
+            if cache is not None:
+                self.update_status("Checking transcription cache...")
+                model_size, _, dtype = self.current_model_key
+                with profiler.span("cache_lookup"):
+                    cache_keys, results = lookup_cached_results(cache, video_path, model_size, language, tasks,
+                                                                dtype, self.current_engine)
+                if len(results) == len(tasks):
+                    self.log_message("⚡ Cache hit - skipping audio extraction and transcription")
             
-            # Transcribe audio using Whisper
-            result = self.current_model.transcribe(
-                temp_audio_path,
-                language=self.language.get() if self.language.get() != "auto" else None,
-                verbose=False
-            )
+            streamed_formats = {}
+            checkpoint = None
+            # Only the tasks the cache had no result for are transcribed
+            missing = [task for task in tasks if task not in results]
+            if missing:
+                # Checkpoints let a restarted job pick up from the last saved window
+                if self.checkpoint_jobs.get():
+                    model_size, _, dtype = self.current_model_key
+                    checkpoint = make_checkpoint(video_path, self.output_path.get(), model_size, language,
+                                                 missing, dtype, self.current_engine)
+                    if checkpoint.load():
+                        self.log_message(f"⏩ Resuming from checkpoint: {checkpoint.path}")
+                
+                # Streaming writes SRT/VTT/TXT during transcription; the rest follow at the end
+                stream_writer = None
+                if len(missing) == 1 and self.stream_segments.get() and int(self.chunk_workers.get()) <= 1:
+                    stream_writer = SubtitleStreamWriter(self.output_paths(video_path))
+                try:
+                    fresh_results = self._transcribe_video(video_path, language, missing, stream_writer,
+                                                           checkpoint, profiler)
+                finally:
+                    if stream_writer is not None:
+                        stream_writer.close()
+                if stream_writer is not None:
+                    streamed_formats[missing[0]] = list(stream_writer.output_paths)
+                store_results(cache, cache_keys, fresh_results)
+                results.update(fresh_results)
             
-            self.log_message(f"✅ Transcription completed!")
-            self.log_message(f"📊 Detected language: {result.get('language', 'unknown')}")
-            self.log_message(f"📝 Total segments: {len(result.get('segments', []))}")
+            if cache is not None:
+                stats = cache.stats()
+                self.log_message(f"🗄️ Result cache: {stats['hits']} hits, {stats['misses']} misses, "
+                                 f"{stats['entries']} entries ({format_bytes(stats['bytes'])})")
             
-            # Generate output filename
-            video_name = os.path.splitext(os.path.basename(video_path))[0]
-            output_filename = f"{video_name}_subtitles.{self.subtitle_format.get()}"
-            output_path = os.path.join(self.output_path.get(), output_filename)
+            for task in tasks:
+                result = results[task]
+                self.log_message(f"📊 {TASK_LABELS[task]} - detected language: {result.get('language', 'unknown')}")
+                self.log_message(f"📝 {TASK_LABELS[task]} - total segments: {len(result.get('segments', []))}")
             
-            # Save subtitles in requested format
-            self.save_subtitles(result, output_path)
+            # Save subtitles for every task in every requested format
+            write_start = time.perf_counter()
+            with profiler.span("save_subtitles"):
+                output_paths = self.save_subtitles(results, video_path, streamed_formats)
+            write_seconds = time.perf_counter() - write_start
             
-            self.log_message(f"✅ Subtitles saved to: {output_path}")
+            for output_path in output_paths:
+                self.log_message(f"✅ Subtitles saved to: {output_path}")
+            self.log_message(f"💾 Wrote {len(output_paths)} file(s) in {write_seconds:.3f}s")
+            if checkpoint is not None:
+                checkpoint.remove()
+            if profiler.enabled:
+                for line in profiler.summary_lines():
+                    self.log_message(line)
+                profile_file = profiler.write(profile_prefix(video_path, self.output_path.get()) + PROFILE_SUFFIX)
+                self.log_message(f"🧪 Profile saved to: {profile_file}")
             self.update_status("Subtitle generation completed!")
             
             # Show completion message
-            messagebox.showinfo("Success", 
-                              f"Subtitles generated successfully!\n\nSaved to: {output_path}")
+            saved_list = "\n".join(output_paths)
+            self.ui.call(messagebox.showinfo, "Success",
+                         f"Subtitles generated successfully!\n\nSaved to:\n{saved_list}")
             
         except Exception as e:
             error_msg = f"❌ Error generating subtitles: {str(e)}"
             self.log_message(error_msg)
             self.update_status("Error generating subtitles")
-            messagebox.showerror("Error", error_msg)
+            self.ui.call(messagebox.showerror, "Error", error_msg)
         finally:
-            # Clean up temporary file
-            if temp_audio_path and os.path.exists(temp_audio_path):
-                try:
-                    os.remove(temp_audio_path)
-                    self.log_message("🧹 Temporary audio file cleaned up")
-                except:
-                    pass
-            self.progress.stop()
+            self.ui.call(self.progress.stop)
+            self.ui.call(self.progress.config, mode='indeterminate', value=0)
             
+    def job_scheduler(self, model_key=None):
+        """Scheduler that runs this window's transcriptions within the CPU core and memory budgets
+
+        Every slot holds its own copy of the model (``model_key``, default: the loaded
+        one), so there are only as many slots as copies fit in the model memory budget.
+        It is rebuilt when the number of concurrent jobs or the model changes while it
+        is idle.
+        """
+        max_jobs = int(self.concurrent_jobs.get())
+        model_key = model_key or self.current_model_key
+        model_bytes = estimate_model_bytes(model_key[0], model_key[2]) if model_key else None
+        with self.scheduler_lock:
+            scheduler = self.scheduler
+            if (scheduler is not None and self.scheduler_config != (max_jobs, model_bytes)
+                    and scheduler.running() == 0 and scheduler.pending() == 0):
+                scheduler.shutdown(wait=False)
+                scheduler = None
+            if scheduler is None:
+                scheduler = self.scheduler = JobScheduler(max_jobs=max_jobs, model_bytes=model_bytes)
+                self.scheduler_config = (max_jobs, model_bytes)
+                self.log_message(f"🧮 CPU budget: {scheduler.core_budget} cores as {scheduler.describe()}")
+                if model_bytes and scheduler.memory_budget_bytes // model_bytes < max_jobs:
+                    self.log_message(f"⚠️ Only {scheduler.max_jobs} of {max_jobs} concurrent jobs fit in the "
+                                     f"{format_bytes(scheduler.memory_budget_bytes)} model memory budget")
+            return scheduler
+        
+    def job_event_queue(self):
+        """Queue a job slot process can report log lines and segments through"""
+        with self.scheduler_lock:
+            if self.event_manager is None:
+                # Spawned, like the job slots, rather than forked from the Tk process
+                self.event_manager = multiprocessing.get_context("spawn").Manager()
+            return self.event_manager.Queue()
+        
+    def _transcribe_video(self, video_path, language, tasks, stream_writer=None, checkpoint=None,
+                          profiler=None):
+        """Run each task on a video in a job slot of the scheduler and wait for the results
+
+        Returns a dict mapping each task ("transcribe" or "translate") to its result.
+        Jobs beyond the free slots wait in the scheduler's queue. With a
+        ``stream_writer`` each segment is written and logged as soon as the job decodes
+        it, and the progress bar tracks the transcribed position. The job's stage
+        spans are added to ``profiler``.
+        """
+        scheduler = self.job_scheduler()
+        if int(self.chunk_workers.get()) > 1 and len(tasks) == 1:
+            if self.current_engine == "whisper":
+                return self._transcribe_video_chunked(video_path, language, tasks[0], scheduler, checkpoint,
+                                                      profiler)
+            self.log_message(f"⚠️ The {self.current_engine} engine batches windows itself - "
+                             f"ignoring parallel chunks")
+        if scheduler.free_slots() == 0:
+            self.log_message(f"⏳ All {scheduler.max_jobs} job slot(s) busy - queued behind "
+                             f"{scheduler.pending()} waiting job(s)")
+            self.update_status("Waiting for a free CPU slot...")
+        
+        events = self.job_event_queue()
+        future = scheduler.submit(transcribe_media_job, video_path, self.current_model_key, language, tasks,
+                                  stream_audio=self.stream_audio.get(),
+                                  stream=stream_writer is not None, checkpoint=checkpoint, events=events,
+                                  engine=self.current_engine, audio_cache=self.use_cache.get(),
+                                  profile_mode=profiler.mode if profiler is not None else "off",
+                                  profile_prefix=profile_prefix(video_path, self.output_path.get()),
+                                  queued_at=time.time())
+        
+        start_time = time.perf_counter()
+        first_segment_seconds = []
+        while True:
+            try:
+                event = events.get(timeout=0.1)
+            except queue.Empty:
+                if future.done() and events.empty():
+                    break
+                continue
+            if event[0] == "profile":
+                profiler.add_spans(event[1], event[2])
+                continue
+            self._handle_job_event(event, stream_writer, start_time, first_segment_seconds)
+        return future.result()
+        
+    def _transcribe_video_chunked(self, video_path, language, task, scheduler, checkpoint=None, profiler=None):
+        """Run one task on a video as parallel windows queued on the scheduler's job slots
+
+        The audio is decoded here and each window is a job of its own, so the windows
+        use the models the slots already hold instead of a process pool per video.
+        """
+        profiler = profiler or JobProfiler(os.path.basename(video_path), "off")
+        chunk_workers = int(self.chunk_workers.get())
+        if chunk_workers > scheduler.max_jobs:
+            self.log_message(f"🧩 Parallel chunks share the {scheduler.max_jobs} job slot(s)")
+        if checkpoint is not None:
+            self.log_message("⚠️ Checkpoints are only saved with 1 parallel chunk")
+        
+        self.update_status("Extracting audio from video...")
+        with profiler.span("decode_audio"):
+            audio = decode_job_audio(video_path, log=self.log_message,
+                                     cache=get_audio_cache() if self.use_cache.get() else None)
+        
+        self.update_status("Running AI transcription...")
+        model_size, device, dtype = self.current_model_key
+        transcribe_start = time.perf_counter()
+        with profiler.span("transcribe", tasks=[task]):
+            result = transcribe_chunked(audio, model_size, chunk_workers, device=device, dtype=dtype,
+                                        log=self.log_message, scheduler=scheduler, language=language, task=task)
+        self.log_message(f"✅ Transcription completed in {time.perf_counter() - transcribe_start:.1f}s")
+        return {task: result}
+        
+    def _handle_job_event(self, event, stream_writer, start_time, first_segment_seconds):
+        """Show a job's progress: log lines, status text and streamed segments"""
+        kind = event[0]
+        if kind == "log":
+            self.log_message(event[1])
+        elif kind == "status":
+            self.update_status(event[1])
+        elif kind == "segments":
+            _, segments, processed_seconds, total_seconds = event
+            stream_writer.write_segments(segments)
+            if segments and not first_segment_seconds:
+                first_segment_seconds.append(time.perf_counter() - start_time)
+                self.log_message(f"⏱️ First subtitle after {first_segment_seconds[0]:.1f}s")
+            for segment in segments:
+                self.log_message(f"[{seconds_to_srt_time(segment['start'])} --> "
+                                 f"{seconds_to_srt_time(segment['end'])}] {segment['text'].strip()}")
+            percent = processed_seconds / total_seconds * 100 if total_seconds else 100
+            self.ui.post("progress", percent)
+            self.update_status(f"Running AI transcription... {percent:.0f}%")
+        
     def extract_audio(self, video_path):
         """Extract audio from video file"""
-        try:
-            self.log_message("🎵 Extracting audio from video...")
-            
-            # Create temporary audio file
-            temp_audio_path = tempfile.mktemp(suffix=".wav")
+        return extract_audio_file(video_path, log=self.log_message)
             
-            # Extract audio using moviepy
-            video = VideoFileClip(video_path)
-            audio = video.audio
-            
-            # Write audio to temporary file
-            audio.write_audiofile(temp_audio_path, verbose=False, logger=None)
-            
-            # Clean up
-            audio.close()
-            video.close()
-            
-            self.log_message(f"✅ Audio extracted to temporary file")
-            
-            return temp_audio_path
-            
-        except Exception as e:
-            raise Exception(f"Failed to extract audio: {str(e)}")
+    def extract_audio_stream(self, video_path):
+        """Decode audio from video file into memory via an FFmpeg pipe"""
+        return decode_job_audio(video_path, log=self.log_message)
             
-    def save_subtitles(self, result, output_path):
-        """Save subtitles in the requested format"""
-        subtitle_format = self.subtitle_format.get()
-        
-        if subtitle_format == "srt":
-            self.save_srt(result, output_path)
-        elif subtitle_format == "vtt":
-            self.save_vtt(result, output_path)
-        elif subtitle_format == "txt":
-            self.save_txt(result, output_path)
-        elif subtitle_format == "json":
-            self.save_json(result, output_path)
-        else:
-            raise ValueError(f"Unsupported subtitle format: {subtitle_format}")
+    def selected_formats(self):
+        """Subtitle formats ticked in the UI"""
+        return [fmt for fmt in SUBTITLE_FORMATS if self.subtitle_formats[fmt].get()]
+        
+    def selected_tasks(self):
+        """Whisper tasks to run: the original transcript, an English translation, or both"""
+        return tasks_for(self.translate_to_english.get(), self.keep_original.get())
+        
+    def output_paths(self, video_path):
+        """Output path for each selected subtitle format"""
+        return subtitle_output_paths(video_path, self.output_path.get(), self.selected_formats())
+        
+    def save_subtitles(self, results, video_path, streamed_formats=None):
+        """Save each task's result in every selected format and return the paths
+
+        ``results`` maps each task to its result; formats listed per task in
+        ``streamed_formats`` were already written while transcribing.
+        """
+        return save_task_results(results, video_path, self.output_path.get(),
+                                 self.selected_formats(), streamed_formats, self.compact_json.get())
             
     def save_srt(self, result, output_path):
         """Save subtitles in SRT format"""
-        with open(output_path, 'w', encoding='utf-8') as f:
-            for i, segment in enumerate(result['segments'], 1):
-                start_time = self.seconds_to_srt_time(segment['start'])
-                end_time = self.seconds_to_srt_time(segment['end'])
-                text = segment['text'].strip()
-                
-                f.write(f"{i}\n")
-                f.write(f"{start_time} --> {end_time}\n")
-                f.write(f"{text}\n\n")
+        save_srt(result, output_path)
                 
     def save_vtt(self, result, output_path):
         """Save subtitles in VTT format"""
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write("WEBVTT\n\n")
-            
-            for segment in result['segments']:
-                start_time = self.seconds_to_vtt_time(segment['start'])
-                end_time = self.seconds_to_vtt_time(segment['end'])
-                text = segment['text'].strip()
-                
-                f.write(f"{start_time} --> {end_time}\n")
-                f.write(f"{text}\n\n")
+        save_vtt(result, output_path)
                 
     def save_txt(self, result, output_path):
         """Save subtitles in plain text format"""
-        with open(output_path, 'w', encoding='utf-8') as f:
-            for segment in result['segments']:
-                f.write(f"{segment['text'].strip()}\n")
+        save_txt(result, output_path)
                 
     def save_json(self, result, output_path):
         """Save subtitles in JSON format"""
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
+        save_json(result, output_path)
             
     def seconds_to_srt_time(self, seconds):
         """Convert seconds to SRT time format"""
-        td = timedelta(seconds=seconds)
-        total_seconds = int(td.total_seconds())
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        seconds = total_seconds % 60
-        milliseconds = int((td.total_seconds() - total_seconds) * 1000)
-        
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d},{milliseconds:03d}"
+        return seconds_to_srt_time(seconds)
         
     def seconds_to_vtt_time(self, seconds):
         """Convert seconds to VTT time format"""
-        td = timedelta(seconds=seconds)
-        total_seconds = int(td.total_seconds())
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        seconds = total_seconds % 60
-        milliseconds = int((td.total_seconds() - total_seconds) * 1000)
+        return seconds_to_vtt_time(seconds)
+
+
+def extract_audio_file(video_path, log=print):
+    """Extract a video's audio track to a temporary WAV file with moviepy"""
+    try:
+        log("🎵 Extracting audio from video...")
+        start_time = time.perf_counter()
+        
+        # Create temporary audio file
+        temp_audio_path = tempfile.mktemp(suffix=".wav")
+        
+        # Extract audio using moviepy
+        from moviepy.editor import VideoFileClip
+        video = VideoFileClip(video_path)
+        audio = video.audio
+        
+        # Write audio to temporary file
+        audio.write_audiofile(temp_audio_path, verbose=False, logger=None)
+        
+        # Clean up
+        audio.close()
+        video.close()
+        
+        elapsed = time.perf_counter() - start_time
+        written = os.path.getsize(temp_audio_path)
+        log("✅ Audio extracted to temporary file")
+        log(f"📈 Wrote {format_bytes(written)} in {elapsed:.1f}s "
+            f"({format_bytes(written / elapsed if elapsed > 0 else 0)}/s), "
+            f"peak RSS {format_bytes(peak_rss_bytes())}")
+        
+        return temp_audio_path
+        
+    except Exception as e:
+        raise Exception(f"Failed to extract audio: {str(e)}")
+
+
+def decode_job_audio(video_path, log=print, cache=None):
+    """Decode a video's audio into memory via an FFmpeg pipe (or the audio cache), logging throughput"""
+    try:
+        log("🎵 Streaming audio from video via FFmpeg...")
+        
+        audio, stats = decode_audio_cached(video_path, cache)
+        
+        if stats['cached']:
+            log(f"⚡ Mapped {stats['audio_seconds']:.1f}s of cached audio - skipped FFmpeg")
+            return audio
+        log(f"✅ Decoded {stats['audio_seconds']:.1f}s of 16 kHz mono audio in memory")
+        log(f"📈 Read {format_bytes(stats['bytes'])} in {stats['seconds']:.1f}s "
+            f"({format_bytes(stats['bytes_per_second'])}/s), "
+            f"peak RSS {format_bytes(stats['peak_rss'])}")
+        
+        return audio
+        
+    except Exception as e:
+        raise Exception(f"Failed to extract audio: {str(e)}")
+
+
+def preload_model(model_size, device=None, dtype="float32", engine="whisper"):
+    """Job slot task: load a model into this process's registry and report the load"""
+    registry = get_engine_registry(engine)
+    already_loaded = registry.is_loaded(model_size, device, dtype)
+    start_time = time.perf_counter()
+    registry.get(model_size, device=device, dtype=dtype)
+    return {
+        'already_loaded': already_loaded,
+        'seconds': time.perf_counter() - start_time,
+        'stats': registry.stats(),
+    }
+
+
+def transcribe_media_job(video_path, model_key, language, tasks, stream_audio=True, stream=False, checkpoint=None, events=None, engine="whisper", audio_cache=False,
+                         profile_mode="off", profile_prefix=None, queued_at=None):
+    """Job slot task: decode a video's audio and run each task on it
+
+    ``model_key`` is the registry key (size, device, dtype) of the model to use with
+    ``engine``. With ``audio_cache`` decoded audio is memory-mapped from (and stored
+    in) the shared audio cache.
+    Progress is reported through the ``events`` queue as ``("log", message)``,
+    ``("status", text)`` and, with ``stream``, ``("segments", segments,
+    processed_seconds, total_seconds)`` tuples. Returns a dict mapping each task
+    ("transcribe" or "translate") to its result.
+
+    With a ``profile_mode`` other than "off" the job's stage spans (and the paths of
+    any cProfile/torch captures saved under ``profile_prefix``) are reported as a
+    ``("profile", spans, artifacts)`` event before it returns.
+    """
+    import whisper
+    
+    def log(message):
+        if events is not None:
+            events.put(("log", message))
+    
+    def on_segments(segments, processed_seconds, total_seconds):
+        events.put(("segments", segments, processed_seconds, total_seconds))
+    
+    model_size, device, dtype = model_key
+    profiler = JobProfiler(os.path.basename(video_path), profile_mode)
+    if queued_at is not None:
+        profiler.record("queue_wait", queued_at, time.time() - queued_at)
+    temp_audio_path = None
+    try:
+        profiler.start_capture()
+        log(f"▶️ Job started with {slot_threads()} CPU thread(s)")
+        if events is not None:
+            events.put(("status", "Extracting audio from video..."))
         
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+        # Decode audio in memory, or fall back to a temporary audio file
+        with profiler.span("decode_audio"):
+            cache = get_audio_cache() if audio_cache else None
+            if stream_audio:
+                audio = decode_job_audio(video_path, log=log, cache=cache)
+            else:
+                audio = cache.get(video_path) if cache is not None else None
+                if audio is not None:
+                    log(f"⚡ Mapped {len(audio) / WHISPER_SAMPLE_RATE:.1f}s of cached audio - skipped extraction")
+                else:
+                    temp_audio_path = extract_audio_file(video_path, log=log)
+                    audio = temp_audio_path
+        
+        if events is not None:
+            events.put(("status", "Running AI transcription..."))
+        log("🤖 Running AI transcription...")
+        with profiler.span("load_model"):
+            model = get_engine(engine, model_size, device=device, dtype=dtype)
+        
+        # Transcribe audio with the selected engine
+        transcribe_start = time.perf_counter()
+        with profiler.span("transcribe", tasks=list(tasks)):
+            if len(tasks) > 1:
+                if isinstance(audio, str):
+                    audio = whisper.load_audio(audio)
+                if supports_shared_encoder(model):
+                    log("🔁 Transcribing and translating with a shared encoder pass")
+                results = transcribe_tasks(model, audio, language, tasks, log=log, checkpoint=checkpoint)
+            elif stream:
+                if isinstance(audio, str):
+                    audio = whisper.load_audio(audio)
+                results = {tasks[0]: transcribe_streaming(model, audio, on_segments, checkpoint=checkpoint,
+                                                          language=language, task=tasks[0])}
+            elif checkpoint is not None:
+                if isinstance(audio, str):
+                    audio = whisper.load_audio(audio)
+                results = transcribe_tasks(model, audio, language, tasks, log=log, checkpoint=checkpoint)
+            else:
+                results = {tasks[0]: model.transcribe(
+                    audio,
+                    language=language,
+                    task=tasks[0],
+                    verbose=False
+                )}
+        transcribe_seconds = time.perf_counter() - transcribe_start
+        
+        log(f"✅ Transcription completed in {transcribe_seconds:.1f}s")
+        return results
+    finally:
+        profiler.stop_capture(profile_prefix)
+        if profiler.enabled and events is not None:
+            events.put(("profile", profiler.spans, profiler.artifacts))
+        
+        # Clean up temporary file
+        if temp_audio_path and os.path.exists(temp_audio_path):
+            try:
+                os.remove(temp_audio_path)
+                log("🧹 Temporary audio file cleaned up")
+            except:
+                pass
+
+
+def _batch_transcribe_file(video_path, output_dir, language, subtitle_formats,
+                           model_size, dtype="float32", use_cache=True, tasks=("transcribe",),
+                           compact_json=False, checkpoint=False, device=None, engine="whisper"):
+    """Transcribe one file inside a batch job slot and return its timing summary"""
+    summary = {
+        'path': video_path,
+        'outputs': [],
+        'cached': False,
+        'audio_cached': False,
+        'resumed': False,
+        'audio_seconds': 0.0,
+        'decode_seconds': 0.0,
+        'transcribe_seconds': 0.0,
+        'total_seconds': 0.0,
+        'error': None,
+    }
+    start_time = time.perf_counter()
+    try:
+        results, cache_keys = {}, {}
+        job_checkpoint = None
+        cache = get_result_cache() if use_cache else None
+        if cache is not None:
+            cache_keys, results = lookup_cached_results(cache, video_path, model_size, language, tasks, dtype,
+                                                        engine)
+            summary['cached'] = len(results) == len(tasks)
+
+        if not summary['cached']:
+            audio, stats = decode_audio_cached(video_path, get_audio_cache() if use_cache else None)
+            summary['audio_cached'] = stats['cached']
+            summary['audio_seconds'] = stats['audio_seconds']
+            summary['decode_seconds'] = stats['seconds']
+
+            missing = [task for task in tasks if task not in results]
+            if checkpoint:
+                job_checkpoint = make_checkpoint(video_path, output_dir, model_size, language, missing, dtype,
+                                                 engine)
+                summary['resumed'] = job_checkpoint.load() is not None
+
+            transcribe_start = time.perf_counter()
+            model = get_engine(engine, model_size, device=device, dtype=dtype)
+            fresh_results = transcribe_tasks(model, audio, language, missing, checkpoint=job_checkpoint)
+            summary['transcribe_seconds'] = time.perf_counter() - transcribe_start
+            store_results(cache, cache_keys, fresh_results)
+            results.update(fresh_results)
+
+        summary['outputs'] = save_task_results(results, video_path, output_dir, subtitle_formats,
+                                               compact_json=compact_json)
+        if job_checkpoint is not None:
+            job_checkpoint.remove()
+    except Exception as e:
+        summary['error'] = str(e)
+    summary['total_seconds'] = time.perf_counter() - start_time
+    return summary
+
+
+def tasks_for(translate=False, keep_original=False):
+    """Whisper tasks to run: the original transcript, an English translation, or both"""
+    if not translate:
+        return ["transcribe"]
+    if keep_original:
+        return ["transcribe", "translate"]
+    return ["translate"]
+
+
+def transcribe_tasks(model, audio, language, tasks, log=None, checkpoint=None):
+    """Run each task on decoded audio with an engine
+
+    With openai-whisper models two tasks share one encoder pass per window. With a
+    ``checkpoint`` progress is saved as the audio is worked through and a previous
+    run of the same job is resumed. Checkpointed runs use the same 30-second windows
+    as ``transcribe``, so they give the same segments; other engines are not
+    checkpointed.
+    """
+    if supports_shared_encoder(model) and (len(tasks) > 1 or checkpoint is not None):
+        return transcribe_dual(model, audio, language=language, tasks=tasks, log=log, checkpoint=checkpoint)
+    if checkpoint is not None and log:
+        log("⚠️ Checkpoints are only saved with the whisper engine")
+    return {task: model.transcribe(audio, language=language, task=task, verbose=None) for task in tasks}
+
+
+def model_options(dtype="float32", engine="whisper"):
+    """Settings besides model size, language and task that change a transcript"""
+    options = {'dtype': dtype}
+    if engine != "whisper":
+        options['engine'] = engine
+    return options
+
+
+def make_checkpoint(video_path, output_dir, model_size, language, tasks, dtype="float32", engine="whisper"):
+    """Checkpoint sidecar for a transcription job, next to its subtitle outputs"""
+    return TranscriptionCheckpoint(checkpoint_path(video_path, output_dir), video_path,
+                                   model_size=model_size, language=language, tasks=list(tasks),
+                                   **model_options(dtype, engine))
 
 
-def main():
+def lookup_cached_results(cache, video_path, model_size, language, tasks, dtype="float32", engine="whisper"):
+    """Fetch cached results for each task; returns (cache keys, results found)"""
+    cache_keys, results = {}, {}
+    for task in tasks:
+        cache_keys[task], cached = cache.lookup(video_path, model_size, language, task,
+                                                **model_options(dtype, engine))
+        if cached is not None:
+            results[task] = cached
+    return cache_keys, results
+
+
+def store_results(cache, cache_keys, results):
+    """Store freshly computed results in the result cache"""
+    if cache is None:
+        return
+    for task, result in results.items():
+        cache.put(cache_keys[task], result)
+
+
+def save_task_results(results, video_path, output_dir, subtitle_formats, streamed_formats=None,
+                      compact_json=False):
+    """Save every task's result in every format and return all output paths
+
+    The English translation gets a ``TRANSLATION_SUFFIX`` file name when the original
+    transcript is saved alongside it. Formats listed per task in ``streamed_formats``
+    were already written while transcribing.
+    """
+    streamed_formats = streamed_formats or {}
+    output_paths = []
+    for task, result in results.items():
+        suffix = TRANSLATION_SUFFIX if task == "translate" and len(results) > 1 else ""
+        paths = subtitle_output_paths(video_path, output_dir, subtitle_formats, suffix)
+        remaining = {fmt: path for fmt, path in paths.items() if fmt not in streamed_formats.get(task, ())}
+        if remaining:
+            save_subtitle_formats(result, remaining, compact_json)
+        output_paths.extend(paths.values())
+    return output_paths
+
+
+def subtitle_output_path(video_path, output_dir, subtitle_format, suffix=""):
+    """Build the output path used for a video's subtitles"""
+    video_name = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(output_dir, f"{video_name}_subtitles{suffix}.{subtitle_format}")
+
+
+def subtitle_output_paths(video_path, output_dir, subtitle_formats, suffix=""):
+    """Map each requested format to its output path"""
+    return {fmt: subtitle_output_path(video_path, output_dir, fmt, suffix) for fmt in subtitle_formats}
+
+
+def profile_prefix(video_path, output_dir):
+    """Path prefix of a video's profile artifacts (``.profile.json``, ``.pstats``, ...)"""
+    video_name = os.path.splitext(os.path.basename(video_path))[0]
+    return os.path.join(output_dir, f"{video_name}_subtitles")
+
+
+def find_media_files(directory, recursive=False):
+    """List files under a directory with a supported video extension"""
+    media_files = []
+    for current_dir, dirnames, filenames in os.walk(directory):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if os.path.splitext(filename)[1].lower() in SUPPORTED_VIDEO_FORMATS:
+                media_files.append(os.path.join(current_dir, filename))
+        if not recursive:
+            break
+    return media_files
+
+
+def run_batch(input_dir, output_dir, model_size="base", language=None, subtitle_formats=("srt",),
+              workers=1, recursive=False, device=None, dtype="float32", use_cache=True,
+              tasks=("transcribe",), compact_json=False, checkpoint=False, cores=None, pin_cpus=False,
+              engine="whisper"):
+    """Transcribe every supported file in a directory as jobs sharing a CPU core budget
+
+    ``workers`` jobs run at once, each in its own process with ``cores`` (default: all)
+    split between them; the remaining files queue. With ``checkpoint`` each file's
+    progress is saved next to its outputs, so re-running an interrupted batch resumes
+    partly transcribed files.
+    """
+    from concurrent.futures import as_completed
+
+    media_files = find_media_files(input_dir, recursive=recursive)
+    if not media_files:
+        print(f"❌ No supported video files found in {input_dir}")
+        return []
+
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(1, min(workers, len(media_files)))
+    model_bytes = estimate_model_bytes(model_size, dtype)
+    scheduler = JobScheduler(core_budget=cores, max_jobs=workers, pin_affinity=pin_cpus, model_bytes=model_bytes)
+
+    print("=" * 60)
+    print("BATCH SUBTITLE GENERATION")
+    print("=" * 60)
+    print(f"Files: {len(media_files)}")
+    print(f"Model: {model_size} ({dtype}, {engine} engine)")
+    print(f"Language: {language or 'auto'}")
+    print(f"Output: {' + '.join(TASK_LABELS[task] for task in tasks)}")
+    print(f"Formats: {', '.join(subtitle_formats)}")
+    print(f"Workers: {scheduler.describe()} ({scheduler.core_budget} cores)")
+    if model_bytes and scheduler.memory_budget_bytes // model_bytes < workers:
+        print(f"⚠️ Only {scheduler.max_jobs} of {workers} workers fit in the "
+              f"{format_bytes(scheduler.memory_budget_bytes)} model memory budget")
+    print("")
+
+    summaries = []
+    wall_start = time.perf_counter()
+    with scheduler:
+        futures = [
+            scheduler.submit(_batch_transcribe_file, path, output_dir, language, list(subtitle_formats),
+                             model_size, dtype, use_cache, list(tasks), compact_json, checkpoint, device,
+                             engine)
+            for path in media_files
+        ]
+        for future in as_completed(futures):
+            summary = future.result()
+            summaries.append(summary)
+            name = os.path.basename(summary['path'])
+            if summary['error']:
+                print(f"❌ {name}: {summary['error']}")
+            else:
+                resumed = " (resumed from checkpoint)" if summary['resumed'] else ""
+                print(f"✅ {name} -> {', '.join(summary['outputs'])}{resumed}")
+    wall_seconds = time.perf_counter() - wall_start
+
+    print_batch_summary(summaries, wall_seconds)
+    return summaries
+
+
+def print_batch_summary(summaries, wall_seconds):
+    """Print per-file real-time factor and overall throughput for a batch run"""
+    print("")
+    print("=" * 60)
+    print("BATCH SUMMARY")
+    print("=" * 60)
+    print(f"{'File':<32} {'Audio':>9} {'Decode':>8} {'Infer':>8} {'RTF':>6}")
+    for summary in sorted(summaries, key=lambda item: item['path']):
+        name = os.path.basename(summary['path'])[:32]
+        if summary['error']:
+            print(f"{name:<32} {'FAILED':>9}")
+            continue
+        if summary['cached']:
+            print(f"{name:<32} {'CACHED':>9}")
+            continue
+        # Real-time factor: processing time per second of audio (lower is faster)
+        rtf = summary['total_seconds'] / summary['audio_seconds'] if summary['audio_seconds'] else 0.0
+        print(f"{name:<32} {summary['audio_seconds']:>8.1f}s {summary['decode_seconds']:>7.1f}s "
+              f"{summary['transcribe_seconds']:>7.1f}s {rtf:>6.2f}")
+
+    succeeded = [summary for summary in summaries if not summary['error']]
+    total_audio = sum(summary['audio_seconds'] for summary in succeeded)
+    cached = sum(1 for summary in succeeded if summary['cached'])
+    print("-" * 60)
+    print(f"Succeeded: {len(succeeded)}/{len(summaries)} in {wall_seconds:.1f}s wall time "
+          f"({cached} from cache)")
+    if wall_seconds > 0:
+        print(f"Throughput: {total_audio / wall_seconds:.2f}x real time, "
+              f"{len(succeeded) * 60 / wall_seconds:.2f} files/min")
+
+
+def run_single(video_path, output_dir, model_size="base", language=None, subtitle_formats=("srt",),
+               chunk_workers=1, device=None, dtype="float32", use_cache=True, stream=False,
+               tasks=("transcribe",), compact_json=False, checkpoint=False, engine="whisper"):
+    """Transcribe one file headlessly, optionally in parallel chunks, and report timings
+
+    With ``stream`` each segment is printed and appended to the SRT/VTT/TXT outputs as
+    soon as it is decoded. With ``checkpoint`` sequential runs save their progress next
+    to the outputs and resume an interrupted run. Returns a dict mapping each task to
+    its result.
+    """
+    tasks = list(tasks)
+    results, cache_keys = {}, {}
+    cache = get_result_cache() if use_cache else None
+    if cache is not None:
+        cache_keys, results = lookup_cached_results(cache, video_path, model_size, language, tasks, dtype,
+                                                    engine)
+        if len(results) == len(tasks):
+            output_paths = save_task_results(results, video_path, output_dir, subtitle_formats,
+                                             compact_json=compact_json)
+            print("⚡ Cache hit - skipped extraction and transcription")
+            for output_path in output_paths:
+                print(f"✅ Subtitles saved to: {output_path}")
+            return results
+
+    audio, stats = decode_audio_cached(video_path, get_audio_cache() if use_cache else None)
+    if stats['cached']:
+        print(f"⚡ Mapped {stats['audio_seconds']:.1f}s of cached audio - skipped FFmpeg")
+    else:
+        print(f"🎵 Decoded {stats['audio_seconds']:.1f}s of audio in {stats['seconds']:.1f}s")
+
+    # Only the tasks the cache had no result for are transcribed
+    missing = [task for task in tasks if task not in results]
+    job_checkpoint = None
+    if checkpoint:
+        job_checkpoint = make_checkpoint(video_path, output_dir, model_size, language, missing, dtype, engine)
+        if job_checkpoint.load():
+            print(f"⏩ Resuming from checkpoint: {job_checkpoint.path}")
+
+    if engine != "whisper" and chunk_workers > 1:
+        print(f"⚠️ The {engine} engine batches windows itself - ignoring --chunk-workers")
+        chunk_workers = 1
+
+    transcribe_start = time.perf_counter()
+    streamed_formats = {}
+    if len(missing) == 1 and chunk_workers > 1:
+        if job_checkpoint is not None:
+            print("⚠️ Checkpoints are only saved without --chunk-workers")
+        fresh_results = {missing[0]: transcribe_chunked(audio, model_size, chunk_workers, device=device,
+                                                        dtype=dtype, log=print, language=language,
+                                                        task=missing[0])}
+    elif len(missing) == 1 and stream:
+        model = get_engine(engine, model_size, device=device, dtype=dtype)
+        stream_paths = subtitle_output_paths(video_path, output_dir, subtitle_formats)
+        with SubtitleStreamWriter(stream_paths) as writer:
+            def on_segments(segments, processed_seconds, total_seconds):
+                writer.write_segments(segments)
+                for segment in segments:
+                    print(f"[{seconds_to_srt_time(segment['start'])} --> "
+                          f"{seconds_to_srt_time(segment['end'])}] {segment['text'].strip()}")
+                print(f"   {processed_seconds:.0f}/{total_seconds:.0f}s transcribed "
+                      f"({time.perf_counter() - transcribe_start:.1f}s elapsed)")
+
+            fresh_results = {missing[0]: transcribe_streaming(model, audio, on_segments,
+                                                              checkpoint=job_checkpoint, language=language,
+                                                              task=missing[0])}
+            streamed_formats[missing[0]] = list(writer.output_paths)
+    else:
+        chunk_workers = 1
+        model = get_engine(engine, model_size, device=device, dtype=dtype)
+        fresh_results = transcribe_tasks(model, audio, language, missing, log=print, checkpoint=job_checkpoint)
+    transcribe_seconds = time.perf_counter() - transcribe_start
+    store_results(cache, cache_keys, fresh_results)
+    results.update(fresh_results)
+
+    output_paths = save_task_results(results, video_path, output_dir, subtitle_formats, streamed_formats,
+                                     compact_json)
+    if job_checkpoint is not None:
+        job_checkpoint.remove()
+
+    rtf = transcribe_seconds / stats['audio_seconds'] if stats['audio_seconds'] else 0.0
+    print(f"✅ {' + '.join(TASK_LABELS[task] for task in tasks)} in {transcribe_seconds:.1f}s "
+          f"with {chunk_workers} worker{'s' if chunk_workers > 1 else ''} (RTF {rtf:.2f})")
+    for output_path in output_paths:
+        print(f"✅ Subtitles saved to: {output_path}")
+    return results
+
+
+def run_url(url, output_dir, model_size="base", language=None, subtitle_formats=("srt",), chunk_workers=1,
+            device=None, dtype="float32", tasks=("transcribe",), compact_json=False, engine="whisper"):
+    """Subtitle a video URL from its smallest suitable audio-only stream
+
+    Only the audio stream is fetched, and FFmpeg decodes it straight from the network
+    into memory: no video is downloaded, nothing is muxed or re-encoded, and nothing
+    but the subtitles is written to disk. Returns a dict mapping each task to its result.
+    """
+    tasks = list(tasks)
+    start_time = time.perf_counter()
+    source = resolve_audio_source(url)
+    details = [source['ext'] or "unknown format"]
+    if source['abr']:
+        details.append(f"{source['abr']:.0f} kbps")
+    if source['size']:
+        details.append(format_bytes(source['size']))
+    format_label = f"format {source['format_id']} " if source['format_id'] else ""
+    print(f"🎧 Streaming audio {format_label}({', '.join(details)}) for: {source['name']}")
+
+    audio, stats = decode_audio_stream(source['url'], headers=source['headers'])
+    print(f"🎵 Decoded {stats['audio_seconds']:.1f}s of audio in {stats['seconds']:.1f}s "
+          f"({time.perf_counter() - start_time:.1f}s since start)")
+
+    if engine != "whisper" and chunk_workers > 1:
+        print(f"⚠️ The {engine} engine batches windows itself - ignoring --chunk-workers")
+        chunk_workers = 1
+
+    transcribe_start = time.perf_counter()
+    if len(tasks) == 1 and chunk_workers > 1:
+        results = {tasks[0]: transcribe_chunked(audio, model_size, chunk_workers, device=device, dtype=dtype,
+                                                log=print, language=language, task=tasks[0])}
+    else:
+        chunk_workers = 1
+        model = get_engine(engine, model_size, device=device, dtype=dtype)
+        results = transcribe_tasks(model, audio, language, tasks, log=print)
+    transcribe_seconds = time.perf_counter() - transcribe_start
+
+    # Named after the video title, as if the audio had been saved next to the subtitles
+    media_path = os.path.join(output_dir, f"{source['name']}.{source['ext'] or 'audio'}")
+    output_paths = save_task_results(results, media_path, output_dir, subtitle_formats,
+                                     compact_json=compact_json)
+
+    rtf = transcribe_seconds / stats['audio_seconds'] if stats['audio_seconds'] else 0.0
+    print(f"✅ {' + '.join(TASK_LABELS[task] for task in tasks)} in {transcribe_seconds:.1f}s "
+          f"with {chunk_workers} worker{'s' if chunk_workers > 1 else ''} (RTF {rtf:.2f})")
+    for output_path in output_paths:
+        print(f"✅ Subtitles saved to: {output_path}")
+    print(f"⏱️ URL to subtitles in {time.perf_counter() - start_time:.1f}s")
+    return results
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="AI Video Subtitle Generator")
+    parser.add_argument("--batch", metavar="DIR",
+                        help="Transcribe every supported video in DIR without opening the GUI")
+    parser.add_argument("--file", metavar="PATH",
+                        help="Transcribe a single video without opening the GUI")
+    parser.add_argument("--url", metavar="URL",
+                        help="Transcribe a video URL from its audio stream only, without downloading the video")
+    parser.add_argument("--output", metavar="DIR",
+                        help="Directory for subtitle files (default: next to the input)")
+    parser.add_argument("--model", default="base", choices=["tiny", "base", "small", "medium", "large"],
+                        help="Whisper model size (default: base)")
+    parser.add_argument("--engine", default="whisper", choices=ENGINES,
+                        help="Speech recognition engine: openai-whisper, or the transformers pipeline "
+                             "with batched 30-second windows (default: whisper)")
+    parser.add_argument("--precision", dest="dtype", default="float32", choices=SUPPORTED_DTYPES,
+                        help="Model weight precision; int8 quantizes linear layers for CPU inference "
+                             "(default: float32)")
+    parser.add_argument("--language", default="auto",
+                        help="Language code, or 'auto' to detect (default: auto)")
+    parser.add_argument("--format", dest="subtitle_formats", nargs="+", default=["srt"],
+                        choices=SUBTITLE_FORMATS,
+                        help="One or more subtitle formats written from a single transcription (default: srt)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of files transcribed at once (default: 1)")
+    parser.add_argument("--cores", type=int, default=None,
+                        help="CPU cores shared by the --workers jobs (default: SUBS_CORE_BUDGET or all)")
+    parser.add_argument("--pin-cpus", action="store_true",
+                        help="Pin each batch job to its own CPUs")
+    parser.add_argument("--chunk-workers", type=int, default=1,
+                        help="Transcribe --file in this many parallel overlapping chunks (default: 1)")
+    parser.add_argument("--compact-json", action="store_true",
+                        help="Write minified JSON without token-level data")
+    parser.add_argument("--translate", action="store_true",
+                        help="Translate the speech to English")
+    parser.add_argument("--keep-original", action="store_true",
+                        help="With --translate, also save the original-language transcript "
+                             "(one audio decode and encoder pass for both)")
+    parser.add_argument("--stream", action="store_true",
+                        help="With --file, write SRT/VTT/TXT segments as soon as they are decoded")
+    parser.add_argument("--checkpoint", action="store_true",
+                        help="Save progress next to the outputs and resume interrupted jobs")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always decode and re-run transcription instead of reusing cached audio "
+                             "and results")
+    parser.add_argument("--recursive", action="store_true",
+                        help="Also process videos in subdirectories")
+    parser.add_argument("--install-requirements", action="store_true",
+                        help="pip install -r requirements.txt before starting")
+    parser.add_argument("--device", default=None,
+                        help="Torch device, e.g. cpu or cuda (default: auto)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
     """Main function"""
+    args = parse_args(argv)
+    tasks = tasks_for(args.translate, args.keep_original)
+    if args.install_requirements:
+        install_requirements()
+    missing = missing_requirements()
+    if missing and (args.batch or args.file or args.url):
+        print(f"❌ Missing packages: {', '.join(missing)} - run: pip install -r requirements.txt")
+        return 1
+    if args.batch:
+        summaries = run_batch(
+            args.batch,
+            args.output or args.batch,
+            model_size=args.model,
+            language=args.language if args.language != "auto" else None,
+            subtitle_formats=args.subtitle_formats,
+            workers=args.workers,
+            recursive=args.recursive,
+            cores=args.cores,
+            pin_cpus=args.pin_cpus,
+            device=args.device,
+            dtype=args.dtype,
+            engine=args.engine,
+            use_cache=not args.no_cache,
+            tasks=tasks,
+            compact_json=args.compact_json,
+            checkpoint=args.checkpoint,
+        )
+        return 0 if summaries and all(not summary['error'] for summary in summaries) else 1
+    if args.url:
+        run_url(
+            args.url,
+            args.output or os.getcwd(),
+            model_size=args.model,
+            language=args.language if args.language != "auto" else None,
+            subtitle_formats=args.subtitle_formats,
+            chunk_workers=args.chunk_workers,
+            device=args.device,
+            dtype=args.dtype,
+            engine=args.engine,
+            tasks=tasks,
+            compact_json=args.compact_json,
+        )
+        return 0
+    if args.file:
+        run_single(
+            args.file,
+            args.output or os.path.dirname(os.path.abspath(args.file)),
+            model_size=args.model,
+            language=args.language if args.language != "auto" else None,
+            subtitle_formats=args.subtitle_formats,
+            chunk_workers=args.chunk_workers,
+            device=args.device,
+            dtype=args.dtype,
+            engine=args.engine,
+            use_cache=not args.no_cache,
+            stream=args.stream,
+            tasks=tasks,
+            compact_json=args.compact_json,
+            checkpoint=args.checkpoint,
+        )
+        return 0
+    
     root = tk.Tk()
     app = AISubtitleGenerator(root)
+    if missing:
+        app.log_message(f"⚠️ Missing packages: {', '.join(missing)} - run: pip install -r requirements.txt")
     
     # Center window on screen
     root.update_idletasks()
@@ -463,7 +1676,8 @@ def main():
     root.geometry(f"+{x}+{y}")
     
     root.mainloop()
+    return 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
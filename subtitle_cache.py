@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Subtitle Generator Caches
+On-disk, content-addressed cache of Whisper transcription results and a memory-mapped
+cache of decoded audio, both with LRU eviction
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+
+# Default size limit for the result cache, overridable with SUBS_RESULT_CACHE_MB
+DEFAULT_RESULT_CACHE_MB = int(os.environ.get("SUBS_RESULT_CACHE_MB", "512"))
+
+# Default size limit for the decoded audio cache, overridable with SUBS_AUDIO_CACHE_MB
+DEFAULT_AUDIO_CACHE_MB = int(os.environ.get("SUBS_AUDIO_CACHE_MB", "2048"))
+
+# Media files whose content hash is remembered; the oldest entries are dropped past it
+MAX_HASH_INDEX_ENTRIES = 10000
+
+
+def default_cache_dir():
+    """Return the base directory for the subtitle generator's caches"""
+    override = os.environ.get("SUBS_CACHE_DIR")
+    if override:
+        return override
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+    else:
+        base = os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))
+    return os.path.join(base, "ai-subtitle-generator")
+
+
+def file_identity(path):
+    """Cheap identity of a file on disk: absolute path, size and modification time"""
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+def hash_file(path, chunk_size=4 * 1024 * 1024):
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_json_atomic(path, data):
+    """Write JSON via a temporary file so readers never see a partial file"""
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on ``path`` (created if missing) that other processes respect"""
+    with open(path, 'a+b') as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def cache_entries(directory, suffix, exclude=()):
+    """(mtime, size, path) of the files in a cache directory with the given suffix"""
+    entries = []
+    for name in os.listdir(directory):
+        if not name.endswith(suffix) or name in exclude:
+            continue
+        path = os.path.join(directory, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    return entries
+
+
+def evict_lru(entries, max_bytes):
+    """Remove the least recently used entries until their total size is under ``max_bytes``"""
+    entries = sorted(entries)
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except OSError:
+            # Still mapped by another process on Windows; try again next time
+            pass
+
+
+def touch(path):
+    """Bump a cache entry's modification time: it is the LRU clock used for eviction"""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+class TranscriptionCache:
+    """Content-addressed store of raw transcription results
+
+    Entries are keyed by the SHA-256 of the media file plus the model, language and
+    task, so a renamed copy of a video still hits. Content hashes are remembered per
+    (path, size, mtime) so unchanged files are not re-read on every lookup. That index is
+    merged with the copy on disk under a file lock, so processes sharing the cache keep
+    each other's hashes, and it forgets deleted files and all but the newest
+    ``MAX_HASH_INDEX_ENTRIES``. The least recently used entries are evicted once the
+    cache grows past ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = os.path.join(cache_dir or default_cache_dir(), "results")
+        self.max_bytes = max_bytes if max_bytes is not None else DEFAULT_RESULT_CACHE_MB * 1024 * 1024
+        self.hash_index_path = os.path.join(self.cache_dir, "hash_index.json")
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._hash_index = self._load_hash_index()
+
+    def _load_hash_index(self):
+        try:
+            with open(self.hash_index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def media_hash(self, media_path):
+        """Content hash of a media file, reusing the stored hash if the file is unchanged"""
+        path, size, mtime_ns = file_identity(media_path)
+        with self._lock:
+            known = self._hash_index.get(path)
+        if known and known['size'] == size and known['mtime_ns'] == mtime_ns:
+            return known['sha256']
+
+        sha256 = hash_file(media_path)
+        with self._lock, file_lock(self.hash_index_path + ".lock"):
+            # Start from the file, which may hold hashes other processes added since it was read
+            index = self._load_hash_index()
+            index.pop(path, None)
+            index[path] = {'size': size, 'mtime_ns': mtime_ns, 'sha256': sha256}
+            self._hash_index = self._prune_hash_index(index)
+            write_json_atomic(self.hash_index_path, self._hash_index)
+        return sha256
+
+    @staticmethod
+    def _prune_hash_index(index):
+        """Drop entries of deleted files and all but the newest ``MAX_HASH_INDEX_ENTRIES``"""
+        paths = [path for path in index if os.path.exists(path)][-MAX_HASH_INDEX_ENTRIES:]
+        return {path: index[path] for path in paths}
+
+    @staticmethod
+    def make_key(media_hash, model_size, language=None, task="transcribe", **options):
+        """Cache key for a media hash and the settings that change the transcript"""
+        parts = [media_hash, model_size, language or "auto", task]
+        parts.extend(f"{name}={options[name]}" for name in sorted(options))
+        return hashlib.sha256("|".join(parts).encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Return the cached result dict for a key, or None"""
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        touch(entry_path)
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, key, result):
+        """Store a result dict and evict old entries past the size limit"""
+        with self._lock:
+            write_json_atomic(self._entry_path(key), result)
+            self._evict()
+
+    def lookup(self, media_path, model_size, language=None, task="transcribe", **options):
+        """Hash a media file and fetch its cached result; returns (key, result or None)"""
+        key = self.make_key(self.media_hash(media_path), model_size, language, task, **options)
+        return key, self.get(key)
+
+    def _entries(self):
+        return cache_entries(self.cache_dir, ".json", exclude=(os.path.basename(self.hash_index_path),))
+
+    def _evict(self):
+        """Remove least recently used entries until under the size limit (lock held)"""
+        evict_lru(self._entries(), self.max_bytes)
+
+    def clear(self):
+        """Remove every cached result"""
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def stats(self):
+        """Hit/miss counts for this process plus the cache's current size"""
+        with self._lock:
+            entries = self._entries()
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries),
+                'max_bytes': self.max_bytes,
+            }
+
+
+class AudioCache:
+    """Decoded 16 kHz mono float32 audio stored as ``.npy`` files and read back memory-mapped
+
+    Entries are keyed by file identity (absolute path, size, modification time) and the
+    sample rate, so a hit needs only a ``stat`` call: no hashing, no ffmpeg and no
+    moviepy. ``get`` returns a read-only ``numpy.memmap``, so the operating system pages
+    the samples in on demand and processes mapping the same file share one copy in the
+    page cache. The least recently used entries are evicted past ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.cache_dir = os.path.join(cache_dir or default_cache_dir(), "audio")
+        self.max_bytes = max_bytes if max_bytes is not None else DEFAULT_AUDIO_CACHE_MB * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(media_path, sample_rate=16000):
+        """Cache key for the current version of a media file at a sample rate"""
+        path, size, mtime_ns = file_identity(media_path)
+        return hashlib.sha256(f"{path}|{size}|{mtime_ns}|{sample_rate}".encode('utf-8')).hexdigest()
+
+    def entry_path(self, media_path, sample_rate=16000):
+        """Path of the ``.npy`` file holding a media file's decoded audio"""
+        return os.path.join(self.cache_dir, f"{self.make_key(media_path, sample_rate)}.npy")
+
+    def get(self, media_path, sample_rate=16000):
+        """Memory-map the cached audio of a media file, or return None"""
+        import numpy as np
+
+        entry_path = self.entry_path(media_path, sample_rate)
+        try:
+            audio = np.load(entry_path, mmap_mode='r')
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        touch(entry_path)
+        with self._lock:
+            self.hits += 1
+        return audio
+
+    def put(self, media_path, audio, sample_rate=16000):
+        """Store decoded audio, evict old entries past the size limit and return the mapped copy
+
+        Audio larger than the whole cache is returned as is without being stored.
+        """
+        import numpy as np
+
+        audio = np.asarray(audio, dtype=np.float32)
+        if audio.nbytes > self.max_bytes:
+            return audio
+        entry_path = self.entry_path(media_path, sample_rate)
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, audio)
+            os.replace(temp_path, entry_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        mapped = np.load(entry_path, mmap_mode='r')
+        with self._lock:
+            evict_lru(self._entries(), self.max_bytes)
+        return mapped
+
+    def _entries(self):
+        return cache_entries(self.cache_dir, ".npy")
+
+    def clear(self):
+        """Remove every cached audio file"""
+        with self._lock:
+            evict_lru(self._entries(), 0)
+
+    def stats(self):
+        """Hit/miss counts for this process plus the cache's current size"""
+        with self._lock:
+            entries = self._entries()
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries),
+                'max_bytes': self.max_bytes,
+            }
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+_audio_cache = None
+_audio_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Return the process-wide transcription result cache"""
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = TranscriptionCache()
+        return _result_cache
+
+
+def get_audio_cache():
+    """Return the process-wide decoded audio cache"""
+    global _audio_cache
+    with _audio_cache_lock:
+        if _audio_cache is None:
+            _audio_cache = AudioCache()
+        return _audio_cache
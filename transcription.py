@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+"""
+Transcription Helpers
+Worker-process model loading, parallel chunked transcription with overlap stitching,
+streaming transcription that reports segments as they are decoded, and combined
+transcription + translation sharing one encoder pass
+"""
+
+import os
+import time
+
+from model_registry import get_registry
+
+
+# Whisper models expect 16 kHz mono audio
+SAMPLE_RATE = 16000
+
+DEFAULT_CHUNK_SECONDS = 300.0
+DEFAULT_OVERLAP_SECONDS = 5.0
+
+# Streaming mode decodes short windows so the first segments arrive quickly
+DEFAULT_STREAM_WINDOW_SECONDS = 60.0
+STREAM_PROMPT_SEGMENTS = 3
+
+# Decoding thresholds matching whisper.transcribe's defaults
+FALLBACK_TEMPERATURES = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+# Segments of different tasks ending this close together count as ending at the same point
+DUAL_BOUNDARY_TOLERANCE = 0.2
+
+# Model held by each worker process, loaded once by init_worker
+_worker_model = None
+
+
+def init_worker(model_size, device=None, dtype="float32", threads_per_worker=None):
+    """Process pool initializer: pin the torch thread count and load the model once"""
+    global _worker_model
+    if threads_per_worker:
+        import torch
+        torch.set_num_threads(threads_per_worker)
+    _worker_model = get_registry().get(model_size, device=device, dtype=dtype)
+
+
+def worker_model():
+    """Return the model loaded by init_worker in this process"""
+    if _worker_model is None:
+        raise RuntimeError("Worker model not loaded - use init_worker as the pool initializer")
+    return _worker_model
+
+
+def threads_per_worker(workers, cores=None):
+    """Split ``cores`` (default: all of the machine's cores) evenly across worker processes"""
+    return max(1, (cores or os.cpu_count() or 1) // max(1, workers))
+
+
+def split_audio_windows(num_samples, chunk_seconds=DEFAULT_CHUNK_SECONDS,
+                        overlap_seconds=DEFAULT_OVERLAP_SECONDS, sample_rate=SAMPLE_RATE):
+    """Split an audio buffer into overlapping (start_sample, end_sample) windows"""
+    chunk = int(chunk_seconds * sample_rate)
+    overlap = int(overlap_seconds * sample_rate)
+    if chunk <= overlap:
+        raise ValueError("Chunk length must be longer than the overlap")
+
+    windows = []
+    start = 0
+    while True:
+        end = min(start + chunk, num_samples)
+        windows.append((start, end))
+        if end >= num_samples:
+            break
+        start = end - overlap
+    return windows
+
+
+def _normalize_text(text):
+    """Lower-cased text with whitespace collapsed, for duplicate detection"""
+    return " ".join(text.lower().split())
+
+
+class SegmentStitcher:
+    """Incrementally merge per-window results into absolute, de-duplicated segments
+
+    Windows must be added in order. Segment times are shifted to absolute positions,
+    and in each overlap a segment is kept only from the window whose half of the
+    overlap holds its midpoint. Segments that repeat or mostly cover the previous
+    kept segment are dropped, so text at the window edges is not duplicated.
+    """
+
+    def __init__(self, windows, sample_rate=SAMPLE_RATE):
+        self.windows = list(windows)
+        self.sample_rate = sample_rate
+        self.segments = []
+        self.languages = []
+
+    def add(self, index, result):
+        """Merge the result of window ``index`` and return the newly accepted segments"""
+        start_sample, end_sample = self.windows[index]
+        offset = start_sample / self.sample_rate
+        # Cut points sit in the middle of the overlaps with the neighbouring windows
+        lower_cut = 0.0
+        if index > 0:
+            previous_end = self.windows[index - 1][1] / self.sample_rate
+            lower_cut = (offset + previous_end) / 2
+        upper_cut = float("inf")
+        if index + 1 < len(self.windows):
+            next_start = self.windows[index + 1][0] / self.sample_rate
+            upper_cut = (next_start + end_sample / self.sample_rate) / 2
+
+        if result.get('language'):
+            self.languages.append(result['language'])
+
+        accepted = []
+        for segment in result.get('segments', []):
+            start = segment['start'] + offset
+            end = segment['end'] + offset
+            midpoint = (start + end) / 2
+            if not lower_cut <= midpoint < upper_cut:
+                continue
+
+            if self.segments:
+                previous = self.segments[-1]
+                if _normalize_text(previous['text']) == _normalize_text(segment['text']):
+                    continue
+                covered = previous['end'] - start
+                if end <= previous['end'] or covered > (end - start) / 2:
+                    continue
+                # Trim a small overlap so timestamps stay monotonic
+                start = max(start, previous['end'])
+
+            merged = dict(segment)
+            merged.pop('seek', None)
+            merged['id'] = len(self.segments)
+            merged['start'] = start
+            merged['end'] = end
+            self.segments.append(merged)
+            accepted.append(merged)
+        return accepted
+
+    def result(self):
+        """The merged Whisper-style result so far"""
+        language = max(set(self.languages), key=self.languages.count) if self.languages else None
+        return {
+            'text': "".join(segment['text'] for segment in self.segments),
+            'segments': self.segments,
+            'language': language,
+        }
+
+
+def stitch_segments(chunk_results, sample_rate=SAMPLE_RATE):
+    """Merge per-window results into one Whisper-style result
+
+    ``chunk_results`` is a list of ``(start_sample, end_sample, result)`` tuples in
+    window order.
+    """
+    stitcher = SegmentStitcher([(start, end) for start, end, _ in chunk_results], sample_rate)
+    for index, (_, _, result) in enumerate(chunk_results):
+        stitcher.add(index, result)
+    return stitcher.result()
+
+
+def transcribe_streaming(model, audio, on_segments=None, window_seconds=DEFAULT_STREAM_WINDOW_SECONDS,
+                         overlap_seconds=DEFAULT_OVERLAP_SECONDS, checkpoint=None, **options):
+    """Transcribe ``audio`` window by window, reporting segments as soon as they are final
+
+    ``on_segments(segments, processed_seconds, total_seconds)`` is called after every
+    window with the newly accepted segments (absolute timestamps). The tail of the
+    previous window's text is passed as ``initial_prompt`` so the decoder keeps its
+    context across windows. With a ``checkpoint`` the accepted segments and the next
+    window are saved as it goes, and a matching saved state is resumed from instead of
+    starting at zero. Returns the complete stitched result.
+    """
+    windows = split_audio_windows(len(audio), window_seconds, overlap_seconds)
+    stitcher = SegmentStitcher(windows)
+    total_seconds = len(audio) / SAMPLE_RATE
+    base_prompt = options.pop('initial_prompt', None)
+
+    def processed_seconds(index):
+        # Everything before the next window's cut point is final
+        processed = windows[index][1] / SAMPLE_RATE
+        if index + 1 < len(windows):
+            processed = (windows[index + 1][0] / SAMPLE_RATE + processed) / 2
+        return processed
+
+    def checkpoint_state(next_window):
+        return {
+            'mode': "streaming",
+            'window_seconds': window_seconds,
+            'overlap_seconds': overlap_seconds,
+            'next_window': next_window,
+            'processed_seconds': processed_seconds(next_window - 1) if next_window else 0.0,
+            'segments': stitcher.segments,
+            'languages': stitcher.languages,
+        }
+
+    first_window = 0
+    state = checkpoint.load() if checkpoint is not None else None
+    if (state and state.get('mode') == "streaming" and state.get('window_seconds') == window_seconds
+            and state.get('overlap_seconds') == overlap_seconds):
+        first_window = min(state['next_window'], len(windows))
+        stitcher.segments = state['segments']
+        stitcher.languages = state['languages']
+        if on_segments and first_window:
+            on_segments(list(stitcher.segments), processed_seconds(first_window - 1), total_seconds)
+
+    for index in range(first_window, len(windows)):
+        start, end = windows[index]
+        prompt = base_prompt
+        if stitcher.segments:
+            prompt = "".join(segment['text'] for segment in stitcher.segments[-STREAM_PROMPT_SEGMENTS:])
+        result = model.transcribe(audio[start:end], verbose=None, initial_prompt=prompt, **options)
+        accepted = stitcher.add(index, result)
+        if checkpoint is not None:
+            checkpoint.save(checkpoint_state(index + 1), force=index + 1 == len(windows))
+        if on_segments:
+            on_segments(accepted, processed_seconds(index), total_seconds)
+
+    return stitcher.result()
+
+
+def _tokens_to_segments(tokenizer, tokens, time_offset, segment_frames, input_stride, time_precision):
+    """Split one window's decoded tokens into timestamped segments
+
+    Mirrors the segmentation in ``whisper.transcribe``. Returns the segments and the
+    number of mel frames they consume; audio after the last complete timestamp pair is
+    left for the next window.
+    """
+    timestamp_begin = tokenizer.timestamp_begin
+    is_timestamp = [token >= timestamp_begin for token in tokens]
+    single_timestamp_ending = is_timestamp[-2:] == [False, True]
+    consecutive = [i + 1 for i in range(len(tokens) - 1) if is_timestamp[i] and is_timestamp[i + 1]]
+
+    def make_segment(segment_tokens, start, end):
+        text_tokens = [token for token in segment_tokens if token < tokenizer.eot]
+        return {
+            'start': start,
+            'end': end,
+            'text': tokenizer.decode(text_tokens),
+            'tokens': list(segment_tokens),
+        }
+
+    segments = []
+    if consecutive:
+        slices = list(consecutive)
+        if single_timestamp_ending:
+            slices.append(len(tokens))
+        last_slice = 0
+        for current_slice in slices:
+            sliced = tokens[last_slice:current_slice]
+            start_position = sliced[0] - timestamp_begin
+            end_position = sliced[-1] - timestamp_begin
+            segments.append(make_segment(sliced, time_offset + start_position * time_precision,
+                                         time_offset + end_position * time_precision))
+            last_slice = current_slice
+        if single_timestamp_ending:
+            consumed = segment_frames
+        else:
+            consumed = (tokens[last_slice - 1] - timestamp_begin) * input_stride
+    else:
+        duration = segment_frames * time_precision / input_stride
+        timestamps = [token for token, flag in zip(tokens, is_timestamp) if flag]
+        if timestamps and timestamps[-1] != timestamp_begin:
+            duration = (timestamps[-1] - timestamp_begin) * time_precision
+        segments.append(make_segment(tokens, time_offset, time_offset + duration))
+        consumed = segment_frames
+    return segments, consumed
+
+
+def _decode_with_fallback(model, audio_features, task, language, prompt, fp16):
+    """Decode precomputed encoder output, retrying at higher temperatures like ``transcribe``"""
+    from whisper.decoding import DecodingOptions, decode
+
+    result = None
+    for temperature in FALLBACK_TEMPERATURES:
+        options = DecodingOptions(
+            task=task,
+            language=language,
+            temperature=temperature,
+            best_of=5 if temperature > 0 else None,
+            prompt=prompt or None,
+            fp16=fp16,
+        )
+        result = decode(model, audio_features, options)[0]
+        needs_fallback = (result.compression_ratio > COMPRESSION_RATIO_THRESHOLD
+                          or result.avg_logprob < LOGPROB_THRESHOLD)
+        if result.no_speech_prob > NO_SPEECH_THRESHOLD:
+            needs_fallback = False
+        if not needs_fallback:
+            break
+    return result
+
+
+def _common_boundary(task_segments, window_start, limit, tolerance=DUAL_BOUNDARY_TOLERANCE):
+    """Latest time up to ``limit`` that no segment of any task crosses (None if there is none)
+
+    Candidates are ``limit`` and the segment ends before it, so every task can stop
+    its segments at the same point and resume together in the next window.
+    """
+    candidates = {limit}
+    for segments in task_segments:
+        candidates.update(segment['end'] for segment in segments if window_start < segment['end'] < limit)
+    for cut in sorted(candidates, reverse=True):
+        if not any(segment['start'] < cut - tolerance and segment['end'] > cut + tolerance
+                   for segments in task_segments for segment in segments):
+            return cut
+    return None
+
+
+def transcribe_dual(model, audio, language=None, tasks=("transcribe", "translate"), log=None,
+                    checkpoint=None):
+    """Transcribe and translate ``audio`` with one mel computation and one encoder pass per window
+
+    The encoder output of every 30-second window is computed once and handed to the
+    decoder for each task, so only the (cheaper) decoding is repeated. Both tasks
+    advance through the audio together. Each window ends at a point that no segment of
+    either task crosses, and that neither decode has passed the end of. Segments after
+    that point are decoded again by both tasks with the next window, so the transcript
+    and the translation cover the same stretches of audio. With a ``checkpoint`` the
+    window position and the segments so far are saved periodically and a matching
+    saved state is resumed from. Returns a dict mapping each task to a Whisper-style
+    result.
+
+    With a single task this is ``whisper.transcribe``'s own seek loop, so a checkpointed
+    run splits the audio into the same segments as a plain ``transcribe`` call.
+    """
+    import torch
+    from whisper.audio import HOP_LENGTH, N_FRAMES, N_SAMPLES, log_mel_spectrogram, pad_or_trim
+    from whisper.tokenizer import get_tokenizer
+
+    if "translate" in tasks and not model.is_multilingual:
+        raise ValueError("English-only models cannot translate - choose a multilingual model")
+    if not model.is_multilingual:
+        language = "en"
+
+    fp16 = model.device.type == "cuda"
+    mel_dtype = torch.float16 if fp16 else torch.float32
+    mel = log_mel_spectrogram(audio, model.dims.n_mels, padding=N_SAMPLES)
+    content_frames = mel.shape[-1] - N_FRAMES
+    input_stride = N_FRAMES // model.dims.n_audio_ctx
+    time_precision = input_stride * HOP_LENGTH / SAMPLE_RATE
+    tokenizer_options = {'num_languages': model.num_languages} if hasattr(model, "num_languages") else {}
+    tokenizer = get_tokenizer(model.is_multilingual, **tokenizer_options)
+    # The decoder only reads this many of the latest prompt tokens
+    prompt_length = model.dims.n_text_ctx // 2 - 1
+
+    segments = {task: [] for task in tasks}
+    prompts = {task: [] for task in tasks}
+    seek = 0
+    state = checkpoint.load() if checkpoint is not None else None
+    if state and state.get('mode') == "dual" and sorted(state['segments']) == sorted(tasks):
+        seek = state['seek']
+        language = state['language']
+        segments = state['segments']
+        prompts = state['prompts']
+
+    while seek < content_frames:
+        segment_frames = min(N_FRAMES, content_frames - seek)
+        time_offset = seek * HOP_LENGTH / SAMPLE_RATE
+        mel_segment = pad_or_trim(mel[:, seek:seek + segment_frames], N_FRAMES)
+        mel_segment = mel_segment.to(model.device).to(mel_dtype).unsqueeze(0)
+
+        # The shared encoder pass
+        with torch.no_grad():
+            audio_features = model.embed_audio(mel_segment)
+
+        if language is None:
+            _, probs = model.detect_language(audio_features)
+            language = max(probs[0], key=probs[0].get)
+            if log:
+                log(f"🌐 Detected language: {language}")
+
+        decoded = {}
+        consumed = {}
+        temperatures = {}
+        skip_window = False
+        for task in tasks:
+            result = _decode_with_fallback(model, audio_features, task, language, prompts[task], fp16)
+            if (result.no_speech_prob > NO_SPEECH_THRESHOLD
+                    and result.avg_logprob < LOGPROB_THRESHOLD):
+                skip_window = True
+                break
+            window_segments, consumed[task] = _tokens_to_segments(
+                tokenizer, list(result.tokens), time_offset, segment_frames, input_stride, time_precision)
+            for segment in window_segments:
+                segment.update(seek=seek, temperature=result.temperature, avg_logprob=result.avg_logprob,
+                               compression_ratio=result.compression_ratio,
+                               no_speech_prob=result.no_speech_prob)
+            decoded[task] = window_segments
+            temperatures[task] = result.temperature
+
+        if skip_window:
+            seek += segment_frames
+            continue
+
+        # Move on by at most what either task consumed, to a point where both tasks' segments
+        # end; later segments are re-decoded by both tasks next window
+        advance = min(consumed.values())
+        if advance <= 0:
+            advance = segment_frames
+        limit = time_offset + advance * HOP_LENGTH / SAMPLE_RATE
+        boundary = _common_boundary(decoded.values(), time_offset, limit)
+        if boundary is None:
+            boundary = limit
+            if log:
+                log(f"⚠️ Transcript and translation may not line up around {limit:.1f}s: "
+                    f"no segment boundary is shared by both")
+        else:
+            advance = max(1, round((boundary - time_offset) * SAMPLE_RATE / HOP_LENGTH))
+        for task in tasks:
+            kept = [segment for segment in decoded[task]
+                    if segment['end'] <= boundary + DUAL_BOUNDARY_TOLERANCE]
+            for segment in kept:
+                if not segment['text'].strip():
+                    continue
+                segment['id'] = len(segments[task])
+                segments[task].append(segment)
+                prompts[task].extend(segment['tokens'])
+            # Like whisper.transcribe, stop conditioning on text that needed a high temperature
+            prompts[task] = [] if temperatures[task] > 0.5 else prompts[task][-prompt_length:]
+        seek += advance
+
+        if checkpoint is not None:
+            checkpoint.save({'mode': "dual", 'seek': seek, 'language': language,
+                             'segments': segments, 'prompts': prompts})
+
+        if log:
+            done = "transcribed and translated" if len(tasks) > 1 else f"{tasks[0]}d"
+            log(f"   {min(seek, content_frames) * HOP_LENGTH / SAMPLE_RATE:.0f}/"
+                f"{content_frames * HOP_LENGTH / SAMPLE_RATE:.0f}s {done}")
+
+    return {
+        task: {
+            'text': "".join(segment['text'] for segment in task_segments),
+            'segments': task_segments,
+            'language': language,
+        }
+        for task, task_segments in segments.items()
+    }
+
+
+def _window_model(model_key=None):
+    """Model for a window task: the registry's model for ``model_key``, else the worker's model"""
+    if model_key is not None:
+        return get_registry().get(*model_key)
+    return worker_model()
+
+
+def _transcribe_window(audio_window, options, model_key=None):
+    """Pool task: transcribe one window with the worker's model"""
+    return _window_model(model_key).transcribe(audio_window, verbose=None, **options)
+
+
+def _transcribe_mapped_window(path, start, end, options, model_key=None):
+    """Pool task: map the cached audio file and transcribe one window of it"""
+    import numpy as np
+    audio_window = np.load(path, mmap_mode='r')[start:end]
+    return _window_model(model_key).transcribe(np.array(audio_window), verbose=None, **options)
+
+
+def mapped_audio_path(audio):
+    """Path of the ``.npy`` file that ``audio`` maps in full, or None for in-memory audio"""
+    import mmap
+    import numpy as np
+    # A whole-file mapping sits directly on the mmap; slices of it are based on the parent array
+    if isinstance(audio, np.memmap) and isinstance(audio.base, mmap.mmap) and audio.filename:
+        return audio.filename
+    return None
+
+
+def _submit_windows(submit, audio, windows, options, model_key=None):
+    """Submit a transcription task per window; returns the futures in window order"""
+    mapped_path = mapped_audio_path(audio)
+    if mapped_path:
+        return [submit(_transcribe_mapped_window, mapped_path, start, end, options, model_key)
+                for start, end in windows]
+    return [submit(_transcribe_window, audio[start:end], options, model_key) for start, end in windows]
+
+
+def transcribe_chunked(audio, model_size, workers, chunk_seconds=DEFAULT_CHUNK_SECONDS,
+                       overlap_seconds=DEFAULT_OVERLAP_SECONDS, device=None, dtype="float32",
+                       log=None, cores=None, scheduler=None, **options):
+    """Transcribe overlapping windows of ``audio`` in parallel worker processes
+
+    Each worker loads the model once, and ``cores`` (default: all) are split between
+    the workers' torch thread pools. ``options`` are passed to ``transcribe`` for
+    every window (e.g. ``language`` or ``task``). Returns the stitched result with
+    absolute timestamps. Memory-mapped audio from the audio cache is not sent to the
+    workers: each one maps the cached file and reads only its own window.
+
+    With a ``scheduler`` (a ``JobScheduler``) the windows are queued as jobs on its
+    slots, which use the models in their own registries, instead of starting another
+    process pool; ``workers`` and ``cores`` are then set by the scheduler.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    windows = split_audio_windows(len(audio), chunk_seconds, overlap_seconds)
+    workers = scheduler.max_jobs if scheduler is not None else workers
+    workers = max(1, min(workers, len(windows)))
+    if log:
+        log(f"🧩 Split {len(audio) / SAMPLE_RATE:.1f}s of audio into {len(windows)} windows "
+            f"({chunk_seconds:.0f}s, {overlap_seconds:.0f}s overlap) across {workers} workers")
+
+    start_time = time.perf_counter()
+
+    def collect(futures):
+        chunk_results = []
+        for index, ((start, end), future) in enumerate(zip(windows, futures), 1):
+            chunk_results.append((start, end, future.result()))
+            if log:
+                log(f"   Window {index}/{len(windows)} done "
+                    f"({time.perf_counter() - start_time:.1f}s elapsed)")
+        return chunk_results
+
+    if scheduler is not None:
+        model_key = get_registry().make_key(model_size, device, dtype)
+        chunk_results = collect(_submit_windows(scheduler.submit, audio, windows, options, model_key))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(model_size, device, dtype, threads_per_worker(workers, cores))) as pool:
+            chunk_results = collect(_submit_windows(pool.submit, audio, windows, options))
+
+    return stitch_segments(chunk_results)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+UI Event Pump
+Thread-safe event queue that worker threads post to and the Tk main loop drains in
+batches at a fixed frame rate
+"""
+
+import queue
+
+
+# Interval between drains of the event queue (20 frames per second)
+DEFAULT_FRAME_MS = 50
+
+# Events handled per frame, so a flood of events can never freeze the window
+MAX_EVENTS_PER_FRAME = 5000
+
+# Lines kept in a log widget before the oldest are dropped
+MAX_LOG_LINES = 5000
+
+
+class UIEventPump:
+    """Delivers events from worker threads to handlers on the Tk main thread
+
+    ``post`` never blocks and never touches Tk, so it is safe to call from any thread,
+    as often as every download progress tick. Every ``frame_ms`` the main loop drains
+    the queue. Events of a ``coalesce`` kind (status text, progress) only deliver
+    their latest value per frame; events of a ``batch`` kind (log lines) are handed to
+    their handler together as one list. Other events, including ``call``, run one by
+    one in the order they were posted, after flushing whatever came before them.
+    """
+
+    def __init__(self, root, frame_ms=DEFAULT_FRAME_MS, max_events=MAX_EVENTS_PER_FRAME):
+        self.root = root
+        self.frame_ms = frame_ms
+        self.max_events = max_events
+        self._queue = queue.SimpleQueue()
+        self._handlers = {"call": (lambda function, args, kwargs: function(*args, **kwargs), None)}
+        self._running = False
+
+    def register(self, kind, handler, coalesce=False, batch=False):
+        """Handle events of ``kind`` on the main thread
+
+        Coalesced handlers are called with the arguments of the last event of the
+        frame; batch handlers with a list of the first argument of every event.
+        """
+        mode = "coalesce" if coalesce else "batch" if batch else None
+        self._handlers[kind] = (handler, mode)
+
+    def post(self, kind, *args):
+        """Queue an event from any thread"""
+        self._queue.put((kind, args))
+
+    def call(self, function, *args, **kwargs):
+        """Run ``function`` on the main thread, in order with the other events"""
+        self._queue.put(("call", (function, args, kwargs)))
+
+    def start(self):
+        """Begin draining the queue from the Tk main loop"""
+        if not self._running:
+            self._running = True
+            self.root.after(self.frame_ms, self._drain)
+
+    def stop(self):
+        """Stop draining the queue (pending events are kept)"""
+        self._running = False
+
+    def _drain(self):
+        if not self._running:
+            return
+        try:
+            self.drain()
+        finally:
+            self.root.after(self.frame_ms, self._drain)
+
+    def drain(self):
+        """Handle up to ``max_events`` queued events now; returns the number handled"""
+        latest = {}
+        batches = {}
+        handled = 0
+        while handled < self.max_events:
+            try:
+                kind, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            handled += 1
+            handler, mode = self._handlers.get(kind, (None, None))
+            if handler is None:
+                continue
+            if mode == "coalesce":
+                latest.pop(kind, None)
+                latest[kind] = args
+            elif mode == "batch":
+                batches.setdefault(kind, []).append(args[0])
+            else:
+                self._flush(latest, batches)
+                handler(*args)
+        self._flush(latest, batches)
+        return handled
+
+    def _flush(self, latest, batches):
+        for kind, items in batches.items():
+            self._handlers[kind][0](items)
+        for kind, args in latest.items():
+            self._handlers[kind][0](*args)
+        batches.clear()
+        latest.clear()
+
+
+def append_log_lines(text_widget, messages, max_lines=MAX_LOG_LINES):
+    """Append messages to a Tk text widget in one insert and drop lines past ``max_lines``"""
+    text_widget.insert("end", "".join(f"{message}\n" for message in messages))
+    line_count = int(text_widget.index("end-1c").split(".")[0])
+    if line_count > max_lines:
+        text_widget.delete("1.0", f"{line_count - max_lines + 1}.0")
+    text_widget.see("end")
@@ -8,25 +8,63 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
 import os
-import sys
-import subprocess
 import json
+import functools
+import time
 from urllib.parse import urlparse
 import re
 
-try:
-    import yt_dlp
-except ImportError:
-    print("yt-dlp not found. Installing...")
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "yt-dlp"])
-    import yt_dlp
+from download_archive import get_download_archive, partial_downloads
+from download_queue import DEFAULT_DOWNLOAD_WORKERS, DownloadQueue, JobSkipped
+from download_tuner import TuningSession, describe_levels, get_download_tuner
+from format_index import FormatIndex
+from metadata_cache import extract_info_cached, get_metadata_cache, video_key
+from playlist_expander import PLAYLIST_PAGE_SIZE, expand_in_pages, is_list_url, iter_list_entries
+from profiling import PROFILE_MODES, PROFILE_SUFFIX, JobProfiler, format_bytes
+from ui_events import UIEventPump, append_log_lines
+from ytdlp_loader import load_yt_dlp, preload_yt_dlp
+
+
+# Torch traces only apply to the subtitle generator
+DOWNLOAD_PROFILE_MODES = [mode for mode in PROFILE_MODES if mode != "torch"]
+
+
+def split_urls(text):
+    """URLs in a pasted list: one per line, or separated by spaces or commas"""
+    return [url for url in re.split(r'[\s,]+', text.strip()) if url]
+
+
+def download_profile_hooks(profiler):
+    """yt-dlp progress and postprocessor hooks that record download and post-processing spans"""
+    started = {}
+
+    def progress_hook(d):
+        key = ("download", d.get('filename'))
+        if d['status'] == 'downloading':
+            started.setdefault(key, (time.time(), time.perf_counter()))
+        elif d['status'] == 'finished' and key in started:
+            start, start_time = started.pop(key)
+            profiler.record("download", start, time.perf_counter() - start_time,
+                            file=os.path.basename(d['filename']),
+                            bytes=d.get('total_bytes') or d.get('downloaded_bytes'))
+
+    def postprocessor_hook(d):
+        key = ("postprocess", d.get('postprocessor'))
+        if d['status'] == 'started':
+            started[key] = (time.time(), time.perf_counter())
+        elif d['status'] == 'finished' and key in started:
+            start, start_time = started.pop(key)
+            profiler.record("postprocess", start, time.perf_counter() - start_time,
+                            postprocessor=d.get('postprocessor'))
+
+    return progress_hook, postprocessor_hook
 
 
 class YouTubeDownloader:
     def __init__(self, root):
         self.root = root
         self.root.title("Enhanced YouTube Video Downloader")
-        self.root.geometry("800x600")
+        self.root.geometry("800x800")
         self.root.configure(bg='#2b2b2b')
         
         # Variables
@@ -36,11 +74,27 @@ class YouTubeDownloader:
         self.quality_var = tk.StringVar(value="best")
         self.subtitle_var = tk.StringVar(value="none")
         self.subtitle_only_var = tk.BooleanVar()
-        self.available_formats = []  # Store available formats from video
+        self.profile_mode = tk.StringVar(value="off")
+        self.workers_var = tk.StringVar(value=str(DEFAULT_DOWNLOAD_WORKERS))
+        self.skip_archived = tk.BooleanVar(value=True)
+        self.queue_busy = False
+        self.expansion_stop = threading.Event()  # Set to stop listing playlists and channels
+        self.format_index = None  # Format index of the loaded video
         self.available_subtitles = []  # Store available subtitles from video
         
         self.setup_ui()
         
+        # Worker threads post log lines and status text; the main loop draws them in batches
+        self.ui = UIEventPump(root)
+        self.ui.register("log", lambda messages: append_log_lines(self.log_text, messages), batch=True)
+        self.ui.register("status", lambda status: self.status_label.config(text=status), coalesce=True)
+        self.ui.register("queue", self._refresh_queue, coalesce=True)
+        self.ui.start()
+        
+        # Downloads run on a bounded pool of queue workers; a video is only queued once at a time
+        self.download_queue = DownloadQueue(self._run_download_job, max_workers=int(self.workers_var.get()),
+                                            on_change=lambda job: self.ui.post("queue"), key=video_key)
+        
     def setup_ui(self):
         """Setup the user interface"""
         # Configure style
@@ -73,6 +127,13 @@ class YouTubeDownloader:
                                    values=["mp4", "mp3", "webm", "mkv", "avi"], state="readonly", width=20)
         format_combo.grid(row=2, column=1, sticky=tk.W, pady=5)
         
+        # Profiling (stage timings, optionally with a cProfile capture)
+        profile_frame = ttk.Frame(main_frame)
+        profile_frame.grid(row=2, column=2, sticky=tk.E, pady=5)
+        ttk.Label(profile_frame, text="Profile:").pack(side=tk.LEFT)
+        ttk.Combobox(profile_frame, textvariable=self.profile_mode, values=DOWNLOAD_PROFILE_MODES,
+                     state="readonly", width=8).pack(side=tk.LEFT, padx=(5, 0))
+        
         # Quality Selection
         ttk.Label(main_frame, text="Quality:").grid(row=3, column=0, sticky=tk.W, pady=5)
         self.quality_combo = ttk.Combobox(main_frame, textvariable=self.quality_var,
@@ -114,6 +175,10 @@ class YouTubeDownloader:
         download_btn = ttk.Button(buttons_frame, text="Download Video", command=self.download_video)
         download_btn.pack(side=tk.LEFT, padx=5)
         
+        # Paste URLs Button (queue a whole list from the clipboard)
+        paste_btn = ttk.Button(buttons_frame, text="Paste URL List", command=self.paste_urls)
+        paste_btn.pack(side=tk.LEFT, padx=5)
+        
         # Download Subtitles Only Button
         subtitles_btn = ttk.Button(buttons_frame, text="Download Subtitles Only", command=self.download_subtitles_only_btn)
         subtitles_btn.pack(side=tk.LEFT, padx=5)
@@ -137,6 +202,30 @@ class YouTubeDownloader:
                                                  insertbackground='#ffffff')
         self.log_text.grid(row=10, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
         
+        # Download Queue (one row per job, plus the combined throughput)
+        ttk.Label(main_frame, text="Download Queue:").grid(row=11, column=0, sticky=tk.W, pady=(10, 5))
+        queue_controls = ttk.Frame(main_frame)
+        queue_controls.grid(row=11, column=1, columnspan=2, sticky=tk.E, pady=(10, 5))
+        ttk.Label(queue_controls, text="Parallel downloads:").pack(side=tk.LEFT)
+        ttk.Spinbox(queue_controls, from_=1, to=16, textvariable=self.workers_var, width=4, state="readonly",
+                    command=lambda: self.download_queue.resize(int(self.workers_var.get()))).pack(side=tk.LEFT,
+                                                                                                 padx=(5, 10))
+        ttk.Checkbutton(queue_controls, text="Skip already downloaded",
+                        variable=self.skip_archived).pack(side=tk.LEFT, padx=5)
+        ttk.Button(queue_controls, text="Cancel Queued", command=self.cancel_queued).pack(side=tk.LEFT, padx=5)
+        ttk.Button(queue_controls, text="Clear Finished", command=self.clear_finished).pack(side=tk.LEFT, padx=5)
+        
+        columns = ("title", "status", "progress", "speed", "retries")
+        self.queue_tree = ttk.Treeview(main_frame, columns=columns, show="headings", height=6)
+        for column, heading, width in zip(columns, ("Video", "Status", "Progress", "Speed", "Retries"),
+                                          (330, 170, 70, 90, 60)):
+            self.queue_tree.heading(column, text=heading)
+            self.queue_tree.column(column, width=width, stretch=column in ("title", "status"))
+        self.queue_tree.grid(row=12, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
+        
+        self.throughput_label = ttk.Label(main_frame, text="No downloads queued")
+        self.throughput_label.grid(row=13, column=0, columnspan=3, sticky=tk.W, pady=5)
+        
         # Configure grid weights
         self.root.columnconfigure(0, weight=1)
         self.root.rowconfigure(0, weight=1)
@@ -144,18 +233,15 @@ class YouTubeDownloader:
         main_frame.rowconfigure(10, weight=1)
         
     def log_message(self, message):
-        """Add message to log text area"""
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        """Add message to log text area (safe to call from any thread)"""
+        self.ui.post("log", message)
         
     def update_status(self, status):
-        """Update status label"""
-        self.status_label.config(text=status)
-        self.root.update_idletasks()
+        """Update status label (safe to call from any thread; progress ticks are merged per frame)"""
+        self.ui.post("status", status)
         
     def validate_url(self, url):
-        """Validate YouTube URL"""
+        """Validate YouTube URL (a video, playlist or channel)"""
         youtube_patterns = [
             r'(https?://)?(www\.)?(youtube|youtu|youtube-nocookie)\.(com|be)/',
             r'(https?://)?(www\.)?youtu\.be/',
@@ -178,7 +264,7 @@ class YouTubeDownloader:
         self.log_text.delete(1.0, tk.END)
         self.update_status("Ready to download")
         # Reset quality dropdown
-        self.available_formats = []
+        self.format_index = None
         self.quality_combo['values'] = ["Load URL first to see available qualities"]
         self.quality_var.set("Load URL first to see available qualities")
         # Reset subtitle dropdown
@@ -205,43 +291,40 @@ class YouTubeDownloader:
     def _get_video_info_thread(self, url):
         """Thread function to get video info"""
         try:
-            self.progress.start()
+            self.ui.call(self.progress.start)
             self.update_status("Getting video information...")
             
-            # Enhanced yt-dlp options for better format detection
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'listformats': True,
-                'extract_flat': False,
-            }
+            if is_list_url(url):
+                self._list_info(url)
+                return
+            # Served from the metadata cache when this video was looked up recently
+            info, cached = extract_info_cached(url)
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                
-                self.log_message("=" * 50)
-                self.log_message("VIDEO INFORMATION")
-                self.log_message("=" * 50)
-                self.log_message(f"Title: {info.get('title', 'N/A')}")
-                self.log_message(f"Duration: {self.format_duration(info.get('duration', 0))}")
-                self.log_message(f"View Count: {info.get('view_count', 'N/A'):,}")
-                self.log_message(f"Upload Date: {info.get('upload_date', 'N/A')}")
-                self.log_message(f"Uploader: {info.get('uploader', 'N/A')}")
-                self.log_message(f"Description: {info.get('description', 'N/A')[:100]}...")
-                
-                # Process and store available formats
-                self.process_available_formats(info)
-                
-                # Process and store available subtitles
-                self.process_available_subtitles(info)
-                
-                self.update_status("Video information retrieved successfully")
+            self.log_message("=" * 50)
+            self.log_message("VIDEO INFORMATION")
+            self.log_message("=" * 50)
+            if cached:
+                self.log_message(f"⚡ From metadata cache ({self.metadata_cache_summary()})")
+            self.log_message(f"Title: {info.get('title', 'N/A')}")
+            self.log_message(f"Duration: {self.format_duration(info.get('duration', 0))}")
+            self.log_message(f"View Count: {info.get('view_count', 'N/A'):,}")
+            self.log_message(f"Upload Date: {info.get('upload_date', 'N/A')}")
+            self.log_message(f"Uploader: {info.get('uploader', 'N/A')}")
+            self.log_message(f"Description: {info.get('description', 'N/A')[:100]}...")
+            
+            # Process and store available formats
+            self.process_available_formats(info, url)
+            
+            # Process and store available subtitles
+            self.process_available_subtitles(info)
+            
+            self.update_status("Video information retrieved successfully")
                 
         except Exception as e:
             self.log_message(f"Error getting video info: {str(e)}")
             self.update_status("Error getting video information")
         finally:
-            self.progress.stop()
+            self.ui.call(self.progress.stop)
             
     def format_duration(self, seconds):
         """Format duration from seconds to readable format"""
@@ -258,13 +341,14 @@ class YouTubeDownloader:
             return f"{minutes:02d}:{seconds:02d}"
             
     def download_video(self):
-        """Download video"""
-        url = self.url_var.get().strip()
-        if not url:
+        """Queue the entered URL(s) for download"""
+        urls = split_urls(self.url_var.get())
+        if not urls:
             messagebox.showerror("Error", "Please enter a YouTube URL")
             return
             
-        if not self.validate_url(url):
+        invalid = [url for url in urls if not self.validate_url(url)]
+        if len(invalid) == len(urls):
             messagebox.showerror("Error", "Please enter a valid YouTube URL")
             return
             
@@ -272,63 +356,169 @@ class YouTubeDownloader:
             messagebox.showerror("Error", "Download path does not exist")
             return
         
+        for url in invalid:
+            self.log_message(f"⚠️ Skipping invalid URL: {url}")
+        urls = [url for url in urls if url not in invalid]
+        
         # Check if subtitle-only download is selected
         if self.subtitle_only_var.get():
-            # Run subtitle-only download in separate thread
-            threading.Thread(target=self.download_subtitles_only, args=(url,), daemon=True).start()
+            # Run the subtitle-only downloads one after another in a separate thread
+            threading.Thread(target=self.download_subtitles_for, args=(urls,), daemon=True).start()
             return
             
-        # Check if user has loaded video info and selected a quality
-        current_quality = self.quality_var.get()
-        if current_quality in ["Load URL first to see available qualities", "No formats available"]:
-            messagebox.showerror("Error", "Please load video information first to see available qualities")
+        self.queue_downloads(urls)
+        
+    def paste_urls(self):
+        """Queue every URL in a pasted list (one per line, or separated by spaces or commas)"""
+        try:
+            text = self.root.clipboard_get()
+        except tk.TclError:
+            messagebox.showerror("Error", "The clipboard is empty")
             return
-            
-        # Run in separate thread
-        threading.Thread(target=self._download_video_thread, args=(url,), daemon=True).start()
+        urls = [url for url in split_urls(text) if self.validate_url(url)]
+        if not urls:
+            messagebox.showerror("Error", "No YouTube URLs found in the clipboard")
+            return
+        self.queue_downloads(urls)
+        
+    def queue_downloads(self, urls):
+        """Add URLs to the download queue with the options currently selected
+        
+        Playlists and channels are listed in the background and their videos queued
+        page by page as they are found.
+        """
+        options = self.download_options(urls)
+        self.download_queue.resize(int(self.workers_var.get()))
+        videos = [url for url in urls if not is_list_url(url)]
+        if videos:
+            self._enqueue(videos, options)
+        for url in urls:
+            if is_list_url(url):
+                threading.Thread(target=self._expand_list, args=(url, options, self.expansion_stop),
+                                 daemon=True).start()
+        
+    def _enqueue(self, urls, options):
+        """Queue video URLs, leaving out archived videos and duplicates (any thread)"""
+        queued_count = len(urls)
+        if options['use_archive']:
+            archive = get_download_archive()
+            urls = [url for url in urls if not archive.has_url(url)]
+            if len(urls) < queued_count:
+                self.log_message(f"⏭️ Skipped {queued_count - len(urls)} already downloaded (in the archive)")
+        jobs = self.download_queue.add(urls, options)
+        if len(jobs) < len(urls):
+            self.log_message(f"⏭️ Skipped {len(urls) - len(jobs)} duplicate(s) already in the queue")
+        self.log_message(f"📥 Queued {len(jobs)} download(s) - {options['quality']}, "
+                         f"{self.download_queue.max_workers} at a time")
+        return jobs
+        
+    def _expand_list(self, url, options, stop):
+        """List a playlist or channel lazily and queue its videos page by page (worker thread)"""
+        self.log_message(f"📃 Listing videos of {url}")
+        try:
+            listed = expand_in_pages(url, lambda page: self._enqueue(page, options), stop=stop)
+            if stop.is_set():
+                self.log_message(f"🛑 Stopped listing {url} after {listed} video(s)")
+            else:
+                self.log_message(f"📃 Listed {listed} video(s) from {url}")
+        except Exception as e:
+            self.log_message(f"❌ Error listing {url}: {str(e)}")
+            
+    def _list_info(self, url):
+        """Show how many videos a playlist or channel has, counting them as they are listed"""
+        self.log_message("=" * 50)
+        self.log_message("PLAYLIST INFORMATION")
+        self.log_message("=" * 50)
+        self.log_message(f"URL: {url}")
+        listed = 0
+        for _ in iter_list_entries(url):
+            listed += 1
+            if listed % PLAYLIST_PAGE_SIZE == 0:
+                self.update_status(f"Listing videos... {listed} so far")
+        self.log_message(f"Videos: {listed}")
+        self.log_message("Qualities and subtitles are chosen per video when the list is downloaded")
+        self.update_status("Playlist information retrieved successfully")
         
-    def _download_video_thread(self, url):
-        """Thread function to download video with enhanced format handling"""
+
+    def download_options(self, urls):
+        """Snapshot of the selected download settings for queued jobs
+
+        Subtitle tracks and format IDs differ per video, so the selected track and the
+        exact formats only apply when the single video queued is the one loaded. Without
+        loaded qualities the best available is used.
+        """
+        single_video = len(urls) == 1 and not is_list_url(urls[0])
+        index = self.format_index
+        if not single_video or index is None or index.key != video_key(urls[0]):
+            index = None
+        quality = self.quality_var.get()
+        if quality in ["Load URL first to see available qualities", "No formats available"]:
+            quality = "Best Available (High Quality)"
+        subtitle_info = None
+        selected_subtitle = self.subtitle_var.get()
+        if single_video and selected_subtitle not in ("", "None", "No subtitles available"):
+            for sub in self.available_subtitles:
+                if sub['display'] == selected_subtitle:
+                    subtitle_info = sub
+                    break
+        return {
+            'quality': quality,
+            'format_selection': self.get_enhanced_format_selection(quality, index),
+            'subtitle': subtitle_info,
+            'download_path': self.download_path.get(),
+            'profile_mode': self.profile_mode.get(),
+            'use_archive': self.skip_archived.get(),
+        }
+        
+    def _run_download_job(self, job):
+        """Download one queued job in a queue worker thread (raises on failure so it is retried)"""
+        options = job.options
+        url = job.url
+        profiler = JobProfiler(url, options['profile_mode'])
         try:
-            self.progress.start()
-            self.update_status("Downloading video...")
-            
-            # Get the format selection
-            format_selection = self.get_enhanced_format_selection()
+            profiler.start_capture()
             
             # Enhanced download options for high quality
             ydl_opts = {
-                'format': format_selection,
-                'outtmpl': os.path.join(self.download_path.get(), '%(title)s.%(ext)s'),
-                'progress_hooks': [self.progress_hook],
+                'format': options['format_selection'],
+                'outtmpl': os.path.join(options['download_path'], '%(title)s.%(ext)s'),
+                'progress_hooks': [functools.partial(self.progress_hook, job)],
                 'merge_output_format': 'mp4',  # Ensure merged output is mp4
                 'writesubtitles': False,
                 'writeautomaticsub': False,
                 'ignoreerrors': False,
+                'quiet': True,
+                'no_warnings': True,
+                # Interrupted downloads continue from their .part files (and fragment state)
+                'continuedl': True,
+                'nopart': False,
+                'overwrites': False,
+                'retries': 10,
+                'fragment_retries': 10,
+                'skip_unavailable_fragments': False,
             }
             
+            # Fragment concurrency and chunk size tuned per host from measured throughput
+            tuning = TuningSession(get_download_tuner(), url)
+            ydl_opts.update(tuning.options())
+            ydl_opts['progress_hooks'].append(tuning.progress_hook)
+            if profiler.enabled:
+                progress_hook, postprocessor_hook = download_profile_hooks(profiler)
+                ydl_opts['progress_hooks'].append(progress_hook)
+                ydl_opts['postprocessor_hooks'] = [postprocessor_hook]
+            
             # Handle subtitle download options
-            selected_subtitle = self.subtitle_var.get()
-            if selected_subtitle and selected_subtitle != "None" and selected_subtitle != "No subtitles available":
-                # Find the selected subtitle info
-                subtitle_info = None
-                for sub in self.available_subtitles:
-                    if sub['display'] == selected_subtitle:
-                        subtitle_info = sub
-                        break
-                
-                if subtitle_info:
-                    ydl_opts['writesubtitles'] = True
-                    ydl_opts['writeautomaticsub'] = subtitle_info['type'] == 'automatic'
-                    ydl_opts['subtitleslangs'] = [subtitle_info['lang_code']]
-                    ydl_opts['subtitlesformat'] = 'srt/best'
-                    self.log_message(f"📝 Will download subtitles: {selected_subtitle}")
+            subtitle_info = options['subtitle']
+            if subtitle_info:
+                ydl_opts['writesubtitles'] = True
+                ydl_opts['writeautomaticsub'] = subtitle_info['type'] == 'automatic'
+                ydl_opts['subtitleslangs'] = [subtitle_info['lang_code']]
+                ydl_opts['subtitlesformat'] = 'srt/best'
             
             # Handle audio-only downloads
-            selected_quality = self.quality_var.get()
-            if "Audio Only" in selected_quality:
+            if "Audio Only" in options['quality']:
                 ydl_opts.update({
-                    'format': 'bestaudio/best',
+                    'format': options['format_selection'],
                     'postprocessors': [{
                         'key': 'FFmpegExtractAudio',
                         'preferredcodec': 'mp3',
@@ -336,34 +526,107 @@ class YouTubeDownloader:
                     }],
                 })
             
-            self.log_message("=" * 50)
-            self.log_message("STARTING DOWNLOAD")
-            self.log_message("=" * 50)
-            self.log_message(f"URL: {url}")
-            self.log_message(f"Selected Quality: {selected_quality}")
-            self.log_message(f"Selected Subtitles: {self.subtitle_var.get()}")
-            self.log_message(f"Format Selection: {format_selection}")
-            self.log_message(f"Download Path: {self.download_path.get()}")
-            self.log_message("")
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
+            attempt = f" (retry {job.retries})" if job.retries else ""
+            self.log_message(f"⬇️ [{job.id}] Starting{attempt}: {url} ({describe_levels(tuning.levels)})")
+            
+            # The info dict comes from the metadata cache when fresh; a retry refetches it
+            # in case the cached stream URLs were the reason the last attempt failed
+            with profiler.span("extract_info"):
+                info, cached = extract_info_cached(url, refresh=job.attempts > 1)
+            if cached:
+                self.log_message(f"⚡ [{job.id}] Video info from metadata cache ({self.metadata_cache_summary()})")
+            archive = get_download_archive()
+            if options['use_archive'] and archive.has_info(info):
+                raise JobSkipped("already downloaded")
+            with load_yt_dlp().YoutubeDL(ydl_opts) as ydl:
+                tuning.attach(ydl.params)
+                job.title = info.get('title')
+                self.download_queue.changed(job)
+                # Sized before the download starts, so resumed bytes are not counted as transferred
+                partial = partial_downloads(os.path.splitext(ydl.prepare_filename(info))[0])
+                tuning.resume_from(partial)
+                job.resume_from(partial)
+                if partial:
+                    self.log_message(f"↩️ [{job.id}] Resuming {len(partial)} partial file(s), "
+                                     f"{format_bytes(sum(partial.values()))} already downloaded")
+                info = ydl.process_ie_result(info, download=True)
+                output_file = ydl.prepare_filename(info)
+            archive.add(info)
                 
-            self.log_message("\n✅ Download completed successfully!")
-            self.update_status("Download completed successfully")
-            messagebox.showinfo("Success", "Video downloaded successfully!")
-            
+            self.log_message(f"✅ [{job.id}] Download completed: {job.title or url}")
+            if profiler.enabled:
+                prefix = os.path.splitext(output_file)[0]
+                profiler.stop_capture(prefix)
+                for line in profiler.summary_lines():
+                    self.log_message(line)
+                self.log_message(f"🧪 Profile saved to: {profiler.write(prefix + PROFILE_SUFFIX)}")
+            
+        except JobSkipped:
+            self.log_message(f"⏭️ [{job.id}] Already downloaded (in the archive): {job.title or url}")
+            raise
         except Exception as e:
-            error_msg = f"❌ Error downloading video: {str(e)}"
-            self.log_message(f"\n{error_msg}")
-            self.update_status("Download failed")
-            messagebox.showerror("Error", error_msg)
+            self.log_message(f"❌ [{job.id}] Error downloading video: {str(e)}")
+            raise
         finally:
-            self.progress.stop()
-            
-    def get_enhanced_format_selection(self):
-        """Enhanced format selection that properly handles high quality downloads"""
-        selected_quality = self.quality_var.get()
+            profiler.stop_capture(os.path.join(options['download_path'], f"download-{job.id}"))
+            
+    def metadata_cache_summary(self):
+        """Hit rate of the video metadata cache for the log"""
+        stats = get_metadata_cache().stats()
+        return (f"hit rate {stats['hit_rate'] * 100:.0f}%, "
+                f"{stats['hits']}/{stats['hits'] + stats['misses']} lookups")
+        
+    def cancel_queued(self):
+        """Cancel the downloads that have not started yet or are waiting to retry"""
+        # Playlists still being listed stop too; later lists get a fresh event
+        self.expansion_stop.set()
+        self.expansion_stop = threading.Event()
+        cancelled = self.download_queue.cancel_pending()
+        self.log_message(f"🛑 Cancelled {cancelled} queued download(s)")
+        
+    def clear_finished(self):
+        """Remove finished, failed and cancelled downloads from the queue list"""
+        for job in self.download_queue.clear_finished():
+            if self.queue_tree.exists(str(job.id)):
+                self.queue_tree.delete(str(job.id))
+        self._refresh_queue()
+        
+    def _refresh_queue(self):
+        """Redraw the queue rows that changed and the combined throughput (main thread)"""
+        for job in self.download_queue.take_changed():
+            values = (
+                job.title or job.url,
+                job.state + (f" - {job.error}" if job.error and job.state != "done" else ""),
+                f"{job.percent:.0f}%",
+                f"{format_bytes(job.speed)}/s" if job.speed else "",
+                job.retries,
+            )
+            item = str(job.id)
+            if self.queue_tree.exists(item):
+                self.queue_tree.item(item, values=values)
+            else:
+                self.queue_tree.insert("", tk.END, iid=item, values=values)
+        
+        stats = self.download_queue.stats()
+        self.throughput_label.config(
+            text=f"{stats['running']} running, {stats['queued']} queued, {stats['done']} done, "
+                 f"{stats['skipped']} skipped, {stats['failed']} failed - {format_bytes(stats['current_speed'])}/s now, "
+                 f"{format_bytes(stats['average_speed'])}/s average, "
+                 f"{format_bytes(stats['transferred_bytes'])} total")
+        if stats['idle'] and self.queue_busy:
+            self.update_status(f"Queue finished: {stats['done']} done, {stats['failed']} failed")
+        self.queue_busy = not stats['idle']
+            
+    def get_enhanced_format_selection(self, selected_quality=None, index=None):
+        """Enhanced format selection that properly handles high quality downloads
+        
+        With the format index of the video being downloaded, the selection is the exact
+        format IDs indexed for the quality; otherwise a generic selector is used.
+        """
+        if selected_quality is None:
+            selected_quality = self.quality_var.get()
+        if index is not None and index.selector(selected_quality):
+            return index.selector(selected_quality)
         
         # Handle special cases
         if selected_quality == "Best Available (High Quality)":
@@ -390,95 +653,60 @@ class YouTubeDownloader:
         # Fallback to best available
         return "best"
             
-    def progress_hook(self, d):
-        """Enhanced progress hook for yt-dlp"""
+    def progress_hook(self, job, d):
+        """Enhanced progress hook for yt-dlp: records a queued job's progress"""
         if d['status'] == 'downloading':
-            percent = d.get('_percent_str', 'N/A')
-            speed = d.get('_speed_str', 'N/A')
-            eta = d.get('_eta_str', 'N/A')
-            self.update_status(f"Downloading... {percent} at {speed} (ETA: {eta})")
+            job.update(downloaded_bytes=d.get('downloaded_bytes'),
+                       total_bytes=d.get('total_bytes') or d.get('total_bytes_estimate'),
+                       speed=d.get('speed'), filename=d.get('filename'))
+            self.download_queue.changed(job)
             
         elif d['status'] == 'finished':
+            job.update(downloaded_bytes=d.get('total_bytes') or d.get('downloaded_bytes'),
+                       filename=d.get('filename'))
+            self.download_queue.changed(job)
             filename = os.path.basename(d['filename'])
-            self.log_message(f"✅ Downloaded: {filename}")
-            self.update_status("Processing and merging streams...")
+            self.log_message(f"✅ [{job.id}] Downloaded: {filename}")
             
-    def process_available_formats(self, info):
-        """Enhanced format processing with better quality detection"""
-        self.available_formats = []
-        quality_options = []
-        
-        # Add enhanced quality options
-        quality_options.extend([
-            "Best Available (Maximum Quality)",
-            "Best Available (High Quality)",
-        ])
+    def process_available_formats(self, info, url):
+        """Index the video's formats in one pass and offer the qualities found"""
+        index = FormatIndex(info, key=video_key(url))
+        self.format_index = index
+        quality_options = index.quality_options()
         
         if 'formats' in info:
-            # Analyze available formats
-            video_qualities = set()
-            has_audio = False
-            
-            for fmt in info['formats']:
-                # Check for video formats
-                if fmt.get('vcodec') != 'none' and fmt.get('height'):
-                    video_qualities.add(fmt.get('height'))
-                
-                # Check for audio formats
-                if fmt.get('acodec') != 'none':
-                    has_audio = True
-            
-            # Sort qualities in descending order
-            sorted_qualities = sorted(video_qualities, reverse=True)
-            
-            # Add specific quality options
-            for quality in sorted_qualities:
-                if quality >= 1080:
-                    quality_options.append(f"🎬 {quality}p (Full HD)")
-                elif quality >= 720:
-                    quality_options.append(f"🎬 {quality}p (HD)")
-                elif quality >= 480:
-                    quality_options.append(f"🎬 {quality}p (Standard)")
-                else:
-                    quality_options.append(f"🎬 {quality}p")
-            
-            # Add audio option if available
-            if has_audio:
-                quality_options.append("🎵 Audio Only (MP3)")
-            
-            # Log available qualities
+            # Log available qualities with the exact streams each one downloads
             self.log_message("\n📊 AVAILABLE QUALITIES:")
             self.log_message("-" * 30)
-            for quality in sorted_qualities:
-                self.log_message(f"✅ {quality}p available")
+            for height in index.heights:
+                streams = index.streams_for(height)
+                details = " + ".join(f"{entry.format_id} {entry.codec} {entry.ext}" for entry in streams)
+                self.log_message(f"✅ {height}p available ({details})")
             
-            if has_audio:
+            if index.audio:
                 self.log_message("✅ Audio-only available")
                 
-            self.log_message(f"\n🎯 Total qualities found: {len(sorted_qualities)}")
+            self.log_message(f"\n🎯 Total qualities found: {len(index.heights)}")
             
             # Show format details
             self.log_message("\n🔍 FORMAT ANALYSIS:")
             self.log_message("-" * 30)
-            video_formats = [f for f in info['formats'] if f.get('vcodec') != 'none' and f.get('height')]
-            audio_formats = [f for f in info['formats'] if f.get('acodec') != 'none' and f.get('vcodec') == 'none']
-            
-            self.log_message(f"📹 Video formats: {len(video_formats)}")
-            self.log_message(f"🎵 Audio formats: {len(audio_formats)}")
+            self.log_message(f"📹 Video formats: {index.video_format_count}")
+            self.log_message(f"🎵 Audio formats: {len(index.audio)}")
             
             # Show highest quality details
-            if video_formats:
-                highest_quality = max(video_formats, key=lambda x: x.get('height', 0))
-                self.log_message(f"🏆 Highest quality: {highest_quality.get('height')}p ({highest_quality.get('ext')})")
+            if index.heights:
+                highest = index.streams_for(index.heights[0])[0]
+                self.log_message(f"🏆 Highest quality: {index.heights[0]}p ({highest.ext})")
         
         # Update the quality dropdown
         if quality_options:
-            self.quality_combo['values'] = quality_options
-            self.quality_var.set(quality_options[0])  # Set to best available
+            self.ui.call(self.quality_combo.configure, values=quality_options)
+            self.ui.call(self.quality_var.set, quality_options[0])  # Set to best available
             self.log_message(f"\n✅ Quality dropdown updated with {len(quality_options)} options")
         else:
-            self.quality_combo['values'] = ["No formats available"]
-            self.quality_var.set("No formats available")
+            self.ui.call(self.quality_combo.configure, values=["No formats available"])
+            self.ui.call(self.quality_var.set, "No formats available")
             self.log_message("\n❌ No video formats found")
 
     def process_available_subtitles(self, info):
@@ -522,10 +750,10 @@ class YouTubeDownloader:
         
         # Update the subtitle dropdown
         if len(subtitle_options) > 1:  # More than just "None"
-            self.subtitle_combo['values'] = subtitle_options
+            self.ui.call(self.subtitle_combo.configure, values=subtitle_options)
             self.log_message(f"\n✅ Found {len(subtitle_options)-1} subtitle options")
         else:
-            self.subtitle_combo['values'] = ["None", "No subtitles available"]
+            self.ui.call(self.subtitle_combo.configure, values=["None", "No subtitles available"])
             self.log_message("\n❌ No subtitles found for this video")
     
     def get_language_name(self, lang_code):
@@ -545,14 +773,14 @@ class YouTubeDownloader:
     def download_subtitles_only(self, url):
         """Download only subtitles without video"""
         try:
-            self.progress.start()
+            self.ui.call(self.progress.start)
             self.update_status("Downloading subtitles...")
             
             # Get subtitle selection
             selected_subtitle = self.subtitle_var.get()
             if not selected_subtitle or selected_subtitle == "None" or selected_subtitle == "No subtitles available":
-                messagebox.showerror("Error", "Please select subtitles to download")
-                self.progress.stop()
+                self.ui.call(messagebox.showerror, "Error", "Please select subtitles to download")
+                self.ui.call(self.progress.stop)
                 self.update_status("Ready to download")
                 return
                 
@@ -564,8 +792,8 @@ class YouTubeDownloader:
                     break
             
             if not subtitle_info:
-                messagebox.showerror("Error", "Selected subtitle not found")
-                self.progress.stop()
+                self.ui.call(messagebox.showerror, "Error", "Selected subtitle not found")
+                self.ui.call(self.progress.stop)
                 self.update_status("Ready to download")
                 return
             
@@ -590,20 +818,26 @@ class YouTubeDownloader:
             self.log_message(f"Download Path: {self.download_path.get()}")
             self.log_message("")
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([url])
+            info, _ = extract_info_cached(url)
+            with load_yt_dlp().YoutubeDL(ydl_opts) as ydl:
+                ydl.process_ie_result(info, download=True)
                 
             self.log_message("\n✅ Subtitles downloaded successfully!")
             self.update_status("Subtitles downloaded successfully")
-            messagebox.showinfo("Success", "Subtitles downloaded successfully!")
+            self.ui.call(messagebox.showinfo, "Success", "Subtitles downloaded successfully!")
             
         except Exception as e:
             error_msg = f"❌ Error downloading subtitles: {str(e)}"
             self.log_message(error_msg)
             self.update_status("Error downloading subtitles")
-            messagebox.showerror("Error", f"Failed to download subtitles: {str(e)}")
+            self.ui.call(messagebox.showerror, "Error", f"Failed to download subtitles: {str(e)}")
         finally:
-            self.progress.stop()
+            self.ui.call(self.progress.stop)
+            
+    def download_subtitles_for(self, urls):
+        """Download only the subtitles of each URL in turn"""
+        for url in urls:
+            self.download_subtitles_only(url)
             
     def download_subtitles_only_btn(self):
         """Handle subtitle-only download button click"""
@@ -633,6 +867,7 @@ def main():
     """Main function"""
     root = tk.Tk()
     app = YouTubeDownloader(root)
+    preload_yt_dlp()
     
     # Center window on screen
     root.update_idletasks()
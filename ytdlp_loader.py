@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+yt-dlp Loader
+Imports yt-dlp on first use, without pulling in the Tk downloader, so the GUI, the
+subtitle CLI and the API can all share it
+"""
+
+import threading
+
+
+def load_yt_dlp():
+    """Import yt-dlp on first use, so the window opens without waiting for it"""
+    try:
+        import yt_dlp
+    except ImportError:
+        raise RuntimeError("yt-dlp is not installed - run: pip install -r requirements.txt")
+    return yt_dlp
+
+
+def preload_yt_dlp():
+    """Import yt-dlp in the background while the user is still typing a URL"""
+    def worker():
+        try:
+            load_yt_dlp()
+        except RuntimeError:
+            pass
+    threading.Thread(target=worker, daemon=True).start()